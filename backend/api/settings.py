@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,12 +48,19 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachingTokenAuthentication',
     )
 }
 
+# Token lookups are cached per process (LRU, entries expire after the TTL
+# in seconds); see core/authentication.py
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +98,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # SQLite takes one writer at a time; uploads arriving together (the
+        # desktop batch upload) wait their turn instead of failing after 5 s
+        'OPTIONS': {
+            'timeout': 30,
+        },
     }
 }
 
@@ -129,4 +144,47 @@ USE_TZ = True
 STATIC_URL = 'static/'
 
 CORS_ALLOW_ALL_ORIGINS = True
-
+# The web client revalidates cached datasets with ETag / If-None-Match
+CORS_EXPOSE_HEADERS = ['ETag']
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match')
+
+# Report generation
+# Rendered PDFs and chart thumbnails are cached on disk; bulk exports and
+# thumbnails render in worker processes
+REPORT_CACHE_DIR = BASE_DIR / 'report_cache'
+CHART_CACHE_DIR = BASE_DIR / 'chart_cache'
+REPORT_WORKERS = 4
+# Most a columnar (.npz) upload may inflate to; about 1M rows with short names
+COLUMNAR_UPLOAD_MAX_SIZE = 512 * 1024 * 1024
+
+# Request profiling (opt-in, e.g. REQUEST_PROFILING=1 python manage.py runserver)
+# Adds a Server-Timing header to every response and logs it; a sample of
+# requests is run under cProfile and written to PROFILE_DIR
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING') == '1'
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0.05'))
+PROFILE_DIR = BASE_DIR / 'profiles'
+# Off by default: the allocation peak is per process, so requests traced for
+# it run one at a time, which skews the latencies being profiled
+PROFILE_MEMORY = os.environ.get('PROFILE_MEMORY') == '1'
+
+# Metrics served at /api/metrics. When the server runs several worker
+# processes, point METRICS_DIR at a directory they share so every scrape
+# adds up all of them; files of exited workers are folded in and removed
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 1.0
+# /api/metrics needs a staff user's token unless this is set
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC') == '1'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -2,4 +2,9 @@ from django.apps import AppConfig
 
 
 class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Connects the token cache invalidation signals
+        from . import authentication  # noqa: F401
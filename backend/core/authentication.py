@@ -0,0 +1,124 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from .metrics import CACHE_LOOKUPS
+
+# Token lookups kept per process, and for how long. Deleting a token
+# (logout) or changing its user drops the entry at once in this process;
+# other worker processes notice within the TTL.
+TOKEN_CACHE_SIZE = getattr(settings, 'TOKEN_CACHE_SIZE', 10000)
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 60)
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token key -> (user, token) with a time to live.
+    Counts hits, misses, evictions and expirations for stats().
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for key in [k for k, (_, (user, _)) in self._entries.items() if user.pk == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_s': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache()
+
+
+class CachingTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers recent token lookups, so most
+    requests skip the authtoken_token/auth_user query. Failed lookups are
+    not cached; inactive users and deleted tokens fail as before.
+    """
+    cache = token_cache
+
+    def authenticate_credentials(self, key):
+        cached = self.cache.get(key)
+        CACHE_LOOKUPS.inc(cache='token', result='miss' if cached is None else 'hit')
+        if cached is not None:
+            user, token = cached
+            # Each request gets its own copy, so nothing set on request.user
+            # leaks into other requests
+            return copy.copy(user), token
+
+        user, token = super().authenticate_credentials(key)
+        self.cache.set(key, (user, token))
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    # e.g. deactivated: the next request has to be checked again
+    token_cache.discard_user(instance.pk)
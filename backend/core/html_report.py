@@ -0,0 +1,164 @@
+import math
+
+from django.template.loader import render_to_string
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Same palette as the web frontend charts (web-frontend/src/components/charts/colors.js)
+COLORS = ["#3b82f6", "#10b981", "#f59e0b", "#ef4444", "#8b5cf6", "#14b8a6"]
+SERIES_COLORS = {'Flowrate': "#4e73df", 'Pressure': "#e74a3b", 'Temperature': "#f6c23e"}
+
+WIDTH, HEIGHT = 420, 260
+# Plot area inside the chart (left, top, right, bottom)
+PLOT = (48, 16, WIDTH - 110, HEIGHT - 48)
+
+
+def _color(i):
+    return COLORS[i % len(COLORS)]
+
+
+def _num(value):
+    return f"{value:.4g}"
+
+
+def _svg(body):
+    return mark_safe(
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+        f'width="{WIDTH}" height="{HEIGHT}" font-family="sans-serif" font-size="11">'
+        + ''.join(body) + '</svg>'
+    )
+
+
+def _legend(names, colors):
+    x = PLOT[2] + 12
+    body = []
+    for i, (name, color) in enumerate(zip(names, colors)):
+        y = PLOT[1] + 14 * i
+        body.append(f'<rect x="{x}" y="{y}" width="10" height="10" fill="{color}"/>')
+        body.append(f'<text x="{x + 14}" y="{y + 9}">{escape(name)}</text>')
+    return body
+
+
+def _scale(lo, hi, out_lo, out_hi):
+    if hi == lo:
+        hi = lo + 1
+    return lambda v: out_lo + (v - lo) * (out_hi - out_lo) / (hi - lo)
+
+
+def _axes(x_label, y_label, y_lo, y_hi):
+    left, top, right, bottom = PLOT
+    return [
+        f'<line x1="{left}" y1="{bottom}" x2="{right}" y2="{bottom}" stroke="#333"/>',
+        f'<line x1="{left}" y1="{top}" x2="{left}" y2="{bottom}" stroke="#333"/>',
+        f'<text x="{left - 4}" y="{bottom}" text-anchor="end">{_num(y_lo)}</text>',
+        f'<text x="{left - 4}" y="{top + 8}" text-anchor="end">{_num(y_hi)}</text>',
+        f'<text x="{(left + right) / 2}" y="{HEIGHT - 6}" text-anchor="middle">{escape(x_label)}</text>',
+        f'<text x="12" y="{(top + bottom) / 2}" text-anchor="middle" '
+        f'transform="rotate(-90 12 {(top + bottom) / 2})">{escape(y_label)}</text>',
+    ]
+
+
+def pie_svg(labels, counts):
+    total = sum(counts) or 1
+    cx, cy, r = 130, HEIGHT / 2, 100
+    body = []
+    angle = -math.pi / 2
+    for i, count in enumerate(counts):
+        sweep = 2 * math.pi * count / total
+        if sweep >= 2 * math.pi - 1e-9:
+            body.append(f'<circle cx="{cx}" cy="{cy}" r="{r}" fill="{_color(i)}"/>')
+            continue
+        x0, y0 = cx + r * math.cos(angle), cy + r * math.sin(angle)
+        angle += sweep
+        x1, y1 = cx + r * math.cos(angle), cy + r * math.sin(angle)
+        large = 1 if sweep > math.pi else 0
+        body.append(
+            f'<path d="M{cx},{cy} L{x0:.2f},{y0:.2f} A{r},{r} 0 {large} 1 {x1:.2f},{y1:.2f} Z" '
+            f'fill="{_color(i)}" stroke="#fff"/>'
+        )
+    names = [f"{label} ({count / total:.1%})" for label, count in zip(labels, counts)]
+    return _svg(body + _legend(names, [_color(i) for i in range(len(labels))]))
+
+
+def bar_svg(labels, series, x_label, y_label):
+    """series: list of (name, values, color) drawn as grouped bars"""
+    left, top, right, bottom = PLOT
+    values = [v for _, vals, _ in series for v in vals]
+    y_lo, y_hi = min(0, min(values, default=0)), max(0, max(values, default=0))
+    y = _scale(y_lo, y_hi, bottom, top)
+
+    group_width = (right - left) / max(1, len(labels))
+    bar_width = group_width * 0.8 / max(1, len(series))
+    body = _axes(x_label, y_label, y_lo, y_hi)
+    for g, label in enumerate(labels):
+        gx = left + g * group_width + group_width * 0.1
+        for s, (_, vals, color) in enumerate(series):
+            y0, y1 = sorted((y(0), y(vals[g])))
+            body.append(f'<rect x="{gx + s * bar_width:.2f}" y="{y0:.2f}" width="{bar_width:.2f}" '
+                        f'height="{y1 - y0:.2f}" fill="{color}"/>')
+        body.append(f'<text x="{gx + group_width * 0.4:.2f}" y="{bottom + 12}" '
+                    f'text-anchor="middle" font-size="9">{escape(label[:12])}</text>')
+    if len(series) > 1:
+        body += _legend([name for name, _, _ in series], [color for _, _, color in series])
+    return _svg(body)
+
+
+def scatter_svg(xs, ys, types, x_label, y_label):
+    left, top, right, bottom = PLOT
+    x = _scale(min(xs, default=0), max(xs, default=1), left + 4, right - 4)
+    y = _scale(min(ys, default=0), max(ys, default=1), bottom - 4, top + 4)
+    type_names = list(dict.fromkeys(types))
+    colors = {t: _color(i) for i, t in enumerate(type_names)}
+
+    body = _axes(x_label, y_label, min(ys, default=0), max(ys, default=1))
+    for xv, yv, t in zip(xs, ys, types):
+        body.append(f'<circle cx="{x(xv):.1f}" cy="{y(yv):.1f}" r="3" '
+                    f'fill="{colors[t]}" fill-opacity="0.7"/>')
+    return _svg(body + _legend(type_names, [colors[t] for t in type_names]))
+
+
+def histogram_svg(edges, counts, x_label):
+    left, top, right, bottom = PLOT
+    y = _scale(0, max(counts, default=1), bottom, top)
+    bin_width = (right - left) / max(1, len(counts))
+
+    body = _axes(x_label, 'Frequency', 0, max(counts, default=1))
+    for i, count in enumerate(counts):
+        body.append(f'<rect x="{left + i * bin_width:.2f}" y="{y(count):.2f}" '
+                    f'width="{bin_width - 1:.2f}" height="{bottom - y(count):.2f}" fill="#8e44ad"/>')
+    body.append(f'<text x="{left}" y="{bottom + 12}">{_num(edges[0])}</text>')
+    body.append(f'<text x="{right}" y="{bottom + 12}" text-anchor="end">{_num(edges[-1])}</text>')
+    return _svg(body)
+
+
+def render_html_report(dataset, stats):
+    """
+    Self-contained HTML report with inline SVG charts, built only from
+    Dataset fields and the precomputed Dataset.stats aggregates
+    """
+    types = stats['types']
+    labels = [t['equipment_type'] for t in types]
+    sample = stats['scatter_sample']
+    histogram = stats['temperature_histogram']
+
+    charts = [
+        ("Equipment Type Distribution", pie_svg(labels, [t['count'] for t in types])),
+        ("Average by Type", bar_svg(labels, [
+            (name, [t[f'avg_{name.lower()}'] for t in types], color)
+            for name, color in SERIES_COLORS.items()
+        ], 'Equipment Type', 'Average Value')),
+        ("Flowrate vs Pressure", scatter_svg(
+            sample['flowrates'], sample['pressures'], sample['types'], 'Flowrate', 'Pressure'
+        )),
+        ("Temperature Distribution", histogram_svg(
+            histogram['edges'], histogram['counts'], 'Temperature'
+        )),
+    ]
+
+    return render_to_string('core/report.html', {
+        'dataset': dataset,
+        'flowrate': stats['flowrate'],
+        'types': types,
+        'charts': charts,
+        'sampled': len(sample['flowrates']) < stats['total_count'],
+    })
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from .aggregates import compute_stats
+from .models import Dataset, Equipment
+
+# Equipment rows per INSERT, and per batch of model instances held in memory
+INSERT_BATCH_SIZE = 5000
+
+# Arrays a columnar upload (.npz) has to contain, and the kind of each
+COLUMNS = {
+    'names': 'U',
+    'types': 'U',
+    'flowrates': 'f',
+    'pressures': 'f',
+    'temperatures': 'f',
+}
+NAME_MAX_LENGTH = Equipment._meta.get_field('name').max_length
+
+# CSV column -> column name; text columns default to Unknown/NA
+CSV_TEXT_COLUMNS = {'Equipment Name': 'names', 'Type': 'types'}
+CSV_NUMBER_COLUMNS = {'Flowrate': 'flowrates', 'Pressure': 'pressures', 'Temperature': 'temperatures'}
+
+
+class IngestError(ValueError):
+    """The uploaded data can't be stored; the message is shown to the client"""
+
+
+def ingest_dataset(user, filename, names, types, flowrates, pressures, temperatures):
+    """
+    Store a dataset from whole columns, as checked by read_csv or
+    read_columns: one Dataset row and its Equipment rows inserted in
+    batches, all in one transaction. Dataset.stats is computed here.
+    Returns: the new Dataset
+    """
+    flowrates = np.asarray(flowrates, dtype=float)
+    pressures = np.asarray(pressures, dtype=float)
+    temperatures = np.asarray(temperatures, dtype=float)
+    total_count = len(flowrates)
+    stats = compute_stats(flowrates, pressures, temperatures, types)
+
+    with transaction.atomic():
+        dataset = Dataset.objects.create(
+            user=user,
+            filename=filename,
+            total_count=total_count,
+            avg_flowrate=flowrates.mean() if total_count else 0.0,
+            avg_pressure=pressures.mean() if total_count else 0.0,
+            avg_temperature=temperatures.mean() if total_count else 0.0,
+            stats=stats,
+        )
+
+        # Plain Python values, so the database adapter doesn't see NumPy scalars
+        columns = [list(names), list(types), flowrates.tolist(), pressures.tolist(), temperatures.tolist()]
+        for start in range(0, total_count, INSERT_BATCH_SIZE):
+            batch = zip(*(column[start:start + INSERT_BATCH_SIZE] for column in columns))
+            Equipment.objects.bulk_create([
+                Equipment(
+                    dataset=dataset,
+                    name=name,
+                    equipment_type=equipment_type,
+                    flowrate=flowrate,
+                    pressure=pressure,
+                    temperature=temperature,
+                )
+                for name, equipment_type, flowrate, pressure, temperature in batch
+            ])
+    return dataset
+
+
+def read_csv(uploaded_file):
+    """
+    Columns of a CSV upload. Every row needs a number in each of Flowrate,
+    Pressure and Temperature; a blank or non-numeric cell rejects the file.
+    Returns: dict of column name -> NumPy array or list of str
+    """
+    try:
+        df = pd.read_csv(uploaded_file)
+    except Exception as e:
+        raise IngestError(f"Invalid CSV: {e}")
+
+    missing = [column for column in CSV_NUMBER_COLUMNS if column not in df]
+    if missing:
+        raise IngestError(f"Invalid CSV: missing columns {', '.join(missing)}")
+
+    columns = {}
+    for csv_column, name in CSV_NUMBER_COLUMNS.items():
+        values = pd.to_numeric(df[csv_column], errors='coerce').to_numpy(dtype=float)
+        if not np.isfinite(values).all():
+            line = int(np.flatnonzero(~np.isfinite(values))[0]) + 2  # header is line 1
+            raise IngestError(f"Invalid CSV: '{csv_column}' is missing or not a number on line {line}")
+        columns[name] = values
+    for csv_column, name in CSV_TEXT_COLUMNS.items():
+        columns[name] = df[csv_column].astype(str) if csv_column in df else ['Unknown/NA'] * len(df)
+    return columns
+
+
+def check_sizes(archive):
+    """
+    Refuse an .npz that would inflate past COLUMNAR_UPLOAD_MAX_SIZE, or whose
+    arrays claim more data than they hold, before anything is decompressed
+    """
+    max_size = getattr(settings, 'COLUMNAR_UPLOAD_MAX_SIZE', 512 * 1024 * 1024)
+    total = 0
+    for info in archive.zip.infolist():
+        # Reading an entry never yields more than its declared size
+        total += info.file_size
+        if total > max_size:
+            raise IngestError(f"Columns are larger than {max_size // (1024 * 1024)} MB uncompressed")
+        with archive.zip.open(info) as f:
+            # NumPy allocates the array from its header before reading the data
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+        if int(np.prod(shape, dtype=object)) * dtype.itemsize > info.file_size:
+            raise IngestError(f"Invalid columnar file: {info.filename} is shorter than its header says")
+
+
+def read_columns(uploaded_file):
+    """
+    Columns of an .npz upload as written by the desktop client, checked for
+    size, the expected arrays, types and lengths. Nothing in it is unpickled.
+    Returns: dict of array name -> NumPy array
+    """
+    try:
+        with np.load(uploaded_file, allow_pickle=False) as archive:
+            missing = [name for name in COLUMNS if name not in archive.files]
+            if missing:
+                raise IngestError(f"Missing columns: {', '.join(missing)}")
+            check_sizes(archive)
+            columns = {name: archive[name] for name in COLUMNS}
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(f"Invalid columnar file: {e}")
+
+    for name, kind in COLUMNS.items():
+        column = columns[name]
+        if column.ndim != 1 or column.dtype.kind != kind:
+            raise IngestError(f"Column '{name}' has the wrong type ({column.dtype})")
+        if kind == 'f' and not np.isfinite(column).all():
+            raise IngestError(f"Column '{name}' has missing or infinite values")
+        if kind == 'U' and column.dtype.itemsize // 4 > NAME_MAX_LENGTH:
+            raise IngestError(f"Column '{name}' has values longer than {NAME_MAX_LENGTH} characters")
+    if len({len(column) for column in columns.values()}) != 1:
+        raise IngestError("Columns have different lengths")
+    return columns
+
@@ -0,0 +1,104 @@
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIRequestFactory
+
+from core.authentication import CachingTokenAuthentication, token_cache
+from core.views import get_datasets
+
+MODES = [('uncached', TokenAuthentication), ('cached', CachingTokenAuthentication)]
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark request latency of GET /api/datasets/ with plain and with cached "
+        "token authentication, from several threads at once. Reports latency "
+        "percentiles, throughput, SQL queries per request and the token cache hit "
+        "rate. The users it creates are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20,
+                            help='Distinct users (tokens) sending requests')
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests per mode, spread over the threads')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Concurrent request threads')
+
+    def handle(self, *args, **options):
+        prefix = f'bench_auth_{time.time_ns()}_'
+        users = [User.objects.create_user(username=f'{prefix}{i}') for i in range(options['users'])]
+        keys = [Token.objects.create(user=user).key for user in users]
+        try:
+            results = {}
+            for name, auth_class in MODES:
+                token_cache.clear()
+                results[name] = self.run(auth_class, keys, options['requests'], options['threads'])
+                stats = token_cache.stats()
+                self.stdout.write(
+                    f"{name:>8}  p50 {results[name]['p50_ms']:6.2f} ms  "
+                    f"p95 {results[name]['p95_ms']:6.2f} ms  "
+                    f"{results[name]['rps']:7.0f} req/s  "
+                    f"{results[name]['queries']} queries/request"
+                    + (f"  cache hit rate {stats['hit_rate']:.1%} "
+                       f"({stats['hits']} hits, {stats['misses']} misses)"
+                       if name == 'cached' else '')
+                )
+            speedup = results['uncached']['p50_ms'] / results['cached']['p50_ms']
+            self.stdout.write(self.style.SUCCESS(f"Median latency {speedup:.2f}x faster with the cache"))
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+            token_cache.clear()
+
+    def run(self, auth_class, keys, total, threads):
+        view = get_datasets.cls.as_view(authentication_classes=[auth_class])
+        factory = APIRequestFactory()
+
+        def request(key):
+            return view(factory.get('/api/datasets/', HTTP_AUTHORIZATION=f'Token {key}'))
+
+        # Queries per request once warm, measured on this thread
+        request(keys[0])
+        with CaptureQueriesContext(connection) as queries:
+            request(keys[0])
+
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(offset):
+            mine = []
+            for i in range(offset, total, threads):
+                start = time.perf_counter()
+                request(keys[i % len(keys)])
+                mine.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(mine)
+            # Each thread had its own database connection
+            connection.close()
+
+        start = time.perf_counter()
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        return {
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': _percentile(latencies, 0.95) * 1000,
+            'rps': len(latencies) / elapsed,
+            'queries': len(queries),
+        }
@@ -0,0 +1,181 @@
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+import django
+import matplotlib
+import reportlab
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.aggregates import compute_stats
+from core.models import Dataset, Equipment
+from core.rendering import render_pdf_report
+from core.reports import report_data
+
+TYPES = ['Pump', 'Valve', 'Compressor', 'HeatExchanger', 'Reactor', 'Condenser']
+PHASES = ['query', 'stats', 'draw', 'png_encode', 'pdf_write']
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark PDF report generation on synthetic datasets of increasing size. "
+        "Reports wall time per phase, peak memory, PDF size and SQL query count, "
+        "and writes the results as JSON. Seeded rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                            help='Equipment rows per synthetic dataset')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed runs per size (the median is reported)')
+        parser.add_argument('--output', default='bench_reports.json',
+                            help='Where to write the JSON results')
+        parser.add_argument('--compare',
+                            help='Previous results file to compare wall times against')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Relative slowdown that counts as a regression (default 0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        results = {
+            'created_at': timezone.now().isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'django': django.get_version(),
+                'matplotlib': matplotlib.__version__,
+                'reportlab': reportlab.Version,
+                'database': connection.vendor,
+            },
+            'runs': [],
+        }
+
+        # Smallest first so the process-wide RSS high-water mark stays
+        # attributable to the size that raised it
+        for size in sorted(options['sizes']):
+            run = self.bench_size(size, options['repeat'])
+            results['runs'].append(run)
+            self.stdout.write(
+                f"{size:>8} rows  {run['wall_time_s'] * 1000:9.1f} ms  "
+                f"rss {run['peak_rss_mb']:7.1f} MB  "
+                f"py alloc {run['python_alloc_peak_mb']:7.1f} MB  "
+                f"pdf {run['pdf_bytes'] / 1024:7.1f} KiB  "
+                f"{run['sql_queries']} queries  "
+                + '  '.join(f"{k} {v * 1000:.1f}" for k, v in run['phases_s'].items())
+            )
+
+        with open(options['output'], 'w') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    def seed(self, size):
+        rng = random.Random(size)
+        user = User.objects.create_user(username=f'bench_{size}_{time.time_ns()}')
+        dataset = Dataset.objects.create(user=user, filename=f'bench_{size}.csv', total_count=size)
+
+        rows = [
+            Equipment(
+                dataset=dataset,
+                name=f'Equipment-{i}',
+                equipment_type=rng.choice(TYPES),
+                flowrate=rng.uniform(50, 300),
+                pressure=rng.uniform(2, 15),
+                temperature=rng.uniform(80, 160),
+            )
+            for i in range(size)
+        ]
+        Equipment.objects.bulk_create(rows, batch_size=5000)
+
+        dataset.avg_flowrate = sum(r.flowrate for r in rows) / size
+        dataset.avg_pressure = sum(r.pressure for r in rows) / size
+        dataset.avg_temperature = sum(r.temperature for r in rows) / size
+        dataset.stats = compute_stats(
+            [r.flowrate for r in rows], [r.pressure for r in rows],
+            [r.temperature for r in rows], [r.equipment_type for r in rows],
+        )
+        dataset.save()
+        return dataset
+
+    def render_once(self, dataset):
+        timings = {}
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            query_start = time.perf_counter()
+            data = report_data(dataset)
+            timings['query'] = time.perf_counter() - query_start
+        pdf = render_pdf_report(data, timings)
+        return time.perf_counter() - start, timings, len(queries), len(pdf)
+
+    def bench_size(self, size, repeat):
+        with transaction.atomic():
+            dataset = self.seed(size)
+
+            # Warm-up so import and font cache costs don't land in the first size
+            self.render_once(dataset)
+
+            walls, phases = [], {name: [] for name in PHASES}
+            for _ in range(repeat):
+                wall, timings, query_count, pdf_bytes = self.render_once(dataset)
+                walls.append(wall)
+                for name in PHASES:
+                    phases[name].append(timings.get(name, 0.0))
+
+            # Separate run for allocations: tracemalloc slows everything down
+            tracemalloc.start()
+            self.render_once(dataset)
+            _, alloc_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            transaction.set_rollback(True)
+
+        return {
+            'rows': size,
+            'repeat': repeat,
+            'wall_time_s': statistics.median(walls),
+            'wall_time_min_s': min(walls),
+            'phases_s': {name: statistics.median(values) for name, values in phases.items()},
+            'peak_rss_mb': _peak_rss_mb(),
+            'python_alloc_peak_mb': alloc_peak / (1024 * 1024),
+            'pdf_bytes': pdf_bytes,
+            'sql_queries': query_count,
+        }
+
+    def compare(self, results, baseline_path, threshold):
+        try:
+            with open(baseline_path) as f:
+                baseline = {run['rows']: run for run in json.load(f)['runs']}
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f"Could not read baseline {baseline_path}: {e}")
+
+        regressions = []
+        for run in results['runs']:
+            before = baseline.get(run['rows'])
+            if not before:
+                continue
+            change = run['wall_time_s'] / before['wall_time_s'] - 1
+            self.stdout.write(f"{run['rows']:>8} rows  {change:+.1%} vs baseline")
+            if change > threshold:
+                regressions.append(run['rows'])
+
+        if regressions:
+            raise CommandError(
+                f"Report generation regressed by more than {threshold:.0%} for sizes: "
+                + ', '.join(str(size) for size in regressions)
+            )
@@ -0,0 +1,384 @@
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+# In-process metrics in the Prometheus text format: counters, gauges and
+# histograms with labels, safe to update from any thread.
+# With METRICS_DIR set, every process also writes its values to
+# <METRICS_DIR>/<pid>-<start time>.json (within METRICS_FLUSH_INTERVAL seconds
+# of a change, and on exit) and the exposition adds up the files of all
+# processes, so a scrape of any one worker sees the whole server. The start
+# time keeps a new process that got an old pid from overwriting the old one's
+# file. A scrape folds the counters and histograms of processes that have
+# exited into its own process's values and deletes their files; their gauges
+# are dropped.
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; from a cache hit to a big report render
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _start_time(pid):
+    """Start time of a process in clock ticks since boot, where /proc has it"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Field 22; the command name before it may contain spaces and parentheses
+    return stat.rsplit(')', 1)[1].split()[19]
+
+
+def _process_alive(pid, start):
+    current = _start_time(pid)
+    if current is not None:
+        return current == start
+    # No /proc (or the process is gone): a reused pid counts as alive here
+    return _pid_alive(pid)
+
+
+def _pid_alive(pid):
+    if os.name == 'nt':
+        # os.kill(pid, 0) would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(key): self._copy(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def merge(total, value):
+        return total + value
+
+
+class Counter(Metric):
+    """Only goes up: requests, rows, deletions"""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.changed()
+
+
+class Gauge(Metric):
+    """Goes up and down: requests in flight. Summed over live processes."""
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+        self.registry.changed()
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        self.registry.changed()
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][i] += 1
+                    break
+            entry['sum'] += value
+            entry['count'] += 1
+        self.registry.changed()
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @staticmethod
+    def _copy(value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    @staticmethod
+    def merge(total, value):
+        return {
+            'buckets': [a + b for a, b in zip(total['buckets'], value['buckets'])],
+            'sum': total['sum'] + value['sum'],
+            'count': total['count'] + value['count'],
+        }
+
+
+class Registry:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._flush_pending = False
+        # Counters and histograms taken over from processes that have exited
+        self._absorbed = {}
+        self._process = None
+        if self.directory:
+            atexit.register(self.flush)
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, documentation, labelnames, buckets))
+
+    # ---------- Multiprocess ----------
+
+    def process_id(self):
+        # Worked out per pid: a forked worker gets its own file
+        pid = os.getpid()
+        if self._process is None or self._process[0] != pid:
+            self._process = (pid, f'{pid}-{_start_time(pid) or uuid.uuid4().hex}')
+        return self._process[1]
+
+    def snapshot(self):
+        values = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        with self._lock:
+            self._merge(values, self._absorbed, alive=False)
+        return values
+
+    def _merge(self, total, values, alive):
+        for name, samples in values.items():
+            metric = self._metrics.get(name)
+            if metric is None or (metric.type == 'gauge' and not alive):
+                continue
+            merged = total.setdefault(name, {})
+            for key, value in samples.items():
+                merged[key] = metric.merge(merged[key], value) if key in merged else value
+
+    def changed(self):
+        # Batched: one write per flush interval at most, off the request thread
+        if not self.directory:
+            return
+        with self._lock:
+            if self._flush_pending:
+                return
+            self._flush_pending = True
+        timer = threading.Timer(self.flush_interval, self.flush)
+        timer.daemon = True
+        timer.start()
+
+    def flush(self):
+        """Write this process's values where the other processes can read them"""
+        if not self.directory:
+            return
+        with self._lock:
+            self._flush_pending = False
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(tmp_path, self.directory / f'{self.process_id()}.json')
+        except OSError:
+            Path(tmp_path).unlink(missing_ok=True)
+
+    def _other_processes(self):
+        if not self.directory or not self.directory.is_dir():
+            return
+        own = self.process_id()
+        for path in self.directory.glob('*.json'):
+            pid, _, start = path.stem.partition('-')
+            if not pid.isdigit() or path.stem == own:
+                continue
+            alive = _process_alive(int(pid), start)
+            if not alive:
+                # Renaming is atomic, so only one process takes the file over
+                claimed = path.with_suffix('.absorbing')
+                try:
+                    path.rename(claimed)
+                except OSError:
+                    continue
+                path = claimed
+            try:
+                with open(path) as f:
+                    values = json.load(f)
+            except (OSError, ValueError):
+                if not alive:
+                    # Cut short when its process died: nothing to recover
+                    path.unlink(missing_ok=True)
+                # Being replaced right now; its values are in the next scrape
+                continue
+            if not alive:
+                self._absorb(values, path)
+            yield values, alive
+
+    def _absorb(self, values, path):
+        with self._lock:
+            self._merge(self._absorbed, values, alive=False)
+        # Written to this process's file before the old one goes away
+        self.flush()
+        path.unlink(missing_ok=True)
+
+    def collect(self):
+        """{name: {label key: value}} over every process"""
+        merged = self.snapshot()
+        for values, alive in self._other_processes():
+            self._merge(merged, values, alive)
+        return merged
+
+    # ---------- Exposition ----------
+
+    def exposition(self):
+        """Every metric in the Prometheus text format"""
+        self.flush()
+        lines = []
+        for name, samples in self.collect().items():
+            metric = self._metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key, value in sorted(samples.items()):
+                labels = list(zip(metric.labelnames, json.loads(key)))
+                if metric.type == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value['buckets']):
+                        cumulative += count
+                        bucket_labels = labels + [('le', _format_value(bound))]
+                        lines.append(f'{name}_bucket{self._labels(bucket_labels)} {cumulative}')
+                    lines.append(f'{name}_sum{self._labels(labels)} {_format_value(value["sum"])}')
+                    lines.append(f'{name}_count{self._labels(labels)} {value["count"]}')
+                else:
+                    lines.append(f'{name}{self._labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(pairs):
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+REGISTRY = Registry(
+    getattr(settings, 'METRICS_DIR', None),
+    getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0),
+)
+
+# ---------- API metrics ----------
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'api_request_duration_seconds', 'Time to answer a request, per endpoint',
+    ['endpoint', 'method'],
+)
+REQUESTS = REGISTRY.counter(
+    'api_requests_total', 'Requests answered, per endpoint and status code',
+    ['endpoint', 'method', 'status'],
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'api_requests_in_flight', 'Requests being handled right now',
+)
+UPLOAD_ROWS = REGISTRY.counter(
+    'api_upload_rows_total', 'Equipment rows stored by uploads',
+    ['format'],
+)
+UPLOAD_DURATION = REGISTRY.histogram(
+    'api_upload_duration_seconds', 'Time to parse and store an upload',
+    ['format'],
+)
+UPLOAD_ROWS_PER_SECOND = REGISTRY.histogram(
+    'api_upload_rows_per_second', 'Rows stored per second, per upload',
+    ['format'], buckets=(100, 1000, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000),
+)
+REPORT_RENDER = REGISTRY.histogram(
+    'api_report_render_seconds', 'Time to produce a report, cached or rendered',
+    ['kind'],
+)
+RETENTION_DELETIONS = REGISTRY.counter(
+    'api_retention_deletions_total', 'Datasets deleted to keep each user at the retention limit',
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    'api_cache_lookups_total', 'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result'],
+)
@@ -0,0 +1,176 @@
+import cProfile
+import logging
+import random
+import re
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from .metrics import REQUEST_DURATION, REQUESTS, REQUESTS_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+# tracemalloc is process-wide and reset_peak() resets the peak for every
+# thread, so requests whose memory is traced hold this lock and run one at
+# a time. That is why PROFILE_MEMORY is off unless asked for.
+_tracing_lock = threading.Lock()
+
+
+def _start_tracing():
+    """Called with _tracing_lock held; returns what _stop_tracing needs"""
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    return started, tracemalloc.get_traced_memory()[0]
+
+
+def _stop_tracing(started, start_size):
+    peak = tracemalloc.get_traced_memory()[1] - start_size
+    # Tracing switched on by someone else (e.g. PYTHONTRACEMALLOC) stays on
+    if started:
+        tracemalloc.stop()
+    return max(peak, 0)
+
+
+class QueryRecorder:
+    """execute_wrapper counting SQL queries, their time and repeats"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def repeated(self):
+        # Same statement with different parameters: the N+1 signature
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+
+class MetricsMiddleware:
+    """
+    Request count, latency and requests in flight for /api/metrics. The
+    endpoint label is the URL route (api/datasets/<int:dataset_id>/), not
+    the path, so there is one series per endpoint rather than per dataset.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with REQUESTS_IN_FLIGHT.track_inprogress():
+            response = self.get_response(request)
+        match = request.resolver_match
+        endpoint = match.route if match else 'unmatched'
+        REQUEST_DURATION.observe(time.perf_counter() - start, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiling (REQUEST_PROFILING = True). Every response
+    gets a Server-Timing header with the wall time, SQL query count and
+    time (and how many were repeats of the same statement), the response
+    size and, with PROFILE_MEMORY, the Python allocation peak. A
+    PROFILE_SAMPLE_RATE share of
+    requests is also run under cProfile and dumped to PROFILE_DIR, for
+    `python -m pstats` or snakeviz.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILE_SAMPLE_RATE', 0.0)
+        self.profile_dir = Path(getattr(settings, 'PROFILE_DIR', 'profiles'))
+        self.trace_memory = getattr(settings, 'PROFILE_MEMORY', False)
+
+    def __call__(self, request):
+        queries = QueryRecorder()
+        profiler = cProfile.Profile() if random.random() < self.sample_rate else None
+        tracing = None
+        if self.trace_memory:
+            _tracing_lock.acquire()
+
+        start = time.perf_counter()
+        try:
+            if self.trace_memory:
+                tracing = _start_tracing()
+            if profiler:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Python 3.12+: another request on another thread is
+                    # already being profiled
+                    profiler = None
+            with connection.execute_wrapper(queries):
+                response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - start
+            alloc_peak = None
+            if self.trace_memory:
+                try:
+                    if tracing:
+                        alloc_peak = _stop_tracing(*tracing)
+                finally:
+                    _tracing_lock.release()
+
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = self.server_timing(wall, queries, alloc_peak, size)
+        # Lets the web frontend's origin see the timings in DevTools
+        response['Timing-Allow-Origin'] = '*'
+
+        logger.info(
+            "%s %s %s %.1f ms, %d queries (%d repeated) %.1f ms, alloc peak %s, %s",
+            request.method, request.path, response.status_code, wall * 1000,
+            queries.count, queries.repeated, queries.duration * 1000,
+            'n/a' if alloc_peak is None else f'{alloc_peak / 1024:.0f} KiB',
+            'streamed' if size is None else f'{size} bytes',
+        )
+        if profiler:
+            self.dump(profiler, request, response, wall)
+        return response
+
+    @staticmethod
+    def server_timing(wall, queries, alloc_peak, size):
+        metrics = [
+            f'total;dur={wall * 1000:.1f}',
+            f'db;dur={queries.duration * 1000:.1f};'
+            f'desc="{queries.count} queries, {queries.repeated} repeated"',
+        ]
+        if alloc_peak is not None:
+            metrics.append(f'mem;desc="alloc peak {alloc_peak / 1024:.0f} KiB"')
+        if size is not None:
+            metrics.append(f'size;desc="{size} bytes"')
+        return ', '.join(metrics)
+
+    def dump(self, profiler, request, response, wall):
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'root'
+        name = (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{slug}'
+            f'-{response.status_code}-{wall * 1000:.0f}ms.prof'
+        )
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(self.profile_dir / name)
+        except OSError:
+            logger.exception("Could not write profile %s", name)
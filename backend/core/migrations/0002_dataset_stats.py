@@ -0,0 +1,18 @@
+# Generated by Django 4.2.28 on 2026-10-19 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
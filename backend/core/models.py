@@ -22,6 +22,9 @@ class Dataset(models.Model):
     avg_flowrate = models.FloatField(default=0.0)
     avg_pressure = models.FloatField(default=0.0)
     avg_temperature = models.FloatField(default=0.0)
+    # Aggregates computed once at ingest (per-type averages, histogram bins,
+    # scatter sample) so reports don't have to reload every equipment row
+    stats = models.JSONField(default=dict, blank=True)
     
     class Meta:
         ordering = ['-uploaded_at']
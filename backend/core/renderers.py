@@ -0,0 +1,14 @@
+from django.utils.html import escape
+from rest_framework.renderers import StaticHTMLRenderer
+
+
+class HTMLReportRenderer(StaticHTMLRenderer):
+    """
+    Lets views answer ?format=html with a ready made HTML string.
+    Error payloads ({'error': ...}) are turned into a short HTML message.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            data = f"<p>{escape(data.get('error', data))}</p>"
+        return super().render(data, accepted_media_type, renderer_context)
@@ -0,0 +1,400 @@
+import os
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import matplotlib.style
+from matplotlib.figure import Figure
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+
+# Nothing in this module touches Django or the database, so it can be imported
+# by report worker processes that never run django.setup(). Callers hand in a
+# plain dict built by core.reports.report_data().
+
+
+def _fig_to_image(fig):
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+    buffer.seek(0)
+    return ImageReader(buffer)
+
+
+def _group_by_type(report):
+    type_stats = {}
+    for t, f, p, temp in zip(report['types'], report['flows'], report['pressures'], report['temps']):
+        type_stats.setdefault(t, {'f': [], 'p': [], 't': []})
+        type_stats[t]['f'].append(f)
+        type_stats[t]['p'].append(p)
+        type_stats[t]['t'].append(temp)
+    return type_stats
+
+
+def draw_type_distribution(axis, report):
+    type_counts = {}
+    for t in report['types']:
+        type_counts[t] = type_counts.get(t, 0) + 1
+
+    axis.pie(
+        type_counts.values(),
+        labels=type_counts.keys(),
+        autopct='%1.1f%%'
+    )
+    axis.set_title("Equipment Type Distribution")
+
+
+def draw_temperature_histogram(axis, report):
+    axis.hist(report['temps'], bins=8, edgecolor='black')
+    axis.set_title("Temperature Distribution")
+
+
+def draw_avg_by_type(axis, report, type_stats=None):
+    type_stats = type_stats or _group_by_type(report)
+
+    labels = list(type_stats.keys())
+    avg_f = [np.mean(type_stats[x]['f']) for x in labels]
+    avg_p = [np.mean(type_stats[x]['p']) for x in labels]
+    avg_t = [np.mean(type_stats[x]['t']) for x in labels]
+
+    x = np.arange(len(labels))
+    width_bar = 0.25
+
+    axis.bar(x - width_bar, avg_f, width_bar, label='Flowrate')
+    axis.bar(x, avg_p, width_bar, label='Pressure')
+    axis.bar(x + width_bar, avg_t, width_bar, label='Temperature')
+    axis.set_xticks(x)
+    axis.set_xticklabels(labels, rotation=30)
+    axis.legend()
+    axis.set_title("Average by Type")
+
+
+def draw_flowrate_vs_pressure(axis, report, type_stats=None):
+    type_stats = type_stats or _group_by_type(report)
+
+    for t, data in type_stats.items():
+        pairs = sorted(zip(data['f'], data['p']))
+        if not pairs:
+            continue
+        f_vals, p_vals = zip(*pairs)
+        axis.plot(f_vals, p_vals)
+        axis.scatter(f_vals, p_vals, label=t)
+
+    axis.legend(fontsize=7)
+    axis.set_title("Flowrate vs Pressure")
+
+
+# Chart name (as used in /api/datasets/<id>/charts/<name>.png) -> draw function
+CHARTS = {
+    'type_distribution': draw_type_distribution,
+    'avg_by_type': draw_avg_by_type,
+    'flowrate_vs_pressure': draw_flowrate_vs_pressure,
+    'temperature_histogram': draw_temperature_histogram,
+}
+CHART_FORMATS = ('png', 'svg')
+
+
+def draw_charts(fig, report):
+    """Draw the four dashboard charts for a report onto a 2x2 figure"""
+    type_stats = _group_by_type(report)
+
+    axes = fig.subplots(2, 2)
+    fig.suptitle("Dataset Visualizations", fontsize=16)
+
+    draw_type_distribution(axes[0, 0], report)
+    draw_temperature_histogram(axes[0, 1], report)
+    draw_avg_by_type(axes[1, 0], report, type_stats)
+    draw_flowrate_vs_pressure(axes[1, 1], report, type_stats)
+
+    fig.tight_layout()
+
+
+def render_chart_thumbnails(report, out_dir):
+    """
+    Render each dashboard chart on its own as PNG and SVG into out_dir
+    (<name>.png / <name>.svg). Files are written under a temp name and
+    renamed, so a reader never sees a partial image.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    with matplotlib.style.context("seaborn-v0_8"):
+        for name, draw in CHARTS.items():
+            fig = Figure(figsize=(4, 3), dpi=100)
+            draw(fig.add_subplot(111), report)
+            fig.tight_layout()
+            for fmt in CHART_FORMATS:
+                fd, tmp_path = tempfile.mkstemp(dir=out_dir, suffix=f'.{fmt}.tmp')
+                os.close(fd)
+                fig.savefig(tmp_path, format=fmt)
+                os.replace(tmp_path, out_dir / f"{name}.{fmt}")
+
+
+@contextmanager
+def _phase(timings, name):
+    """Add the time spent in the block to timings[name] (no-op if timings is None)"""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def render_pdf_report(report, timings=None):
+    """
+    Render the two page PDF report (stats + charts)
+    Pass a dict as timings to get seconds spent per phase
+    (stats, draw, png_encode, pdf_write) added to it.
+    Returns: PDF file contents as bytes
+    """
+    flows = report['flows']
+
+    with _phase(timings, 'stats'):
+        stats_lines = [
+            f"Average Flowrate: {report['avg_flowrate']:.2f}",
+            f"Average Pressure: {report['avg_pressure']:.2f}",
+            f"Average Temperature: {report['avg_temperature']:.2f}",
+            f"Median Flowrate: {np.median(flows):.2f}",
+            f"Std Dev Flowrate: {np.std(flows):.2f}",
+            f"Min Flowrate: {min(flows):.2f}",
+            f"Max Flowrate: {max(flows):.2f}",
+        ]
+
+    with _phase(timings, 'pdf_write'):
+        buffer, p = _write_stats_page(report, stats_lines)
+
+    # Figure() instead of pyplot so renders in different threads or worker
+    # processes never share pyplot's global figure state
+    with matplotlib.style.context("seaborn-v0_8"):
+        with _phase(timings, 'draw'):
+            fig = Figure(figsize=(10, 8))
+            draw_charts(fig, report)
+        # matplotlib only rasterises inside savefig, so this includes the Agg
+        # render as well as the PNG compression
+        with _phase(timings, 'png_encode'):
+            img = _fig_to_image(fig)
+
+    with _phase(timings, 'pdf_write'):
+        _write_charts_page(p, img)
+        p.save()
+    return buffer.getvalue()
+
+
+def _write_stats_page(report, stats_lines):
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # ================= PAGE 1 — TITLE + STATS =================
+    y = height - 1 * inch
+    p.setFont("Helvetica-Bold", 18)
+    p.drawString(1 * inch, y, "Equipment Analysis Report")
+
+    y -= 0.6 * inch
+    p.setFont("Helvetica", 12)
+    p.drawString(1 * inch, y, f"Filename: {report['filename']}")
+    y -= 0.3 * inch
+    p.drawString(1 * inch, y, f"Uploaded: {report['uploaded_at']}")
+    y -= 0.3 * inch
+    p.drawString(1 * inch, y, f"Total Equipment: {report['total_count']}")
+
+    y -= 0.6 * inch
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(1 * inch, y, "Statistics")
+
+    y -= 0.3 * inch
+    p.setFont("Helvetica", 12)
+
+    for line in stats_lines:
+        p.drawString(1 * inch, y, line)
+        y -= 0.25 * inch
+
+    p.showPage()
+    return buffer, p
+
+
+def _write_charts_page(p, img):
+    # ================= PAGE 2 — ALL CHARTS =================
+    width, height = letter
+
+    # Draw big grid image
+    p.drawImage(
+        img,
+        0.5 * inch,
+        height - 7.5 * inch,
+        width=7.5 * inch,
+        height=7 * inch
+    )
+
+
+# ========== Detailed (Paged) Report ==========
+
+PAGE_WIDTH, PAGE_HEIGHT = letter
+TABLE_MARGIN = 0.75 * inch
+TABLE_ROW_HEIGHT = 12
+TABLE_COLUMNS = [
+    # (header, x offset in points, max characters)
+    ("#", 0, 8),
+    ("Equipment Name", 45, 32),
+    ("Type", 235, 22),
+    ("Flowrate", 365, 12),
+    ("Pressure", 430, 12),
+    ("Temperature", 495, 12),
+]
+
+
+def _pdf_text(value):
+    text = str(value).replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('latin-1', 'replace')
+
+
+class StreamingPDF:
+    """
+    Minimal text-only PDF writer that writes each page to the output file as
+    soon as it is finished.
+
+    ReportLab's canvas keeps every page in memory until save(), which is fine
+    for the two page report but not for tables with millions of rows. Here the
+    only per-page state kept around is two integer offsets for the xref table.
+    """
+
+    # Object numbers reserved up front, everything after is pages
+    CATALOG, PAGES, FONT, FONT_BOLD = 1, 2, 3, 4
+
+    def __init__(self, fileobj):
+        self.file = fileobj
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 5
+        self._ops = []
+
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_object(self.FONT, b"<< /Type /Font /Subtype /Type1 "
+                                      b"/BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._write_object(self.FONT_BOLD, b"<< /Type /Font /Subtype /Type1 "
+                                           b"/BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write_object(self, obj_id, body):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def draw_string(self, x, y, text, bold=False, size=10):
+        font = b"/F2" if bold else b"/F1"
+        self._ops.append(b"BT %s %d Tf %.2f %.2f Td (%s) Tj ET"
+                         % (font, size, x, y, _pdf_text(text)))
+
+    def draw_line(self, x1, y1, x2, y2):
+        self._ops.append(b"%.2f %.2f m %.2f %.2f l S" % (x1, y1, x2, y2))
+
+    def show_page(self):
+        content = zlib.compress(b"\n".join(self._ops))
+        self._ops = []
+
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._write_object(
+            content_id,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+            + content + b"\nendstream"
+        )
+        self._write_object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGES, PAGE_WIDTH, PAGE_HEIGHT, self.FONT, self.FONT_BOLD, content_id)
+        )
+        self.page_ids.append(page_id)
+
+    def save(self):
+        if self._ops:
+            self.show_page()
+
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._write_object(self.PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                           % (kids, len(self.page_ids)))
+        self._write_object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+
+        xref_offset = self.file.tell()
+        self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self.next_id)
+        for obj_id in range(1, self.next_id):
+            self.file.write(b"%010d 00000 n \n" % self.offsets[obj_id])
+        self.file.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                        % (self.next_id, self.CATALOG, xref_offset))
+
+
+def render_detailed_report(summary, rows, fileobj):
+    """
+    Write the detailed report (summary page + every equipment row) to fileobj.
+    rows is consumed lazily, one page at a time, so it can come straight from
+    a database cursor.
+    """
+    pdf = StreamingPDF(fileobj)
+    left = TABLE_MARGIN
+
+    # ================= PAGE 1 — SUMMARY =================
+    y = PAGE_HEIGHT - 1 * inch
+    pdf.draw_string(left, y, "Equipment Detail Report", bold=True, size=18)
+
+    y -= 0.6 * inch
+    for line in [
+        f"Filename: {summary['filename']}",
+        f"Uploaded: {summary['uploaded_at']}",
+        f"Total Equipment: {summary['total_count']}",
+        f"Average Flowrate: {summary['avg_flowrate']:.2f}",
+        f"Average Pressure: {summary['avg_pressure']:.2f}",
+        f"Average Temperature: {summary['avg_temperature']:.2f}",
+    ]:
+        pdf.draw_string(left, y, line, size=12)
+        y -= 0.3 * inch
+
+    y -= 0.3 * inch
+    pdf.draw_string(left, y, "By Type", bold=True, size=14)
+    y -= 0.3 * inch
+    for item in summary['types']:
+        pdf.draw_string(
+            left, y,
+            f"{item['equipment_type']}: {item['count']} items, "
+            f"avg flowrate {item['avg_flowrate']:.2f}, "
+            f"avg pressure {item['avg_pressure']:.2f}, "
+            f"avg temperature {item['avg_temperature']:.2f}",
+            size=10
+        )
+        y -= 0.25 * inch
+        if y < TABLE_MARGIN:
+            pdf.show_page()
+            y = PAGE_HEIGHT - TABLE_MARGIN
+    pdf.show_page()
+
+    # ================= EQUIPMENT TABLE PAGES =================
+    top = PAGE_HEIGHT - TABLE_MARGIN
+    rows_per_page = int((top - TABLE_MARGIN) // TABLE_ROW_HEIGHT) - 2
+
+    def table_header():
+        for header, offset, _ in TABLE_COLUMNS:
+            pdf.draw_string(left + offset, top, header, bold=True, size=9)
+        pdf.draw_line(left, top - 4, PAGE_WIDTH - TABLE_MARGIN, top - 4)
+
+    index = 0
+    for row in rows:
+        if index % rows_per_page == 0:
+            if index:
+                pdf.show_page()
+            table_header()
+
+        y = top - TABLE_ROW_HEIGHT * (index % rows_per_page + 1.5)
+        name, equipment_type, flowrate, pressure, temperature = row
+        cells = [index + 1, name, equipment_type,
+                 f"{flowrate:.2f}", f"{pressure:.2f}", f"{temperature:.2f}"]
+        for value, (_, offset, width) in zip(cells, TABLE_COLUMNS):
+            pdf.draw_string(left + offset, y, str(value)[:width], size=8)
+        index += 1
+
+    pdf.save()
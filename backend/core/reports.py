@@ -0,0 +1,329 @@
+import os
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Avg, Count
+
+from .aggregates import STATS_VERSION, compute_stats
+from .metrics import CACHE_LOOKUPS
+from .rendering import render_chart_thumbnails, render_detailed_report, render_pdf_report
+
+REPORT_ROW_CHUNK_SIZE = 2000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def report_data(dataset):
+    """
+    Collect everything the renderer needs into a plain, picklable dict
+    Returns: None if the dataset has no equipment rows
+    """
+    rows = list(dataset.equipment.values_list(
+        'flowrate', 'pressure', 'temperature', 'equipment_type'
+    ))
+    if not rows:
+        return None
+
+    flows, pressures, temps, types = (list(column) for column in zip(*rows))
+    return {
+        'filename': dataset.filename,
+        'uploaded_at': dataset.uploaded_at.strftime('%Y-%m-%d %H:%M'),
+        'total_count': dataset.total_count,
+        'avg_flowrate': dataset.avg_flowrate,
+        'avg_pressure': dataset.avg_pressure,
+        'avg_temperature': dataset.avg_temperature,
+        'flows': flows,
+        'pressures': pressures,
+        'temps': temps,
+        'types': types,
+    }
+
+
+def dataset_stats(dataset):
+    """
+    Precomputed aggregates for a dataset. Datasets uploaded before stats
+    existed (or with an older layout) are computed once and saved.
+    """
+    if dataset.stats.get('version') != STATS_VERSION:
+        rows = dataset.equipment.values_list('flowrate', 'pressure', 'temperature', 'equipment_type')
+        columns = list(zip(*rows)) or [[], [], [], []]
+        dataset.stats = compute_stats(*columns)
+        dataset.save(update_fields=['stats'])
+    return dataset.stats
+
+
+def report_filename(dataset, detailed=False):
+    if detailed:
+        return f"{dataset.filename}_detailed_report.pdf"
+    return f"{dataset.filename}_report.pdf"
+
+
+# ========== Report Cache ==========
+
+def cached_report_path(dataset, detailed=False):
+    # Datasets never change after upload, so id + upload time identifies a
+    # report for good (the timestamp guards against SQLite reusing an id)
+    stamp = int(dataset.uploaded_at.timestamp() * 1_000_000)
+    suffix = '_full' if detailed else ''
+    return Path(settings.REPORT_CACHE_DIR) / f"{dataset.id}_{stamp}{suffix}.pdf"
+
+
+def store_cached_report(dataset, pdf):
+    path = cached_report_path(dataset)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temp file first so readers never see a half written report
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf)
+    os.replace(tmp_path, path)
+    return path
+
+
+def discard_cached_files(dataset):
+    """Remove cached reports and chart thumbnails for a dataset being deleted"""
+    cached_report_path(dataset).unlink(missing_ok=True)
+    cached_report_path(dataset, detailed=True).unlink(missing_ok=True)
+    shutil.rmtree(chart_dir(dataset), ignore_errors=True)
+
+
+def get_report_path(dataset):
+    """
+    Path to the PDF report for a dataset, rendering it on a cache miss
+    Returns: Path or None if the dataset has no equipment rows
+    """
+    path = cached_report_path(dataset)
+    if path.exists():
+        CACHE_LOOKUPS.inc(cache='report', result='hit')
+        return path
+
+    CACHE_LOOKUPS.inc(cache='report', result='miss')
+    data = report_data(dataset)
+    if data is None:
+        return None
+    return store_cached_report(dataset, render_pdf_report(data))
+
+
+def get_detailed_report_path(dataset):
+    """
+    Path to the detailed report (summary + every equipment row), rendering it
+    on a cache miss. Rows are read in chunks and pages are written straight to
+    disk, so memory use does not grow with the number of rows.
+    Returns: Path or None if the dataset has no equipment rows
+    """
+    path = cached_report_path(dataset, detailed=True)
+    if path.exists():
+        CACHE_LOOKUPS.inc(cache='detailed_report', result='hit')
+        return path
+
+    CACHE_LOOKUPS.inc(cache='detailed_report', result='miss')
+    equipment = dataset.equipment.order_by('id')
+    type_summary = list(
+        equipment.order_by().values('equipment_type').annotate(
+            count=Count('id'),
+            avg_flowrate=Avg('flowrate'),
+            avg_pressure=Avg('pressure'),
+            avg_temperature=Avg('temperature'),
+        ).order_by('-count')
+    )
+    if not type_summary:
+        return None
+
+    summary = {
+        'filename': dataset.filename,
+        'uploaded_at': dataset.uploaded_at.strftime('%Y-%m-%d %H:%M'),
+        'total_count': dataset.total_count,
+        'avg_flowrate': dataset.avg_flowrate,
+        'avg_pressure': dataset.avg_pressure,
+        'avg_temperature': dataset.avg_temperature,
+        'types': type_summary,
+    }
+    # iterator() uses a server-side cursor where the backend supports one
+    # (chunked fetches on SQLite) instead of loading the whole result set
+    rows = equipment.values_list(
+        'name', 'equipment_type', 'flowrate', 'pressure', 'temperature'
+    ).iterator(chunk_size=REPORT_ROW_CHUNK_SIZE)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            render_detailed_report(summary, rows, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+    return path
+
+
+# ========== Chart Thumbnails ==========
+
+def chart_dir(dataset):
+    stamp = int(dataset.uploaded_at.timestamp() * 1_000_000)
+    return Path(settings.CHART_CACHE_DIR) / f"{dataset.id}_{stamp}"
+
+
+def schedule_chart_thumbnails(dataset):
+    """
+    Render chart thumbnails for a freshly ingested dataset in the background.
+    Only the id goes to the worker, which reads the rows itself, so the
+    upload request doesn't wait for those queries.
+    """
+    _get_pool().submit(_render_chart_thumbnails, dataset.id, str(chart_dir(dataset)))
+
+
+def _render_chart_thumbnails(dataset_id, out_dir):
+    # Runs in a worker process (Django is set up by _init_worker)
+    from .models import Dataset
+
+    dataset = Dataset.objects.filter(id=dataset_id).first()
+    data = report_data(dataset) if dataset is not None else None
+    if data is not None:
+        render_chart_thumbnails(data, out_dir)
+
+
+def get_chart_path(dataset, name, fmt):
+    """
+    Path to a pre-rendered chart thumbnail. If the background render has not
+    finished yet (or the dataset predates thumbnails) render them now.
+    Returns: Path or None if the dataset has no equipment rows
+    """
+    path = chart_dir(dataset) / f"{name}.{fmt}"
+    if path.exists():
+        CACHE_LOOKUPS.inc(cache='chart', result='hit')
+        return path
+
+    CACHE_LOOKUPS.inc(cache='chart', result='miss')
+    data = report_data(dataset)
+    if data is None:
+        return None
+    render_chart_thumbnails(data, chart_dir(dataset))
+    return path
+
+
+# ========== Bulk Rendering ==========
+
+def _get_pool():
+    global _pool
+    # Concurrent first requests must not each create (and leak) a pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: the server process is multi-threaded and
+            # holds database connections, neither of which survive a fork well
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.REPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _init_worker():
+    # Spawned workers start from scratch; some jobs read from the database.
+    # DJANGO_SETTINGS_MODULE is inherited from the server's environment.
+    import django
+    django.setup()
+
+
+def iter_reports(datasets):
+    """
+    Yield (dataset, pdf bytes, exception or None) in the order of datasets,
+    None for a dataset without equipment rows. Reports not cached yet are
+    submitted to the worker processes ahead of the one being yielded, up to
+    two per worker, so every worker stays busy while the caller consumes
+    results.
+    """
+    datasets = iter(datasets)
+    pending = deque()  # (dataset, future, path when cached, or None without rows)
+    ahead = settings.REPORT_WORKERS * 2
+    rendering = 0
+
+    def submit_more():
+        nonlocal rendering
+        while rendering < ahead:
+            dataset = next(datasets, None)
+            if dataset is None:
+                return
+            path = cached_report_path(dataset)
+            if path.exists():
+                pending.append((dataset, path))
+                continue
+            data = report_data(dataset)
+            if data is None:
+                pending.append((dataset, None))
+                continue
+            pending.append((dataset, _get_pool().submit(render_pdf_report, data)))
+            rendering += 1
+
+    submit_more()
+    while pending:
+        dataset, future = pending.popleft()
+        if future is None:
+            yield dataset, None
+            continue
+        if isinstance(future, Path):
+            yield dataset, future.read_bytes()
+            continue
+
+        try:
+            pdf = future.result()
+        except Exception as e:
+            pdf = e
+        rendering -= 1
+        submit_more()
+        if isinstance(pdf, Exception):
+            yield dataset, pdf
+            continue
+        store_cached_report(dataset, pdf)
+        yield dataset, pdf
+
+
+class _ZipStream:
+    """Write-only sink that lets zipfile write into a streaming response"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_reports_zip(datasets):
+    """Generate a ZIP archive of reports chunk by chunk as each entry finishes"""
+    sink = _ZipStream()
+    # zipfile falls back to data descriptors when the sink can't seek, so
+    # entries can be flushed to the client without knowing the archive size
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for dataset, result in iter_reports(datasets):
+            if result is None:
+                # Still an entry, so every requested dataset is accounted for
+                archive.writestr(
+                    f"{dataset.id}_{dataset.filename}_no_data.txt",
+                    "No equipment data: the dataset has no rows to report on"
+                )
+            elif isinstance(result, Exception):
+                archive.writestr(
+                    f"{dataset.id}_{dataset.filename}_error.txt",
+                    f"Report generation failed: {result}"
+                )
+            else:
+                archive.writestr(f"{dataset.id}_{report_filename(dataset)}", result)
+            yield sink.drain()
+    yield sink.drain()
@@ -1,3 +1,697 @@
-from django.test import TestCase
+import atexit
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import zipfile
+import zlib
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .management.commands.bench_reports import Command as BenchReportsCommand
+from .metrics import Registry
+from .middleware import ProfilingMiddleware
+from .models import Dataset, Equipment
+from .rendering import StreamingPDF, render_chart_thumbnails, render_detailed_report
+from .reports import _render_chart_thumbnails, chart_dir, schedule_chart_thumbnails
+
+
+def make_dataset(user, rows=10, filename='test.csv'):
+    dataset = Dataset.objects.create(
+        user=user, filename=filename, total_count=rows,
+        avg_flowrate=100.0, avg_pressure=5.0, avg_temperature=120.0,
+    )
+    Equipment.objects.bulk_create([
+        Equipment(
+            dataset=dataset, name=f'Equipment-{i}', equipment_type=['Pump', 'Valve'][i % 2],
+            flowrate=100.0 + i, pressure=5.0, temperature=120.0 - i,
+        )
+        for i in range(rows)
+    ])
+    return dataset
+
+
+class TempCacheDirsMixin:
+    """Report and chart caches in a temporary directory for each test"""
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        settings_override = override_settings(
+            REPORT_CACHE_DIR=f'{cache_dir}/reports', CHART_CACHE_DIR=f'{cache_dir}/charts'
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+# ========== Report benchmark ==========
+
+class BenchReportsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.output = os.path.join(directory, 'bench.json')
+        self.baseline = os.path.join(directory, 'baseline.json')
+
+    def bench(self, *args):
+        call_command(
+            'bench_reports', '--sizes', '20', '--repeat', '1', '--output', self.output, *args,
+            stdout=io.StringIO(),
+        )
+        with open(self.output) as f:
+            return json.load(f)
+
+    def write_baseline(self, wall_time_s):
+        with open(self.baseline, 'w') as f:
+            json.dump({'runs': [{'rows': 20, 'wall_time_s': wall_time_s}]}, f)
+
+    def test_writes_results(self):
+        results = self.bench()
+
+        self.assertIn('django', results['environment'])
+        [run] = results['runs']
+        self.assertEqual(run['rows'], 20)
+        self.assertGreater(run['wall_time_s'], 0)
+        self.assertEqual(set(run['phases_s']), {'query', 'stats', 'draw', 'png_encode', 'pdf_write'})
+        self.assertGreater(run['pdf_bytes'], 0)
+        self.assertGreater(run['sql_queries'], 0)
+        # Seeded rows are rolled back
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_compare_fails_past_the_threshold(self):
+        self.write_baseline(0.1)
+        # Rendering is tested above; a fixed 0.2 s keeps this one fast
+        render = mock.patch.object(BenchReportsCommand, 'render_once', return_value=(0.2, {}, 1, 1000))
+        with render, self.assertRaisesMessage(CommandError, 'regressed by more than 50% for sizes: 20'):
+            self.bench('--compare', self.baseline, '--threshold', '0.5')
+        # The results are still written
+        with open(self.output) as f:
+            self.assertEqual(json.load(f)['runs'][0]['wall_time_s'], 0.2)
+
+    def test_compare_within_the_threshold(self):
+        self.write_baseline(1.0)
+        results = {'runs': [{'rows': 20, 'wall_time_s': 1.1}, {'rows': 50, 'wall_time_s': 9.0}]}
+        command = BenchReportsCommand(stdout=io.StringIO())
+
+        command.compare(results, self.baseline, threshold=0.2)
+        with self.assertRaises(CommandError):
+            command.compare(results, self.baseline, threshold=0.05)
+
+    def test_unreadable_baseline(self):
+        with open(self.baseline, 'w') as f:
+            f.write('not json')
+        with self.assertRaisesMessage(CommandError, 'Could not read baseline'):
+            BenchReportsCommand(stdout=io.StringIO()).compare({'runs': []}, self.baseline, 0.2)
+
+
+# ========== Profiling ==========
+
+@override_settings(REQUEST_PROFILING=True, PROFILE_SAMPLE_RATE=0.0, PROFILE_MEMORY=True)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.middleware = ProfilingMiddleware(lambda request: HttpResponse(bytes(2_000_000)))
+
+    def profile(self):
+        with self.assertLogs('core.middleware', 'INFO'):
+            return self.middleware(RequestFactory().get('/api/datasets/'))
+
+    def test_reports_allocation_peak(self):
+        response = self.profile()
+
+        peak_kib = int(re.search(r'mem;desc="alloc peak (\d+) KiB"', response['Server-Timing']).group(1))
+        self.assertGreaterEqual(peak_kib, 1900)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    def test_leaves_tracing_started_elsewhere_running(self):
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+        self.profile()
+        self.assertTrue(tracemalloc.is_tracing())
+
+    @override_settings(PROFILE_MEMORY=False)
+    def test_without_memory_tracing(self):
+        self.middleware = ProfilingMiddleware(lambda request: HttpResponse(b'ok'))
+        response = self.profile()
+        self.assertNotIn('mem;', response['Server-Timing'])
+
+
+# ========== Metrics ==========
+
+# A worker process: counts one request, then flushes its file on exit
+WORKER = """
+import django
+django.setup()
+from core.metrics import REQUEST_DURATION, REQUESTS, REQUESTS_IN_FLIGHT
+REQUESTS.inc(endpoint='api/datasets/', method='GET', status=200)
+REQUEST_DURATION.observe(0.2, endpoint='api/datasets/', method='GET')
+REQUESTS_IN_FLIGHT.inc()
+"""
+
+SAMPLE_LINE = re.compile(r'^[a-z_]+(\{([a-z_]+="[^"]*",?)*\})? ([0-9.e+-]+|\+Inf)$')
+
+
+class MultiprocessMetricsTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.registry = Registry(self.directory)
+        self.addCleanup(atexit.unregister, self.registry.flush)
+        self.requests = self.registry.counter(
+            'api_requests_total', 'Requests', ['endpoint', 'method', 'status'])
+        self.duration = self.registry.histogram(
+            'api_request_duration_seconds', 'Latency', ['endpoint', 'method'])
+        self.in_flight = self.registry.gauge('api_requests_in_flight', 'In flight')
+
+    def run_worker(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='api.settings', METRICS_DIR=self.directory)
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', WORKER], cwd=backend_dir, env=env, check=True)
+
+    def parse(self, exposition):
+        samples = {}
+        families = []
+        for line in exposition.splitlines():
+            if line.startswith('# TYPE '):
+                families.append(line.split()[2])
+            elif not line.startswith('# HELP '):
+                self.assertRegex(line, SAMPLE_LINE)
+                name, value = line.rsplit(' ', 1)
+                samples[name] = float(value)
+        self.assertEqual(len(families), len(set(families)), 'a metric family is repeated')
+        return samples
+
+    def test_adds_up_exited_processes(self):
+        self.run_worker()
+        self.run_worker()
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.requests.inc(endpoint='api/datasets/', method='GET', status=200)
+
+        samples = self.parse(self.registry.exposition())
+        self.assertEqual(samples['api_requests_total{endpoint="api/datasets/",method="GET",status="200"}'], 3)
+        self.assertEqual(samples['api_request_duration_seconds_count{endpoint="api/datasets/",method="GET"}'], 2)
+        # Requests in flight of processes that have exited are gone
+        self.assertNotIn('api_requests_in_flight', samples)
+        # Their files are folded into this process's file
+        self.assertEqual(os.listdir(self.directory), [f'{self.registry.process_id()}.json'])
+
+        samples = self.parse(self.registry.exposition())
+        self.assertEqual(samples['api_requests_total{endpoint="api/datasets/",method="GET",status="200"}'], 3)
+
+    def test_reused_pid_does_not_hide_old_process(self):
+        stale = {'api_requests_total': {json.dumps(['api/', 'GET', '200']): 5}}
+        with open(os.path.join(self.directory, f'{os.getpid()}-0.json'), 'w') as f:
+            json.dump(stale, f)
+        self.requests.inc(endpoint='api/', method='GET', status=200)
+
+        samples = self.parse(self.registry.exposition())
+        self.assertEqual(samples['api_requests_total{endpoint="api/",method="GET",status="200"}'], 6)
+
+
+# ========== Equipment pages (keyset pagination) ==========
+
+class EquipmentPageTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def walk(self, dataset, limit):
+        """Every page from the first cursor to the last; returns (pages, names)"""
+        pages, names, cursor = 0, [], None
+        while True:
+            params = {'limit': limit} if cursor is None else {'limit': limit, 'cursor': cursor}
+            response = self.client.get(f'/api/datasets/{dataset.id}/equipment/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['ids'], sorted(response.data['ids']))
+            pages += 1
+            names += response.data['names']
+            cursor = response.data['next_cursor']
+            if cursor is None:
+                return pages, names
+            # Ids run on where the page ended
+            self.assertEqual(cursor, response.data['ids'][-1])
+
+    def test_pages_cover_every_row_once(self):
+        dataset = make_dataset(self.user, rows=25)
+        # Rows of another dataset stored in between must not show up
+        make_dataset(self.user, rows=5, filename='other.csv')
+
+        pages, names = self.walk(dataset, limit=7)
+        self.assertEqual(pages, 4)
+        self.assertEqual(names, [f'Equipment-{i}' for i in range(25)])
+
+    def test_last_full_page_is_followed_by_an_empty_one(self):
+        dataset = make_dataset(self.user, rows=21)
+
+        pages, names = self.walk(dataset, limit=7)
+        self.assertEqual(pages, 4)
+        self.assertEqual(len(names), 21)
+
+    def test_cursor_is_unaffected_by_rows_added_elsewhere(self):
+        dataset = make_dataset(self.user, rows=10)
+        first = self.client.get(f'/api/datasets/{dataset.id}/equipment/', {'limit': 4}).data
+        make_dataset(self.user, rows=10, filename='new.csv')
+
+        rest = self.client.get(
+            f'/api/datasets/{dataset.id}/equipment/', {'limit': 100, 'cursor': first['next_cursor']}
+        ).data
+        self.assertEqual(first['names'] + rest['names'], [f'Equipment-{i}' for i in range(10)])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_each_page_has_its_own_etag(self):
+        dataset = make_dataset(self.user, rows=10)
+        url = f'/api/datasets/{dataset.id}/equipment/'
+        first = self.client.get(url, {'limit': 4})
+        second = self.client.get(url, {'limit': 4, 'cursor': first.data['next_cursor']})
+
+        self.assertNotEqual(first['ETag'], second['ETag'])
+        self.assertNotEqual(first['ETag'], self.client.get(url, {'limit': 5})['ETag'])
+        response = self.client.get(url, {'limit': 4}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            url, {'limit': 4, 'cursor': first.data['next_cursor']}, HTTP_IF_NONE_MATCH=first['ETag']
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['names'], [f'Equipment-{i}' for i in range(4, 8)])
+
+    def test_bad_cursor_and_other_users_dataset(self):
+        dataset = make_dataset(User.objects.create_user('bob', password='pw123456'))
+
+        response = self.client.get(f'/api/datasets/{dataset.id}/equipment/', {'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/datasets/{dataset.id}/equipment/')
+        self.assertEqual(response.status_code, 404)
+
+
+# ========== Uploads ==========
+
+def npz_upload(**overrides):
+    columns = {
+        'names': np.array(['P-1', 'V-1', 'P-2']),
+        'types': np.array(['Pump', 'Valve', 'Pump']),
+        'flowrates': np.array([100.0, 50.0, 120.0]),
+        'pressures': np.array([5.0, 4.0, 6.0]),
+        'temperatures': np.array([110.0, 90.0, 130.0]),
+    }
+    columns.update(overrides)
+    out = io.BytesIO()
+    # As the desktop client writes them
+    np.savez_compressed(out, **columns)
+    return SimpleUploadedFile('plant.npz', out.getvalue())
+
+
+class UploadTests(TempCacheDirsMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        # Pool workers read the real database, not the test one
+        schedule = mock.patch('core.views.schedule_chart_thumbnails')
+        self.schedule_chart_thumbnails = schedule.start()
+        self.addCleanup(schedule.stop)
+
+    def upload_columns(self, upload, **fields):
+        return self.client.post('/api/upload/columns/', {'file': upload, **fields}, format='multipart')
+
+    def test_columns_upload_computes_stats(self):
+        response = self.upload_columns(npz_upload())
+
+        self.assertEqual(response.status_code, 201)
+        dataset = Dataset.objects.get(user=self.user)
+        self.schedule_chart_thumbnails.assert_called_once_with(dataset)
+        self.assertEqual(dataset.total_count, 3)
+        self.assertAlmostEqual(dataset.avg_flowrate, 90.0)
+        self.assertEqual([t['equipment_type'] for t in dataset.stats['types']], ['Pump', 'Valve'])
+
+    def test_client_stats_are_ignored(self):
+        junk = '{"version": 1, "total_count": 3, "types": [], "flowrate": {"median": -1}}'
+        response = self.upload_columns(npz_upload(), stats=junk)
+
+        self.assertEqual(response.status_code, 201)
+        stats = Dataset.objects.get(user=self.user).stats
+        self.assertEqual(stats['flowrate']['median'], 100.0)
+        self.assertEqual(len(stats['types']), 2)
+
+    def test_pickled_columns_are_rejected(self):
+        objects = np.array([{'name': 'P-1'}, None, 'x'], dtype=object)
+        response = self.upload_columns(npz_upload(names=objects))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Invalid columnar file', response.data['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_ragged_columns_are_rejected(self):
+        response = self.upload_columns(npz_upload(pressures=np.array([5.0, 4.0])))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Columns have different lengths')
+
+    def test_non_finite_columns_are_rejected(self):
+        for value in (np.nan, np.inf):
+            response = self.upload_columns(npz_upload(flowrates=np.array([100.0, value, 120.0])))
+
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("'flowrates' has missing or infinite values", response.data['error'])
+        self.assertFalse(Dataset.objects.exists())
+
+    def test_csv_with_blank_cell_is_rejected(self):
+        csv = b'Equipment Name,Type,Flowrate,Pressure,Temperature\nP-1,Pump,100,5,110\nV-1,Valve,50,,90\n'
+        response = self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('plant.csv', csv)}, format='multipart'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], "Invalid CSV: 'Pressure' is missing or not a number on line 3")
+        self.assertFalse(Dataset.objects.exists())
+
+    @override_settings(COLUMNAR_UPLOAD_MAX_SIZE=1024 * 1024)
+    def test_columns_inflating_past_the_limit_are_rejected(self):
+        # 16 MB of zeros compress to a few KB
+        upload = npz_upload(flowrates=np.zeros(2_000_000))
+        self.assertLess(upload.size, 100_000)
+        response = self.upload_columns(upload)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Columns are larger than 1 MB uncompressed')
+
+    def test_array_header_larger_than_its_data_is_rejected(self):
+        out = io.BytesIO()
+        np.savez(out, **{name: np.array([]) for name in ('names', 'types', 'pressures', 'temperatures')})
+        with zipfile.ZipFile(out, 'a') as archive, archive.open('flowrates.npy', 'w') as f:
+            header = {'descr': '<f8', 'fortran_order': False, 'shape': (10 ** 12,)}
+            np.lib.format.write_array_header_1_0(f, header)
+            f.write(bytes(8))
+        response = self.upload_columns(SimpleUploadedFile('plant.npz', out.getvalue()))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('flowrates.npy is shorter than its header says', response.data['error'])
+
+
+# ========== Token authentication ==========
+
+class TokenCacheInvalidationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        # Puts the token in the cache, so the requests below test it going away
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+
+    def test_logout(self):
+        self.assertEqual(self.client.post('/api/logout/').status_code, 200)
+        self.assertEqual(self.client.get('/api/profile/').status_code, 401)
+
+    def test_user_changes_are_seen_at_once(self):
+        self.user.email = 'alice@example.com'
+        self.user.save()
+        response = self.client.get('/api/profile/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['email'], 'alice@example.com')
+
+    def test_password_change_keeps_the_token(self):
+        # Tokens aren't tied to the password; only the cached user is dropped
+        self.user.set_password('new-pw123456')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/profile/').status_code, 200)
+
+    def test_deactivated_user(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/profile/').status_code, 401)
+
+    def test_user_deletion(self):
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/profile/').status_code, 401)
+
+
+class MetricsEndpointTests(APITestCase):
+    def test_anonymous_is_refused(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+    def test_regular_user_is_refused(self):
+        user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+    def test_staff_user(self):
+        user = User.objects.create_user('ops', password='pw123456', is_staff=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}')
+        response = self.client.get('/api/metrics/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE api_requests_total counter', response.content)
+
+    @override_settings(METRICS_PUBLIC=True)
+    def test_public(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
+
+
+# ========== Detailed report (streaming PDF) ==========
+
+def parse_pdf(data):
+    """
+    Check the structure a PDF reader relies on: header, trailer, and an xref
+    table whose every offset points at its object. Returns the decompressed
+    content streams.
+    """
+    assert data.startswith(b'%PDF-1.4\n'), 'missing header'
+    assert data.rstrip().endswith(b'%%EOF'), 'missing %%EOF'
+
+    xref_offset = int(re.search(rb'startxref\n(\d+)\n%%EOF\s*$', data).group(1))
+    assert data[xref_offset:].startswith(b'xref\n'), 'startxref does not point at the xref table'
+    size = int(re.match(rb'xref\n0 (\d+)\n', data[xref_offset:]).group(1))
+    entries = re.findall(rb'(\d{10}) (\d{5}) ([nf]) \n', data[xref_offset:])
+    assert len(entries) == size, 'xref entry count does not match its header'
+    for obj_id, (offset, _, kind) in enumerate(entries):
+        if kind == b'n':
+            assert data[int(offset):].startswith(b'%d 0 obj\n' % obj_id), f'bad offset for object {obj_id}'
+
+    pages = len(re.findall(rb'/Type /Page\b', data))
+    count = int(re.search(rb'/Type /Pages /Kids \[[^\]]*\] /Count (\d+)', data).group(1))
+    assert pages == count, 'page count does not match /Pages /Count'
+
+    streams = re.findall(rb'stream\n(.*?)\nendstream', data, re.S)
+    return [zlib.decompress(stream) for stream in streams]
+
+
+class StreamingPDFTests(TestCase):
+    def test_detailed_report_structure(self):
+        summary = {
+            'filename': 'plant.csv', 'uploaded_at': '2026-01-01 10:00', 'total_count': 500,
+            'avg_flowrate': 1.0, 'avg_pressure': 2.0, 'avg_temperature': 3.0,
+            'types': [{'equipment_type': 'Pump', 'count': 500, 'avg_flowrate': 1.0,
+                       'avg_pressure': 2.0, 'avg_temperature': 3.0}],
+        }
+        rows = ((f'Equipment-{i}', 'Pump', 1.0, 2.0, 3.0) for i in range(500))
+        out = io.BytesIO()
+        render_detailed_report(summary, rows, out)
+
+        contents = b'\n'.join(parse_pdf(out.getvalue()))
+        self.assertIn(b'(Equipment Detail Report)', contents)
+        self.assertIn(b'(Equipment-0)', contents)
+        self.assertIn(b'(Equipment-499)', contents)
+
+    def test_text_is_escaped(self):
+        out = io.BytesIO()
+        pdf = StreamingPDF(out)
+        pdf.draw_string(10, 10, 'pump (main) \\ 2')
+        pdf.save()
+
+        [content] = parse_pdf(out.getvalue())
+        self.assertIn(b'(pump \\(main\\) \\\\ 2) Tj', content)
+
+
+class DetailedReportEndpointTests(TempCacheDirsMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def test_full_report_is_a_valid_pdf(self):
+        dataset = make_dataset(self.user, rows=120)
+        response = self.client.get(f'/api/datasets/{dataset.id}/report/', {'detail': 'full'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        pdf = b''.join(response.streaming_content)
+        response.close()
+        self.assertIn(b'(Equipment-119)', b'\n'.join(parse_pdf(pdf)))
+
+
+# ========== Bulk reports ==========
+
+class BulkReportsTests(TempCacheDirsMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+
+    def download(self, ids):
+        response = self.client.get('/api/reports/bulk/', {'ids': ','.join(str(i) for i in ids)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        data = b''.join(response.streaming_content)
+        response.close()
+        archive = zipfile.ZipFile(io.BytesIO(data))
+        self.assertIsNone(archive.testzip())
+        return archive
+
+    def test_one_pdf_per_dataset(self):
+        datasets = [make_dataset(self.user, rows=5 + i, filename=f'plant{i}.csv') for i in range(3)]
+        empty = make_dataset(self.user, rows=0, filename='empty.csv')
+        others = make_dataset(User.objects.create_user('bob', password='pw123456'))
+
+        archive = self.download([d.id for d in reversed(datasets)] + [empty.id, others.id])
+
+        # Entries are written as reports finish, not in id order
+        pdfs = [f'{d.id}_plant{i}.csv_report.pdf' for i, d in enumerate(datasets)]
+        self.assertCountEqual(archive.namelist(), pdfs + [f'{empty.id}_empty.csv_no_data.txt'])
+        for name in pdfs:
+            pdf = archive.read(name)
+            self.assertTrue(pdf.startswith(b'%PDF-'))
+            self.assertTrue(pdf.rstrip().endswith(b'%%EOF'))
+
+    def test_second_download_comes_from_the_cache(self):
+        dataset = make_dataset(self.user)
+        first = self.download([dataset.id]).read(f'{dataset.id}_test.csv_report.pdf')
+
+        with mock.patch('core.reports.report_data') as report_data:
+            second = self.download([dataset.id]).read(f'{dataset.id}_test.csv_report.pdf')
+        report_data.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_bad_ids(self):
+        response = self.client.get('/api/reports/bulk/', {'ids': '1,x'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/reports/bulk/', {'ids': ''})
+        self.assertEqual(response.status_code, 400)
+        others = make_dataset(User.objects.create_user('bob', password='pw123456'))
+        response = self.client.get('/api/reports/bulk/', {'ids': str(others.id)})
+        self.assertEqual(response.status_code, 404)
+
+
+# ========== Chart thumbnails ==========
+
+class ChartTests(TempCacheDirsMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.dataset = make_dataset(self.user)
+
+    def get_chart(self, chart, fmt, dataset=None):
+        dataset = dataset or self.dataset
+        return self.client.get(f'/api/datasets/{dataset.id}/charts/{chart}.{fmt}')
+
+    def test_miss_renders_every_chart_then_hits(self):
+        with mock.patch('core.reports.render_chart_thumbnails', wraps=render_chart_thumbnails) as render, \
+                mock.patch('core.reports.CACHE_LOOKUPS') as lookups:
+            first = self.get_chart('type_distribution', 'png')
+            second = self.get_chart('avg_by_type', 'svg')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Content-Type'], 'image/png')
+        self.assertIn('immutable', first['Cache-Control'])
+        self.assertTrue(b''.join(first.streaming_content).startswith(b'\x89PNG'))
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', b''.join(second.streaming_content))
+        first.close()
+        second.close()
+
+        render.assert_called_once()
+        self.assertEqual(lookups.inc.call_args_list, [
+            mock.call(cache='chart', result='miss'), mock.call(cache='chart', result='hit'),
+        ])
+
+    def test_background_render_is_served_from_the_cache(self):
+        # What a pool worker runs after an upload, here in-process
+        _render_chart_thumbnails(self.dataset.id, str(chart_dir(self.dataset)))
+
+        with mock.patch('core.reports.render_chart_thumbnails') as render:
+            response = self.get_chart('temperature_histogram', 'png')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        render.assert_not_called()
+
+    def test_schedule_only_sends_the_id(self):
+        with mock.patch('core.reports._get_pool') as get_pool:
+            schedule_chart_thumbnails(self.dataset)
+        get_pool.return_value.submit.assert_called_once_with(
+            _render_chart_thumbnails, self.dataset.id, str(chart_dir(self.dataset))
+        )
+
+    def test_not_found(self):
+        self.assertEqual(self.get_chart('pie', 'png').status_code, 404)
+        self.assertEqual(self.get_chart('type_distribution', 'gif').status_code, 404)
+        others = make_dataset(User.objects.create_user('bob', password='pw123456'))
+        self.assertEqual(self.get_chart('type_distribution', 'png', others).status_code, 404)
+        self.assertFalse(chart_dir(others).exists())
+
+    def test_dataset_without_rows(self):
+        empty = make_dataset(self.user, rows=0)
+        response = self.get_chart('type_distribution', 'png', empty)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'No equipment data')
+
+
+# ========== HTML report ==========
+
+class HTMLReportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', password='pw123456')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        self.dataset = make_dataset(self.user, filename='<b>plant</b>.csv')
+        self.dataset.equipment.filter(equipment_type='Valve').update(equipment_type='<script>x()</script>')
+
+    def get_report(self, **headers):
+        return self.client.get(f'/api/datasets/{self.dataset.id}/report/', {'format': 'html'}, **headers)
+
+    def test_report_is_self_contained(self):
+        response = self.get_report()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
+        html = response.content.decode()
+        self.assertIn('<svg', html)
+        # Nothing fetched from elsewhere: no scripts, stylesheets or images by URL
+        self.assertNotRegex(html, r'<(script|link|img|iframe)\b')
+        self.assertNotRegex(html, r'\b(src|href)\s*=')
+        self.assertNotIn('url(', html)
+
+    def test_names_are_escaped(self):
+        html = self.get_report().content.decode()
+
+        self.assertNotIn('<b>plant</b>', html)
+        self.assertIn('&lt;b&gt;plant&lt;/b&gt;.csv', html)
+        self.assertNotIn('<script>', html)
+        self.assertIn('&lt;script&gt;x()&lt;/script&gt;', html)
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.get_report()
+        self.assertTrue(first.has_header('ETag'))
+
+        second = self.get_report(HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+
+    def test_html_and_pdf_have_different_etags(self):
+        html = self.get_report()
+        with mock.patch('core.views.get_report_path', return_value=None):
+            pdf = self.client.get(f'/api/datasets/{self.dataset.id}/report/', HTTP_IF_NONE_MATCH=html['ETag'])
+        self.assertNotEqual(pdf.status_code, 304)
+        self.assertNotEqual(pdf['ETag'], html['ETag'])
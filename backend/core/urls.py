@@ -7,11 +7,16 @@ urlpatterns = [
     path('api/logout/', views.logout),
     path('api/profile/', views.profile),
     path('api/health_check/', views.health_check),
+    path('api/metrics/', views.metrics),
     path('api/upload/', views.upload_dataset),
+    path('api/upload/columns/', views.upload_columns),
     path('api/datasets/', views.get_datasets),
     path('api/datasets/<int:dataset_id>/', views.get_dataset_details),
     path('api/datasets/<int:dataset_id>/delete/', views.delete_dataset),
     path('api/datasets/<int:dataset_id>/type_distribution/', views.get_type_distribution),
     path('api/datasets/<int:dataset_id>/report/', views.generate_pdf),
-    path('api/datasets/<int:dataset_id>/raw/', views.get_raw_data)
+    path('api/datasets/<int:dataset_id>/raw/', views.get_raw_data),
+    path('api/datasets/<int:dataset_id>/equipment/', views.get_equipment_page),
+    path('api/datasets/<int:dataset_id>/charts/<slug:chart>.<slug:fmt>', views.get_chart),
+    path('api/reports/bulk/', views.bulk_reports),
 ]
\ No newline at end of file
@@ -1,27 +1,45 @@
 from .serializers import DatasetSerializer, EquipmentSerializer
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.decorators import api_view, permission_classes, parser_classes, renderer_classes
 from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth import authenticate
 from .serializers import RegisterSerializer, UserSerializer
 from .models import Dataset, Equipment
 from django.db.models import Count
 
-import pandas as pd
 from django.http import HttpResponse
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from io import BytesIO
 
-import numpy as np
-import matplotlib.pyplot as plt
-from reportlab.lib.utils import ImageReader
-
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
+import time
+from django.views.decorators.http import etag
+from django.conf import settings
+from .reports import (
+    dataset_stats, discard_cached_files, get_chart_path, get_detailed_report_path,
+    get_report_path, report_filename, schedule_chart_thumbnails, stream_reports_zip,
+)
+from .rendering import CHARTS, CHART_FORMATS
+from .ingest import IngestError, ingest_dataset, read_columns, read_csv
+from .html_report import render_html_report
+from .renderers import HTMLReportRenderer
+from .metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY, REPORT_RENDER, RETENTION_DELETIONS,
+    UPLOAD_DURATION, UPLOAD_ROWS, UPLOAD_ROWS_PER_SECOND,
+)
+
+def dataset_etag(request, dataset_id):
+    # Datasets never change after upload, so the upload time is a complete
+    # version marker. Clients holding a copy revalidate with If-None-Match
+    # and get an empty 304 instead of the full payload.
+    uploaded_at = Dataset.objects.filter(
+        id=dataset_id, user=request.user
+    ).values_list('uploaded_at', flat=True).first()
+    if uploaded_at is None:
+        return None
+    return f"{dataset_id}-{int(uploaded_at.timestamp() * 1_000_000)}"
 
 @api_view(['GET'])
 def health_check(request):
@@ -29,6 +47,18 @@ def health_check(request):
         'status': 'ok'
     })
 
+class CanReadMetrics(IsAdminUser):
+    """Staff only, unless METRICS_PUBLIC lets anyone (e.g. a scraper on a private network) in"""
+
+    def has_permission(self, request, view):
+        return getattr(settings, 'METRICS_PUBLIC', False) or super().has_permission(request, view)
+
+@api_view(['GET'])
+@permission_classes([CanReadMetrics])
+def metrics(request):
+    # Prometheus text format, summed over every server process
+    return HttpResponse(REGISTRY.exposition(), content_type=METRICS_CONTENT_TYPE)
+
 @api_view(['POST'])
 def register(request):
     serializer = RegisterSerializer(data=request.data)
@@ -98,46 +128,66 @@ def upload_dataset(request):
         }, status=status.HTTP_400_BAD_REQUEST)    
 
     csv_file = request.FILES['file']
+    start = time.perf_counter()
     
     try:
-        df = pd.read_csv(csv_file)
-    except Exception as e:
+        columns = read_csv(csv_file)
+    except IngestError as e:
         return Response({
-            'error': f'Invalid CSV: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST
+            'error': str(e)}, status=status.HTTP_400_BAD_REQUEST
         )
 
-    # Calculate statistics for visualization
+    dataset = ingest_dataset(request.user, csv_file.name, **columns)
+    record_upload('csv', dataset, time.perf_counter() - start)
+    return finish_upload(request, dataset)
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def upload_columns(request):
+    # Datasets parsed by the desktop client, sent as NumPy columns (.npz),
+    # so there is no CSV to parse here; stats are still computed here
+    if 'file' not in request.FILES:
+        return Response({
+            'error': 'No file provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    total_count = len(df)
-    avg_flowrate = df['Flowrate'].mean()
-    avg_pressure = df['Pressure'].mean()
-    avg_temperature = df['Temperature'].mean()
+    upload = request.FILES['file']
+    start = time.perf_counter()
+    try:
+        columns = read_columns(upload)
+    except IngestError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-    dataset = Dataset.objects.create(
-        user=request.user,
-        filename=csv_file.name,
-        total_count=total_count,
-        avg_flowrate=avg_flowrate,
-        avg_pressure=avg_pressure,
-        avg_temperature=avg_temperature
+    dataset = ingest_dataset(
+        request.user,
+        request.data.get('filename') or upload.name,
+        **columns
     )
+    record_upload('columns', dataset, time.perf_counter() - start)
+    return finish_upload(request, dataset)
+
+def record_upload(fmt, dataset, seconds):
+    UPLOAD_ROWS.inc(dataset.total_count, format=fmt)
+    UPLOAD_DURATION.observe(seconds, format=fmt)
+    if seconds > 0:
+        UPLOAD_ROWS_PER_SECOND.observe(dataset.total_count / seconds, format=fmt)
+
+def finish_upload(request, dataset):
+    """What every upload does once its dataset is stored"""
+    # Charts look the same in every client, so draw them once up front
+    schedule_chart_thumbnails(dataset)
 
-    for _, row in df.iterrows():
-        Equipment.objects.create(
-            dataset=dataset,
-            name=row.get('Equipment Name', 'Unknown/NA'),
-            equipment_type=row.get('Type', 'Unknown/NA'),
-            flowrate=row.get('Flowrate', 0.0),
-            pressure=row.get('Pressure', 0.0),
-            temperature=row.get('Temperature', 0.0)
-        )
-    
     # filter dataset by different users
     user_datasets = Dataset.objects.filter(user=request.user)
     if user_datasets.count() > 5:
         old_datasets = user_datasets[5:]
         for old in old_datasets:
+            discard_cached_files(old)
             old.delete()
+            RETENTION_DELETIONS.inc()
     
     return Response({
         'message': "Dataset Uploaded Successfully",
@@ -158,6 +208,7 @@ def get_datasets(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@etag(dataset_etag)
 def get_dataset_details(request, dataset_id):
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
@@ -173,6 +224,7 @@ def get_dataset_details(request, dataset_id):
 def delete_dataset(request, dataset_id):
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
+        discard_cached_files(dataset)
         dataset.delete()
         return Response({
             'message': 'Dataset deleted successfully'
@@ -184,6 +236,7 @@ def delete_dataset(request, dataset_id):
     
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@etag(dataset_etag)
 def get_type_distribution(request, dataset_id):
     try:
         dataset = Dataset.objects.get(id=dataset_id, user=request.user)
@@ -217,16 +270,9 @@ def get_type_distribution(request, dataset_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-def _fig_to_image(fig):
-    buffer = BytesIO()
-    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
-    buffer.seek(0)
-    img = ImageReader(buffer)
-    plt.close(fig)
-    return img
-
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@etag(dataset_etag)
 def get_raw_data(request, dataset_id):
     dataset = Dataset.objects.get(id=dataset_id, user=request.user)
     equipment = dataset.equipment.all()
@@ -240,148 +286,105 @@ def get_raw_data(request, dataset_id):
     })
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def generate_pdf(request, dataset_id):
-    plt.switch_backend("Agg")
-    plt.style.use("seaborn-v0_8")
+# Rows per page of /equipment/ when the client doesn't ask, and the most it may ask for
+EQUIPMENT_PAGE_SIZE = 5000
+EQUIPMENT_PAGE_MAX = 50000
 
+def equipment_page_etag(request, dataset_id):
+    # One ETag per page, so a client caching by dataset never gets a 304
+    # for a page other than the one it holds
+    version = dataset_etag(request, dataset_id)
     try:
-        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
-        equipment_qs = dataset.equipment.all()
-
-        if not equipment_qs.exists():
-            return Response({'error': 'No equipment data'}, status=400)
+        cursor = int(request.GET.get('cursor') or 0)
+        limit = int(request.GET.get('limit') or EQUIPMENT_PAGE_SIZE)
+    except ValueError:
+        return None
+    return version and f"{version}-{cursor}-{limit}"
 
-        flows = [e.flowrate for e in equipment_qs]
-        pressures = [e.pressure for e in equipment_qs]
-        temps = [e.temperature for e in equipment_qs]
-        types = [e.equipment_type for e in equipment_qs]
-
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # ================= PAGE 1 — TITLE + STATS =================
-        y = height - 1 * inch
-        p.setFont("Helvetica-Bold", 18)
-        p.drawString(1 * inch, y, "Equipment Analysis Report")
-
-        y -= 0.6 * inch
-        p.setFont("Helvetica", 12)
-        p.drawString(1 * inch, y, f"Filename: {dataset.filename}")
-        y -= 0.3 * inch
-        p.drawString(1 * inch, y, f"Uploaded: {dataset.uploaded_at.strftime('%Y-%m-%d %H:%M')}")
-        y -= 0.3 * inch
-        p.drawString(1 * inch, y, f"Total Equipment: {dataset.total_count}")
-
-        y -= 0.6 * inch
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(1 * inch, y, "Statistics")
-
-        y -= 0.3 * inch
-        p.setFont("Helvetica", 12)
-
-        stats_lines = [
-            f"Average Flowrate: {dataset.avg_flowrate:.2f}",
-            f"Average Pressure: {dataset.avg_pressure:.2f}",
-            f"Average Temperature: {dataset.avg_temperature:.2f}",
-            f"Median Flowrate: {np.median(flows):.2f}",
-            f"Std Dev Flowrate: {np.std(flows):.2f}",
-            f"Min Flowrate: {min(flows):.2f}",
-            f"Max Flowrate: {max(flows):.2f}",
-        ]
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@etag(equipment_page_etag)
+def get_equipment_page(request, dataset_id):
+    # Keyset pagination on the row id: cursor is the last id of the previous
+    # page, so every page is an index range scan however deep the client is.
+    # Rows come back as columns, which the desktop table loads into arrays.
+    try:
+        cursor = int(request.query_params.get('cursor') or 0)
+        limit = int(request.query_params.get('limit') or EQUIPMENT_PAGE_SIZE)
+    except ValueError:
+        return Response({
+            'error': 'cursor and limit must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    limit = max(1, min(limit, EQUIPMENT_PAGE_MAX))
 
-        for line in stats_lines:
-            p.drawString(1 * inch, y, line)
-            y -= 0.25 * inch
+    if not Dataset.objects.filter(id=dataset_id, user=request.user).exists():
+        return Response({
+            'error': 'Dataset not found'
+        }, status=status.HTTP_404_NOT_FOUND)
 
-        # ================= PAGE 2 — ALL CHARTS =================
-        p.showPage()
+    rows = list(
+        Equipment.objects.filter(dataset_id=dataset_id, id__gt=cursor)
+        .order_by('id')
+        .values_list('id', 'name', 'equipment_type', 'flowrate', 'pressure', 'temperature')[:limit]
+    )
+    ids, names, types, flowrates, pressures, temperatures = (
+        [list(c) for c in zip(*rows)] if rows else [[] for _ in range(6)]
+    )
+    return Response({
+        'dataset_id': dataset_id,
+        'ids': ids,
+        'names': names,
+        'types': types,
+        'flowrates': flowrates,
+        'pressures': pressures,
+        'temperatures': temperatures,
+        # None once this was the last page
+        'next_cursor': ids[-1] if len(ids) == limit else None,
+    }, status=status.HTTP_200_OK)
 
-        fig, axes = plt.subplots(2, 2, figsize=(10, 8))
-        fig.suptitle("Dataset Visualizations", fontsize=16)
 
-        # ---------- PIE ----------
-        type_counts = {}
-        for t in types:
-            type_counts[t] = type_counts.get(t, 0) + 1
+def report_etag(request, dataset_id):
+    # The HTML, summary PDF and detailed PDF share a URL, so each gets its
+    # own ETag
+    version = dataset_etag(request, dataset_id)
+    if request.GET.get('format') == 'html':
+        kind = 'html'
+    else:
+        kind = 'full' if request.GET.get('detail') == 'full' else 'pdf'
+    return version and f"{version}-{kind}"
 
-        axes[0, 0].pie(
-            type_counts.values(),
-            labels=type_counts.keys(),
-            autopct='%1.1f%%'
-        )
-        axes[0, 0].set_title("Equipment Type Distribution")
-
-        # ---------- HISTOGRAM ----------
-        axes[0, 1].hist(temps, bins=8, edgecolor='black')
-        axes[0, 1].set_title("Temperature Distribution")
-
-        # ---------- BAR ----------
-        type_stats = {}
-        for e in equipment_qs:
-            t = e.equipment_type
-            type_stats.setdefault(t, {'f': [], 'p': [], 't': []})
-            type_stats[t]['f'].append(e.flowrate)
-            type_stats[t]['p'].append(e.pressure)
-            type_stats[t]['t'].append(e.temperature)
-
-        labels = list(type_stats.keys())
-        avg_f = [np.mean(type_stats[x]['f']) for x in labels]
-        avg_p = [np.mean(type_stats[x]['p']) for x in labels]
-        avg_t = [np.mean(type_stats[x]['t']) for x in labels]
-
-        x = np.arange(len(labels))
-        width_bar = 0.25
-
-        axes[1, 0].bar(x - width_bar, avg_f, width_bar, label='Flowrate')
-        axes[1, 0].bar(x, avg_p, width_bar, label='Pressure')
-        axes[1, 0].bar(x + width_bar, avg_t, width_bar, label='Temperature')
-        axes[1, 0].set_xticks(x)
-        axes[1, 0].set_xticklabels(labels, rotation=30)
-        axes[1, 0].legend()
-        axes[1, 0].set_title("Average by Type")
-
-        # ---------- SCATTER ----------
-        groups = {}
-        for e in equipment_qs:
-            groups.setdefault(e.equipment_type, {'f': [], 'p': []})
-            groups[e.equipment_type]['f'].append(e.flowrate)
-            groups[e.equipment_type]['p'].append(e.pressure)
-
-        for t, data in groups.items():
-            pairs = sorted(zip(data['f'], data['p']))
-            if not pairs:
-                continue
-            f_vals, p_vals = zip(*pairs)
-            axes[1, 1].plot(f_vals, p_vals)
-            axes[1, 1].scatter(f_vals, p_vals, label=t)
-
-        axes[1, 1].legend(fontsize=7)
-        axes[1, 1].set_title("Flowrate vs Pressure")
-
-        plt.tight_layout()
-
-        img = _fig_to_image(fig)
-
-        # Draw big grid image
-        p.drawImage(
-            img,
-            0.5 * inch,
-            height - 7.5 * inch,
-            width=7.5 * inch,
-            height=7 * inch
-        )
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, HTMLReportRenderer])
+@etag(report_etag)
+def generate_pdf(request, dataset_id):
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
 
-        # ================= FINAL SAVE =================
-        p.save()
-        buffer.seek(0)
+        # ?format=html is a lightweight report built from Dataset.stats only
+        if request.query_params.get('format') == 'html':
+            stats = dataset_stats(dataset)
+            if not stats['total_count']:
+                return Response({'error': 'No equipment data'}, status=400)
+            with REPORT_RENDER.time(kind='html'):
+                html = render_html_report(dataset, stats)
+            return Response(html)
+
+        # ?detail=full adds every equipment row as paged tables
+        detailed = request.query_params.get('detail') == 'full'
+        with REPORT_RENDER.time(kind='detailed' if detailed else 'pdf'):
+            if detailed:
+                report_path = get_detailed_report_path(dataset)
+            else:
+                report_path = get_report_path(dataset)
+
+        if report_path is None:
+            return Response({'error': 'No equipment data'}, status=400)
 
         return FileResponse(
-            buffer,
+            open(report_path, 'rb'),
             as_attachment=True,
-            filename=f"{dataset.filename}_report.pdf",
+            filename=report_filename(dataset, detailed=detailed),
             content_type="application/pdf"
         )
 
@@ -392,6 +395,62 @@ def generate_pdf(request, dataset_id):
         return Response({'error': str(e)}, status=500)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_chart(request, dataset_id, chart, fmt):
+    if chart not in CHARTS or fmt not in CHART_FORMATS:
+        return Response({'error': 'Chart not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        dataset = Dataset.objects.get(id=dataset_id, user=request.user)
+    except Dataset.DoesNotExist:
+        return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    chart_path = get_chart_path(dataset, chart, fmt)
+    if chart_path is None:
+        return Response({'error': 'No equipment data'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = FileResponse(
+        open(chart_path, 'rb'),
+        content_type='image/png' if fmt == 'png' else 'image/svg+xml'
+    )
+    # Datasets are immutable once uploaded, so the chart never changes
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_reports(request):
+    raw_ids = request.query_params.get('ids', '')
+    try:
+        dataset_ids = sorted({int(x) for x in raw_ids.split(',') if x.strip()})
+    except ValueError:
+        return Response({
+            'error': 'ids must be a comma separated list of dataset ids'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if not dataset_ids:
+        return Response({
+            'error': 'No dataset ids provided'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    datasets = list(Dataset.objects.filter(id__in=dataset_ids, user=request.user))
+    if not datasets:
+        return Response({
+            'error': 'Dataset not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    # Entries are written as soon as each report is ready, so the download
+    # starts before the slowest render finishes
+    response = StreamingHttpResponse(
+        stream_reports_zip(datasets),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = 'attachment; filename="reports.zip"'
+    return response
+
+
 
 
 # def generate_pdf(request, dataset_id):
@@ -1,19 +1,160 @@
+import os
+import re
+import threading
+import time
 import requests
-from typing import Optional, Dict, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Optional, Dict, List, Tuple, Union
+from .cache import DatasetCache
+from .multipart import MultipartFileEncoder, UploadCancelled, UploadProgress
+
+# Methods sent again if the connection drops mid-request or the server answers
+# with a transient error. DELETE is left out: a proxy 5xx can follow a delete
+# that went through, and the retry would then fail with a 404. Failures to
+# connect at all are retried for every method (nothing reached the server).
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT'])
+RETRY_STATUSES = (502, 503, 504)
+
+# Numeric path segments, so /datasets/12/ and /datasets/13/ share latency stats
+ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
 
 class APIClient:
     """
     API Client for connecting PyQt frontend to Django backend
+
+    All calls share one pooled requests.Session, so repeated calls reuse
+    keep-alive connections instead of opening a new TCP connection each time.
     """
-    def __init__(self, base_url="http://localhost:8000/api"):
+    def __init__(self, base_url="http://localhost:8000/api", pool_size: int = 10,
+                 timeout: Union[float, Tuple[float, float]] = (3.05, 30),
+                 max_retries: int = 3, backoff_factor: float = 0.3,
+                 cache: Optional[DatasetCache] = None):
+        """
+        pool_size: max keep-alive connections kept open to the server
+        timeout: seconds, or a (connect, read) tuple, applied to every call
+        max_retries / backoff_factor: retries for idempotent calls, sleeping
+            backoff_factor * 2 ** (retry - 1) seconds between attempts
+        cache: optional on-disk cache for dataset details and distributions,
+            shared by every user of this machine (entries are kept apart by
+            server and username, and all removed on logout)
+        """
         self.base_url = base_url
         self.token = None
+        self.username = None
+        self.timeout = timeout
+        self.cache = cache
+        self.pool_size = pool_size
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._stats = {}
+        self._stats_lock = threading.Lock()
     
     def get_headers(self):
         """Get authorization headers with token"""
         if self.token:
             return {'Authorization': f'Token {self.token}'}
         return {}
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """Send a request through the shared session and record its latency"""
+        kwargs.setdefault('headers', self.get_headers())
+        kwargs.setdefault('timeout', self.timeout)
+
+        start = time.perf_counter()
+        failed = False
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            failed = response.status_code >= 500
+            return response
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._record(method, path, time.perf_counter() - start, failed)
+
+    def _record(self, method: str, path: str, elapsed: float, failed: bool):
+        endpoint = f"{method} {ID_SEGMENT.sub('/<id>', path.split('?')[0])}"
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, {
+                'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0
+            })
+            stats['count'] += 1
+            stats['errors'] += int(failed)
+            stats['total_ms'] += elapsed * 1000
+            stats['max_ms'] = max(stats['max_ms'], elapsed * 1000)
+
+    def _cache_key(self, key: str) -> str:
+        # Dataset ids are per server, and only their owner may see them
+        return f"{self.base_url}|{self.username}|{key}"
+
+    def _get_cached(self, path: str, key: str) -> Optional[Dict]:
+        """
+        GET a dataset resource through the on-disk cache. A cached copy is
+        revalidated with If-None-Match, so the full payload is only
+        downloaded when the server has something newer.
+        """
+        key = self._cache_key(key)
+        entry = self.cache.get(key) if self.cache else None
+        headers = self.get_headers()
+        if entry:
+            headers['If-None-Match'] = entry.etag
+
+        try:
+            response = self._request('GET', path, headers=headers)
+        except requests.ConnectionError:
+            # Offline: datasets never change, so the cached copy is still right
+            if entry:
+                return entry.payload
+            raise
+
+        if response.status_code == 304 and entry:
+            self.cache.touch(key)
+            return entry.payload
+        if response.status_code == 200:
+            data = response.json()
+            if self.cache and response.headers.get('ETag'):
+                self.cache.put(key, response.headers['ETag'], data)
+            return data
+        if response.status_code == 404 and self.cache:
+            self.cache.delete(key)
+        return None
+
+    def get_latency_stats(self) -> Dict[str, Dict]:
+        """
+        Per-endpoint latency since the client was created (or last reset)
+        Returns: {'GET /datasets/<id>/': {'count', 'errors', 'avg_ms', 'max_ms'}, ...}
+        """
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    'count': s['count'],
+                    'errors': s['errors'],
+                    'avg_ms': s['total_ms'] / s['count'],
+                    'max_ms': s['max_ms'],
+                }
+                for endpoint, s in self._stats.items()
+            }
+
+    def reset_latency_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
     
     # ========== Authentication Endpoints ==========
     
@@ -23,8 +164,8 @@ class APIClient:
         Returns: {'success': bool, 'message': str, 'token': str (if success)}
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/register/",
+            response = self._request(
+                'POST', "/register/",
                 json={
                     'username': username,
                     'email': email,
@@ -35,6 +176,7 @@ class APIClient:
             if response.status_code == 201:
                 data = response.json()
                 self.token = data.get('token')
+                self.username = username
                 return {
                     'success': True,
                     'message': 'Registration successful',
@@ -60,14 +202,15 @@ class APIClient:
         Returns: {'success': bool, 'message': str, 'token': str (if success)}
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/login/",
+            response = self._request(
+                'POST', "/login/",
                 json={'username': username, 'password': password}
             )
             
             if response.status_code == 200:
                 data = response.json()
                 self.token = data.get('token')
+                self.username = username
                 return {
                     'success': True,
                     'message': 'Login successful',
@@ -91,10 +234,7 @@ class APIClient:
         Returns: {'success': bool, 'message': str}
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/logout/",
-                headers=self.get_headers()
-            )
+            response = self._request('POST', "/logout/")
             
             if response.status_code == 200:
                 self.token = None
@@ -112,6 +252,12 @@ class APIClient:
                 'success': False,
                 'message': f'Connection error: {str(e)}'
             }
+        finally:
+            # Whether or not the server heard about it, nothing of this
+            # session stays on disk for whoever uses the machine next
+            if self.cache:
+                self.cache.clear()
+            self.username = None
     
     def get_profile(self) -> Optional[Dict]:
         """
@@ -119,10 +265,7 @@ class APIClient:
         Returns: User profile data or None
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/profile/",
-                headers=self.get_headers()
-            )
+            response = self._request('GET', "/profile/")
             
             if response.status_code == 200:
                 return response.json()
@@ -133,19 +276,44 @@ class APIClient:
     
     # ========== Dataset Endpoints ==========
     
-    def upload_dataset(self, file_path: str) -> Dict:
+    def upload_dataset(self, file_path: str,
+                       progress: Optional[Callable[[UploadProgress], None]] = None,
+                       cancel_event: Optional[threading.Event] = None,
+                       columnar: bool = False) -> Dict:
         """
-        Upload a CSV dataset
-        Returns: {'success': bool, 'message': str, 'dataset': dict (if success)}
+        Upload a CSV dataset, streamed from disk in fixed-size chunks
+        progress: called with UploadProgress(sent, total, bytes_per_sec)
+        cancel_event: set it from another thread to abort the upload
+        columnar: parse and check the CSV here and send compressed NumPy
+            columns, so the server has no CSV to parse
+        Returns: {'success': bool, 'message': str, 'dataset': dict (if success),
+                  'cancelled': bool (if cancelled)}
         """
+        upload_path = None
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(
-                    f"{self.base_url}/upload/",
-                    files=files,
-                    headers=self.get_headers()
-                )
+            if columnar:
+                # NumPy and pandas only load once a columnar upload happens
+                from .columnar import InvalidDataset, read_csv_columns, write_columns
+                try:
+                    columns = read_csv_columns(file_path)
+                except InvalidDataset as e:
+                    return {
+                        'success': False,
+                        'message': str(e)
+                    }
+                fields = {'filename': os.path.basename(file_path)}
+                upload_path = write_columns(columns)
+                del columns
+                if cancel_event is not None and cancel_event.is_set():
+                    raise UploadCancelled()
+                body = MultipartFileEncoder('file', upload_path, progress, cancel_event, fields)
+                path = "/upload/columns/"
+            else:
+                body = MultipartFileEncoder('file', file_path, progress, cancel_event)
+                path = "/upload/"
+            headers = self.get_headers()
+            headers['Content-Type'] = body.content_type
+            response = self._request('POST', path, data=body, headers=headers)
             
             if response.status_code == 201:
                 data = response.json()
@@ -160,11 +328,20 @@ class APIClient:
                     'success': False,
                     'message': error_data.get('error', 'Upload failed')
                 }
+        except UploadCancelled:
+            return {
+                'success': False,
+                'cancelled': True,
+                'message': 'Upload cancelled'
+            }
         except Exception as e:
             return {
                 'success': False,
                 'message': f'Upload error: {str(e)}'
             }
+        finally:
+            if upload_path:
+                os.remove(upload_path)
     
     def get_datasets(self) -> List[Dict]:
         """
@@ -172,10 +349,7 @@ class APIClient:
         Returns: List of datasets or empty list
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/datasets/",
-                headers=self.get_headers()
-            )
+            response = self._request('GET', "/datasets/")
             
             if response.status_code == 200:
                 return response.json()
@@ -190,14 +364,7 @@ class APIClient:
         Returns: Dataset details or None
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/datasets/{dataset_id}/",
-                headers=self.get_headers()
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            return None
+            return self._get_cached(f"/datasets/{dataset_id}/", f"dataset:{dataset_id}:details")
         except Exception as e:
             print(f"Error getting dataset details: {e}")
             return None
@@ -208,12 +375,11 @@ class APIClient:
         Returns: {'success': bool, 'message': str}
         """
         try:
-            response = requests.delete(
-                f"{self.base_url}/datasets/{dataset_id}/delete/",
-                headers=self.get_headers()
-            )
+            response = self._request('DELETE', f"/datasets/{dataset_id}/delete/")
             
             if response.status_code == 200:
+                if self.cache:
+                    self.cache.delete_prefix(self._cache_key(f"dataset:{dataset_id}:"))
                 return {
                     'success': True,
                     'message': 'Dataset deleted successfully'
@@ -235,28 +401,59 @@ class APIClient:
         Returns: Distribution data or None
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/datasets/{dataset_id}/type_distribution/",
-                headers=self.get_headers()
+            return self._get_cached(
+                f"/datasets/{dataset_id}/type_distribution/", f"dataset:{dataset_id}:distribution"
             )
-            
+        except Exception as e:
+            print(f"Error getting type distribution: {e}")
+            return None
+
+    def get_equipment_page(self, dataset_id: int, cursor: Optional[int] = None,
+                           limit: Optional[int] = None) -> Optional[Dict]:
+        """
+        Get one page of a dataset's equipment rows, as columns
+        cursor: next_cursor of the previous page (None for the first page)
+        Returns: {'ids', 'names', 'types', 'flowrates', 'pressures',
+            'temperatures', 'next_cursor'} or None
+        """
+        params = {}
+        if cursor is not None:
+            params['cursor'] = cursor
+        if limit is not None:
+            params['limit'] = limit
+        try:
+            response = self._request('GET', f"/datasets/{dataset_id}/equipment/", params=params)
+
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception as e:
-            print(f"Error getting type distribution: {e}")
+            print(f"Error getting equipment page: {e}")
             return None
     
+    def get_chart_thumbnail(self, dataset_id: int, chart: str, fmt: str = 'png') -> Optional[bytes]:
+        """
+        Get a chart pre-rendered by the server (type_distribution, avg_by_type,
+        flowrate_vs_pressure or temperature_histogram)
+        Returns: Image bytes or None
+        """
+        try:
+            response = self._request('GET', f"/datasets/{dataset_id}/charts/{chart}.{fmt}")
+
+            if response.status_code == 200:
+                return response.content
+            return None
+        except Exception as e:
+            print(f"Error getting chart thumbnail: {e}")
+            return None
+
     def download_report(self, dataset_id: int, save_path: str) -> Dict:
         """
         Download PDF report for a dataset
         Returns: {'success': bool, 'message': str}
         """
         try:
-            response = requests.get(
-                f"{self.base_url}/datasets/{dataset_id}/report/",
-                headers=self.get_headers()
-            )
+            response = self._request('GET', f"/datasets/{dataset_id}/report/")
             
             if response.status_code == 200:
                 with open(save_path, 'wb') as f:
@@ -276,13 +473,52 @@ class APIClient:
                 'message': f'Download error: {str(e)}'
             }
     
-    def health_check(self) -> bool:
+    def download_reports(self, dataset_ids: List[int], save_path: str) -> Dict:
+        """
+        Download PDF reports for several datasets as one ZIP archive
+        Returns: {'success': bool, 'message': str}
+        """
+        try:
+            with self._request(
+                'GET', "/reports/bulk/",
+                params={'ids': ','.join(str(i) for i in dataset_ids)},
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    return {
+                        'success': False,
+                        'message': 'Failed to download reports'
+                    }
+
+                # The server streams entries as they finish rendering, so
+                # write chunks as they arrive instead of buffering the archive
+                try:
+                    with open(save_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=64 * 1024):
+                            f.write(chunk)
+                except BaseException:
+                    # Don't leave a truncated archive behind
+                    if os.path.exists(save_path):
+                        os.remove(save_path)
+                    raise
+                return {
+                    'success': True,
+                    'message': f'Reports saved to {save_path}'
+                }
+        except Exception as e:
+            return {
+                'success': False,
+                'message': f'Download error: {str(e)}'
+            }
+
+    def health_check(self, timeout: Optional[float] = None) -> bool:
         """
         Check if API server is running
+        timeout: seconds to wait instead of the client's default
         Returns: True if server is up, False otherwise
         """
         try:
-            response = requests.get(f"{self.base_url}/health_check/")
+            response = self._request('GET', "/health_check/", timeout=timeout or self.timeout)
             return response.status_code == 200
         except:
             return False
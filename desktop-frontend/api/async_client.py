@@ -0,0 +1,112 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .api_client import APIClient
+
+
+class AsyncAPIClient:
+    """
+    Thread fan-out helper with an asyncio face: APIClient's methods as
+    coroutines, for awaiting several requests together.
+
+    The I/O is not asynchronous. Each call runs the blocking APIClient
+    method on a thread pool as large as the client's connection pool
+    (run_in_executor), so calls awaited together (asyncio.gather) go out at
+    the same time over the shared keep-alive connections. Results, error
+    handling, the on-disk cache and latency stats are all APIClient's.
+
+    client: APIClient to wrap, so sync and async callers share one session
+        and token; a new one is created from kwargs otherwise
+    """
+
+    def __init__(self, client: Optional[APIClient] = None, **kwargs):
+        self.client = client or APIClient(**kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=self.client.pool_size,
+                                            thread_name_prefix='api')
+
+    @property
+    def token(self):
+        return self.client.token
+
+    @token.setter
+    def token(self, value):
+        self.client.token = value
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+    def close(self):
+        """Stop the worker threads (the wrapped client stays usable)"""
+        self._executor.shutdown(wait=False)
+
+    # ========== Authentication Endpoints ==========
+
+    async def register(self, username: str, email: str, password: str) -> Dict:
+        return await self._call(self.client.register, username, email, password)
+
+    async def login(self, username: str, password: str) -> Dict:
+        return await self._call(self.client.login, username, password)
+
+    async def logout(self) -> Dict:
+        return await self._call(self.client.logout)
+
+    async def get_profile(self) -> Optional[Dict]:
+        return await self._call(self.client.get_profile)
+
+    # ========== Dataset Endpoints ==========
+
+    async def upload_dataset(self, file_path: str, progress=None, cancel_event=None,
+                             columnar: bool = False) -> Dict:
+        return await self._call(self.client.upload_dataset, file_path, progress, cancel_event, columnar)
+
+    async def get_datasets(self) -> List[Dict]:
+        return await self._call(self.client.get_datasets)
+
+    async def get_dataset_details(self, dataset_id: int) -> Optional[Dict]:
+        return await self._call(self.client.get_dataset_details, dataset_id)
+
+    async def delete_dataset(self, dataset_id: int) -> Dict:
+        return await self._call(self.client.delete_dataset, dataset_id)
+
+    async def get_type_distribution(self, dataset_id: int) -> Optional[Dict]:
+        return await self._call(self.client.get_type_distribution, dataset_id)
+
+    async def get_equipment_page(self, dataset_id: int, cursor: Optional[int] = None,
+                                 limit: Optional[int] = None) -> Optional[Dict]:
+        return await self._call(self.client.get_equipment_page, dataset_id, cursor, limit)
+
+    async def get_chart_thumbnail(self, dataset_id: int, chart: str, fmt: str = 'png') -> Optional[bytes]:
+        return await self._call(self.client.get_chart_thumbnail, dataset_id, chart, fmt)
+
+    async def download_report(self, dataset_id: int, save_path: str) -> Dict:
+        return await self._call(self.client.download_report, dataset_id, save_path)
+
+    async def download_reports(self, dataset_ids: List[int], save_path: str) -> Dict:
+        return await self._call(self.client.download_reports, dataset_ids, save_path)
+
+    async def health_check(self, timeout: Optional[float] = None) -> bool:
+        return await self._call(self.client.health_check, timeout)
+
+    # ========== Fan-out ==========
+
+    async def get_dataset_bundle(self, dataset_id: int) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """
+        Details and type distribution of a dataset, requested at the same time
+        Returns: (details or None, distribution or None)
+        """
+        details, distribution = await asyncio.gather(
+            self.get_dataset_details(dataset_id),
+            self.get_type_distribution(dataset_id)
+        )
+        return details, distribution
+
+    async def get_dataset_bundles(self, dataset_ids: List[int]) -> List[Tuple[Optional[Dict], Optional[Dict]]]:
+        """get_dataset_bundle for several datasets at once, in the order given"""
+        return list(await asyncio.gather(*(self.get_dataset_bundle(i) for i in dataset_ids)))
+
+    async def delete_datasets(self, dataset_ids: List[int]) -> List[Dict]:
+        """Delete several datasets at once, one result per id in the order given"""
+        return list(await asyncio.gather(*(self.delete_dataset(i) for i in dataset_ids)))
@@ -0,0 +1,120 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+APP_NAME = "EquipmentDataAnalyzer"
+
+
+def default_cache_dir() -> Path:
+    """Per-user cache directory for the desktop app on each platform"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or Path.home()
+    elif sys.platform == 'darwin':
+        base = Path.home() / 'Library' / 'Caches'
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / APP_NAME
+
+
+class CacheEntry(NamedTuple):
+    etag: str
+    payload: Any
+
+
+class DatasetCache:
+    """
+    On-disk cache of API responses (dataset details, type distributions)
+    keyed by dataset, stored in a single SQLite file.
+
+    Each entry keeps the ETag the server sent, so the client can revalidate
+    with a conditional request and only download the payload if it changed.
+    Payloads are zlib-compressed JSON; once the total size passes max_bytes
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_bytes: int = 200 * 1024 * 1024):
+        self.path = Path(path) if path else default_cache_dir() / 'datasets.sqlite3'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        # APIClient is called from worker threads, so one connection shared
+        # behind a lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " etag TEXT NOT NULL,"
+            " payload BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, payload FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], json.loads(zlib.decompress(row[1])))
+
+    def touch(self, key: str):
+        """Mark an entry as used (after a successful revalidation)"""
+        with self._lock:
+            self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+    def put(self, key: str, etag: str, payload: Any):
+        blob = zlib.compress(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, etag, payload, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, etag, blob, len(blob), time.time())
+            )
+            self._evict()
+            self._db.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._db.commit()
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            self._db.execute("DELETE FROM entries WHERE key LIKE ? || '%'", (prefix,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.commit()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._db.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ).fetchall():
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+# CSV column -> array name in the upload; text columns default to Unknown/NA
+TEXT_COLUMNS = {'Equipment Name': 'names', 'Type': 'types'}
+NUMBER_COLUMNS = {'Flowrate': 'flowrates', 'Pressure': 'pressures', 'Temperature': 'temperatures'}
+MAX_TEXT_LENGTH = 255
+
+
+class InvalidDataset(ValueError):
+    pass
+
+
+def read_csv_columns(file_path: str) -> Dict[str, np.ndarray]:
+    """
+    Parse and check a dataset CSV locally, the way the server would
+    Returns: dict of array name -> NumPy array (text as fixed-width unicode)
+    Raises: InvalidDataset with a message for the user
+    """
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(file_path)
+    except Exception as e:
+        raise InvalidDataset(f"Invalid CSV: {e}")
+
+    missing = [column for column in NUMBER_COLUMNS if column not in df]
+    if missing:
+        raise InvalidDataset(f"Invalid CSV: missing columns {', '.join(missing)}")
+
+    columns = {}
+    for csv_column, name in NUMBER_COLUMNS.items():
+        values = pd.to_numeric(df[csv_column], errors='coerce').to_numpy(dtype=float)
+        if not np.isfinite(values).all():
+            row = int(np.flatnonzero(~np.isfinite(values))[0]) + 2  # header is line 1
+            raise InvalidDataset(f"Invalid CSV: '{csv_column}' is missing or not a number on line {row}")
+        columns[name] = values
+    for csv_column, name in TEXT_COLUMNS.items():
+        values = df[csv_column].astype(str) if csv_column in df else ['Unknown/NA'] * len(df)
+        columns[name] = np.array(values, dtype=str)
+        if columns[name].dtype.itemsize // 4 > MAX_TEXT_LENGTH:
+            raise InvalidDataset(f"Invalid CSV: '{csv_column}' values are limited to {MAX_TEXT_LENGTH} characters")
+    return columns
+
+
+def write_columns(columns: Dict[str, np.ndarray]) -> str:
+    """
+    Save columns to a compressed .npz in the temp directory, for upload
+    Returns: path of the file (the caller deletes it)
+    """
+    fd, path = tempfile.mkstemp(suffix='.npz')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez_compressed(f, **columns)
+    return path
@@ -0,0 +1,98 @@
+import mimetypes
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+
+CHUNK_SIZE = 64 * 1024
+# Don't call the progress callback more often than this (seconds)
+PROGRESS_INTERVAL = 0.1
+
+
+class UploadProgress(NamedTuple):
+    sent: int
+    total: int
+    bytes_per_sec: float
+
+
+class UploadCancelled(Exception):
+    pass
+
+
+class MultipartFileEncoder:
+    """
+    multipart/form-data body for a single file (and optionally a few text
+    fields), produced in CHUNK_SIZE pieces straight from disk so the file is
+    never held in memory.
+
+    The body length is known up front (__len__), so requests sends a normal
+    Content-Length body instead of chunked transfer encoding, which Django's
+    development server can't read.
+
+    progress: called with an UploadProgress as chunks go out
+    cancel_event: set it from another thread to abort; the next chunk raises
+        UploadCancelled instead of being sent
+    fields: text form fields sent ahead of the file
+    """
+
+    def __init__(self, field: str, file_path: str,
+                 progress: Optional[Callable[[UploadProgress], None]] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 fields: Optional[Dict[str, str]] = None):
+        self.file_path = file_path
+        self.progress = progress
+        self.cancel_event = cancel_event
+        self.boundary = uuid.uuid4().hex
+
+        filename = os.path.basename(file_path).replace('"', '%22')
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        self._head = ''.join(
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+            for name, value in (fields or {}).items()
+        ).encode('utf-8') + (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode('utf-8')
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('ascii')
+        self._file_size = os.path.getsize(file_path)
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self) -> int:
+        return len(self._head) + self._file_size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        total = len(self)
+        sent = 0
+        start = last_report = time.perf_counter()
+
+        def report(force=False):
+            nonlocal last_report
+            now = time.perf_counter()
+            if self.progress and (force or now - last_report >= PROGRESS_INTERVAL):
+                last_report = now
+                elapsed = now - start
+                self.progress(UploadProgress(sent, total, sent / elapsed if elapsed else 0.0))
+
+        def parts():
+            yield self._head
+            with open(self.file_path, 'rb') as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield self._tail
+
+        for part in parts():
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                raise UploadCancelled()
+            yield part
+            sent += len(part)
+            report(force=sent == total)
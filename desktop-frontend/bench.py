@@ -0,0 +1,435 @@
+"""
+Benchmarks for the desktop client. Run from the desktop-frontend directory:
+
+    python bench.py redraw --sizes 1000 10000 100000
+    python bench.py prep --sizes 100000 1000000
+    python bench.py startup
+    python bench.py fanout --latency 150
+    python bench.py table --rows 1000000
+
+Nothing here needs a display or a running server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+TYPES = ['Pump', 'Valve', 'Compressor', 'HeatExchanger', 'Reactor', 'Condenser']
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Run in a fresh interpreter: the cold start of the app up to a visible
+# login window. The server URL points nowhere on purpose, startup must
+# not wait for it.
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import json
+import sys
+from PyQt5.QtWidgets import QApplication
+from gui.main import LoginWindow
+from api.api_client import APIClient
+imported = time.perf_counter()
+app = QApplication(sys.argv)
+login = LoginWindow(APIClient(base_url="http://127.0.0.1:9/api"))
+login.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1000, "shown_ms": (shown - start) * 1000}))
+"""
+
+
+def make_dataset(rows, seed=0):
+    """Synthetic (details, distribution) pair shaped like the API responses"""
+    rng = random.Random(seed)
+    types = TYPES[:rng.randint(3, len(TYPES))]
+    equipment = [
+        {
+            'id': i,
+            'name': f'E{i}',
+            'equipment_type': rng.choice(types),
+            'flowrate': round(rng.uniform(50, 300), 2),
+            'pressure': round(rng.uniform(2, 15), 2),
+            'temperature': round(rng.uniform(80, 160), 2),
+        }
+        for i in range(rows)
+    ]
+    counts = {}
+    for e in equipment:
+        counts[e['equipment_type']] = counts.get(e['equipment_type'], 0) + 1
+    details = {
+        'id': seed,
+        'filename': f'synthetic_{rows}_{seed}.csv',
+        'total_count': rows,
+        'equipment': equipment,
+    }
+    distribution = {
+        'distribution': [{'equipment_type': t, 'count': c} for t, c in counts.items()]
+    }
+    return details, distribution
+
+
+def bench_redraw(sizes, repeat):
+    """
+    Time switching between two datasets of each size: updating the
+    dashboard (update) and rendering it with Agg (render)
+    """
+    from gui.data_visualizer import DataVisualizer
+
+    print(f"{'rows':>10} {'update ms':>10} {'render ms':>10} {'total ms':>10}")
+    for rows in sizes:
+        figure = Figure(figsize=(8, 6), dpi=100)
+        canvas = FigureCanvasAgg(figure)
+        visualizer = DataVisualizer(figure)
+        datasets = [make_dataset(rows, seed) for seed in (1, 2)]
+
+        # First draw builds the layout, the timed runs are dataset switches
+        visualizer.create_dashboard(*datasets[0])
+        canvas.draw()
+
+        update, render = [], []
+        for i in range(repeat):
+            start = time.perf_counter()
+            visualizer.create_dashboard(*datasets[(i + 1) % 2])
+            middle = time.perf_counter()
+            canvas.draw()
+            end = time.perf_counter()
+            update.append((middle - start) * 1000)
+            render.append((end - middle) * 1000)
+
+        u, r = statistics.median(update), statistics.median(render)
+        print(f"{rows:>10} {u:>10.1f} {r:>10.1f} {u + r:>10.1f}")
+
+
+def bench_prep(sizes, repeat):
+    """
+    Time turning the equipment payload into columns (build) and the
+    per-type aggregation every chart needs (group)
+    """
+    from gui.columns import EquipmentColumns
+
+    print(f"{'rows':>10} {'build ms':>10} {'group ms':>10} {'total ms':>10}")
+    for rows in sizes:
+        equipment = make_dataset(rows)[0]['equipment']
+
+        build, group = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            columns = EquipmentColumns.from_records(equipment)
+            middle = time.perf_counter()
+            for values in (columns.flowrates, columns.pressures, columns.temperatures):
+                columns.type_means(values)
+            columns.split_by_type(columns.flowrates, columns.pressures)
+            end = time.perf_counter()
+            build.append((middle - start) * 1000)
+            group.append((end - middle) * 1000)
+
+        b, g = statistics.median(build), statistics.median(group)
+        print(f"{rows:>10} {b:>10.1f} {g:>10.1f} {b + g:>10.1f}")
+
+
+def bench_table(rows, page_size, frames):
+    """
+    Load rows into the equipment table page by page, then time painting
+    frames while scrolling through it, sorting each column and filtering
+    """
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtWidgets import QApplication
+    from gui.equipment_table import EquipmentTable, HEADERS, page_to_arrays
+
+    equipment = make_dataset(rows)[0]['equipment']
+    pages = []
+    for start in range(0, rows, page_size):
+        chunk = equipment[start:start + page_size]
+        pages.append({
+            'names': [e['name'] for e in chunk],
+            'types': [e['equipment_type'] for e in chunk],
+            'flowrates': [e['flowrate'] for e in chunk],
+            'pressures': [e['pressure'] for e in chunk],
+            'temperatures': [e['temperature'] for e in chunk],
+        })
+    del equipment
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    table = EquipmentTable(fetch_page=None)
+    table.resize(900, 700)
+    table.show()
+    app.processEvents()
+    model, view = table.model, table.view
+
+    convert = append = 0.0
+    for page in pages:
+        start = time.perf_counter()
+        arrays = page_to_arrays(page)
+        middle = time.perf_counter()
+        model.append(arrays)
+        append += time.perf_counter() - middle
+        convert += middle - start
+    print(f"load {rows} rows in {len(pages)} pages: convert {convert * 1000:.1f} ms "
+          f"(worker thread), append {append * 1000:.1f} ms (UI thread)")
+
+    def scroll_frames():
+        bar = view.verticalScrollBar()
+        times = []
+        for i in range(frames):
+            start = time.perf_counter()
+            bar.setValue(bar.maximum() * i // max(frames - 1, 1))
+            view.viewport().repaint()
+            times.append((time.perf_counter() - start) * 1000)
+        return statistics.median(times), max(times)
+
+    median, worst = scroll_frames()
+    print(f"scroll: {median:.2f} ms per frame (median), {worst:.2f} ms worst, over {frames} frames")
+
+    for column, name in enumerate(HEADERS):
+        start = time.perf_counter()
+        view.sortByColumn(column, Qt.AscendingOrder)
+        print(f"sort by {name}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    table.filter_input.setText('e1')
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"filter 'e1': {elapsed:.1f} ms, {model.rowCount()} rows match")
+    median, worst = scroll_frames()
+    print(f"scroll sorted and filtered: {median:.2f} ms per frame (median), {worst:.2f} ms worst")
+
+    # Pages arriving while a sort and filter are active
+    table.filter_input.clear()
+    model.clear()
+    view.sortByColumn(2, Qt.DescendingOrder)
+    times = []
+    for page in pages:
+        arrays = page_to_arrays(page)
+        start = time.perf_counter()
+        model.append(arrays)
+        times.append((time.perf_counter() - start) * 1000)
+    print(f"append into a sorted view: {statistics.median(times):.1f} ms per page (median), "
+          f"{max(times):.1f} ms worst")
+
+
+def import_profile(module):
+    """Cumulative import time of module and its direct imports (python -X importtime), in ms"""
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=HERE, capture_output=True, text=True, check=True
+    ).stderr
+
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(cumulative) / 1000))
+
+    # A module is listed after everything it imports, so its direct imports
+    # are the depth 1 rows between it and the previous top level row
+    end = max(i for i, (depth, name, _) in enumerate(rows) if depth == 0 and name == module)
+    times = {module: rows[end][2]}
+    for depth, name, ms in reversed(rows[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            times[name] = ms
+    return times
+
+
+def bench_startup(repeat, top):
+    """
+    Time a cold start up to the login window (wall time including the
+    interpreter, and time inside the process), then show which imports
+    of gui.main cost the most
+    """
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    wall, imported, shown = [], [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT],
+            cwd=HERE, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        wall.append((time.perf_counter() - start) * 1000)
+        result = json.loads(output.strip().splitlines()[-1])
+        imported.append(result['import_ms'])
+        shown.append(result['shown_ms'])
+
+    print(f"{'wall ms':>10} {'import ms':>10} {'shown ms':>10}")
+    print(f"{statistics.median(wall):>10.1f} {statistics.median(imported):>10.1f} "
+          f"{statistics.median(shown):>10.1f}")
+
+    times = import_profile('gui.main')
+    print(f"\nimport gui.main: {times.pop('gui.main', 0):.1f} ms, slowest direct imports:")
+    for name, ms in sorted(times.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {ms:>8.1f}  {name}")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers the dataset endpoints the dashboard uses with synthetic data
+    after a fixed delay, like a server on a slow link would
+    """
+    protocol_version = 'HTTP/1.1'
+    latency = 0.1
+    payloads = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = self.payloads.get(self.path.split('?')[0])
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_DELETE(self):
+        # /api/datasets/<id>/delete/ removes the dataset's payloads
+        time.sleep(self.latency)
+        path = self.path.split('?')[0]
+        prefix = path[:-len('delete/')] if path.endswith('/delete/') else None
+        deleted = [p for p in self.payloads if prefix and p.startswith(prefix)]
+        for p in deleted:
+            del self.payloads[p]
+        self.send_response(200 if deleted else 404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+def stand_in_server(dataset_ids, rows, latency):
+    """Start a StandInHandler server on a free local port, returns (server, base_url)"""
+    payloads = {}
+    for dataset_id in dataset_ids:
+        details, distribution = make_dataset(rows, dataset_id)
+        payloads[f'/api/datasets/{dataset_id}/'] = json.dumps(details).encode()
+        payloads[f'/api/datasets/{dataset_id}/type_distribution/'] = json.dumps(distribution).encode()
+    handler = type('Handler', (StandInHandler,), {'latency': latency, 'payloads': payloads})
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/api'
+
+
+def bench_fanout(latency_ms, rows, datasets, repeat):
+    """
+    Time loading datasets (details + type distribution) from a local
+    stand-in server, one request after another with APIClient, and
+    concurrently with AsyncAPIClient
+    """
+    from api.api_client import APIClient
+    from api.async_client import AsyncAPIClient
+
+    dataset_ids = list(range(1, datasets + 1))
+    server, base_url = stand_in_server(dataset_ids, rows, latency_ms / 1000)
+    client = APIClient(base_url=base_url)
+    async_client = AsyncAPIClient(client)
+
+    def sequential_one():
+        return client.get_dataset_details(1), client.get_type_distribution(1)
+
+    def sequential_all():
+        return [(client.get_dataset_details(i), client.get_type_distribution(i)) for i in dataset_ids]
+
+    cases = [
+        ('one dataset', sequential_one,
+         lambda: asyncio.run(async_client.get_dataset_bundle(1))),
+        (f'{datasets} datasets', sequential_all,
+         lambda: asyncio.run(async_client.get_dataset_bundles(dataset_ids))),
+    ]
+
+    print(f"server latency {latency_ms} ms per request, {rows} rows per dataset")
+    print(f"{'':>14} {'sequential ms':>14} {'concurrent ms':>14}")
+    try:
+        for name, sequential, concurrent in cases:
+            if sequential() != concurrent():
+                raise SystemExit(f"{name}: sequential and concurrent results differ")
+            timings = []
+            for run in (sequential, concurrent):
+                runs = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    run()
+                    runs.append((time.perf_counter() - start) * 1000)
+                timings.append(statistics.median(runs))
+            print(f"{name:>14} {timings[0]:>14.1f} {timings[1]:>14.1f}")
+    finally:
+        async_client.close()
+        client.close()
+        server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    redraw = commands.add_parser('redraw', help='Dataset switch and redraw time of the dashboard')
+    redraw.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 50000],
+                        help='Equipment rows per synthetic dataset')
+    redraw.add_argument('--repeat', type=int, default=5,
+                        help='Timed switches per size (the median is reported)')
+
+    prep = commands.add_parser('prep', help='Time to prepare equipment data for the charts')
+    prep.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                      help='Equipment rows per synthetic dataset')
+    prep.add_argument('--repeat', type=int, default=5,
+                      help='Timed runs per size (the median is reported)')
+
+    startup = commands.add_parser('startup', help='Cold start time up to the login window')
+    startup.add_argument('--repeat', type=int, default=5,
+                         help='Cold starts to time (the median is reported)')
+    startup.add_argument('--top', type=int, default=8,
+                         help='How many of the slowest imports to list')
+
+    fanout = commands.add_parser('fanout', help='Sequential vs concurrent requests against a stand-in server')
+    fanout.add_argument('--latency', type=int, default=100,
+                        help='Delay the stand-in server adds to every response, in ms')
+    fanout.add_argument('--rows', type=int, default=1000,
+                        help='Equipment rows per dataset')
+    fanout.add_argument('--datasets', type=int, default=5,
+                        help='Datasets to load in the bulk case')
+    fanout.add_argument('--repeat', type=int, default=5,
+                        help='Timed runs per case (the median is reported)')
+
+    table = commands.add_parser('table', help='Loading, scrolling, sorting and filtering the equipment table')
+    table.add_argument('--rows', type=int, default=1000000,
+                       help='Equipment rows to load')
+    table.add_argument('--page-size', type=int, default=20000,
+                       help='Rows per page, as fetched from the server')
+    table.add_argument('--frames', type=int, default=200,
+                       help='Scroll positions to paint')
+
+    args = parser.parse_args()
+    if args.command == 'redraw':
+        bench_redraw(args.sizes, args.repeat)
+    elif args.command == 'prep':
+        bench_prep(args.sizes, args.repeat)
+    elif args.command == 'startup':
+        bench_startup(args.repeat, args.top)
+    elif args.command == 'fanout':
+        bench_fanout(args.latency, args.rows, args.datasets, args.repeat)
+    elif args.command == 'table':
+        bench_table(args.rows, args.page_size, args.frames)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+from operator import itemgetter
+from typing import List, NamedTuple
+
+import numpy as np
+
+
+class EquipmentColumns(NamedTuple):
+    """
+    A dataset's equipment as typed NumPy columns, built once from the API
+    payload and shared by every chart.
+
+    Equipment types are stored as integer codes into type_names (in order of
+    first appearance), so grouping by type is a bincount instead of a Python
+    loop building dicts of lists.
+    """
+    flowrates: np.ndarray
+    pressures: np.ndarray
+    temperatures: np.ndarray
+    codes: np.ndarray
+    type_names: List[str]
+
+    @classmethod
+    def from_records(cls, equipment_data):
+        """equipment_data: list of equipment dicts as returned by the API"""
+        count = len(equipment_data)
+
+        def column(key):
+            try:
+                return np.fromiter(map(itemgetter(key), equipment_data), dtype=float, count=count)
+            except (KeyError, TypeError):
+                # Missing or null readings count as 0, as the charts always did
+                return np.fromiter((e.get(key) or 0 for e in equipment_data), dtype=float, count=count)
+
+        # Normalise each distinct raw type once, then map every row through a dict
+        raw_types = [e.get('equipment_type') for e in equipment_data]
+        index, raw_codes = {}, {}
+        for raw_type in dict.fromkeys(raw_types):
+            eq_type = str(raw_type).strip() if raw_type else "Unknown"
+            raw_codes[raw_type] = index.setdefault(eq_type, len(index))
+        codes = np.fromiter(map(raw_codes.__getitem__, raw_types), dtype=np.intp, count=count)
+
+        return cls(column('flowrate'), column('pressure'), column('temperature'), codes, list(index))
+
+    def type_counts(self):
+        return np.bincount(self.codes, minlength=len(self.type_names))
+
+    def type_means(self, values):
+        """Mean of values (one of the columns) per equipment type"""
+        counts = self.type_counts()
+        sums = np.bincount(self.codes, weights=values, minlength=len(self.type_names))
+        return sums / np.maximum(counts, 1)
+
+    def split_by_type(self, *values):
+        """
+        Rows of the given columns grouped by type, as a list with one tuple
+        of arrays per entry in type_names
+        """
+        order = np.argsort(self.codes, kind='stable')
+        bounds = np.cumsum(self.type_counts())[:-1]
+        parts = [np.split(v[order], bounds) for v in values]
+        return list(zip(*parts))
@@ -1,178 +1,359 @@
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib import cm, rcParams
+from matplotlib.colors import Normalize, to_rgb
 from matplotlib.figure import Figure
-
+from matplotlib.image import AxesImage
+from matplotlib.patches import Patch, Rectangle, Shadow, Wedge
+
+from .columns import EquipmentColumns
+
+SERIES = [("Flowrate", "#3498db"), ("Pressure", "#e74c3c"), ("Temperature", "#f39c12")]
+HISTOGRAM_BINS = 8
+
+# Past this many points the scatter plot is drawn as a density image per
+# type: one marker per point gets slow and turns into a solid blob anyway
+DENSITY_THRESHOLD = 20000
+# Size of a density bin on screen, in pixels
+DENSITY_BIN_PIXELS = 4
+
+
+class DensityImage(AxesImage):
+    """
+    Point density of several groups of points (one per equipment type).
+
+    Each group is binned separately; a bin's colour is the mix of the group
+    colours weighted by their counts, and its opacity grows with the total
+    count (log scale), so overlapping types stay visible.
+
+    Binning covers whatever part of the axes is in view, at a fixed size on
+    screen. So when the toolbar zooms or pans, the next draw re-bins the
+    visible range at a finer resolution.
+    """
+
+    def __init__(self, axis):
+        super(DensityImage, self).__init__(axis, origin='lower', interpolation='nearest')
+        self.groups = []
+        self.colors = np.empty((0, 3))
+        self._view = None
+        self._binned_for = None
+
+    def set_points(self, groups, colors):
+        """groups: list of (x, y) arrays, colors: one colour per group"""
+        self.groups = groups
+        self.colors = np.array([to_rgb(c) for c in colors])
+        self._binned_for = None
+
+    def get_extent(self):
+        # Always the range that was last binned, which is the visible range
+        return self._view
+
+    def draw(self, renderer):
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        bins = (max(1, int(self.axes.bbox.width / DENSITY_BIN_PIXELS)),
+                max(1, int(self.axes.bbox.height / DENSITY_BIN_PIXELS)))
+
+        if (x0, x1, y0, y1, bins) != self._binned_for:
+            # (types, rows, columns), rows are y for the image
+            counts = np.array([
+                np.histogram2d(x, y, bins=bins, range=((x0, x1), (y0, y1)))[0].T
+                for x, y in self.groups
+            ]).reshape(len(self.groups), bins[1], bins[0])
+            total = counts.sum(axis=0)
+
+            rgba = np.zeros(total.shape + (4,))
+            rgba[..., :3] = np.tensordot(counts, self.colors, axes=(0, 0)) / np.maximum(total, 1)[..., None]
+            rgba[..., 3] = 0.9 * np.log1p(total) / max(np.log1p(total.max()), 1e-9)
+            self.set_data(rgba)
+            self._view = (x0, x1, y0, y1)
+            self._binned_for = (x0, x1, y0, y1, bins)
+
+        super(DensityImage, self).draw(renderer)
 
 
 class DataVisualizer:
+    """
+    Draws the four chart dashboard for a dataset.
+
+    The axes and their artists are created once and then updated in place
+    when another dataset is shown (new offsets, bar heights, wedge angles),
+    so switching datasets doesn't rebuild the whole figure. Artists are kept
+    in pools that grow when a dataset has more equipment types than any
+    shown before; unused ones are hidden.
+    """
+
     def __init__(self, figure):
         self.figure = figure
+        self.axes = None
 
     def clear(self):
         self.figure.clear()
+        self.axes = None
 
-    def create_dashboard(self, dataset_details, distribution):
+    def _dashboard_ready(self):
+        # Anything else drawing on the figure (welcome message, other views)
+        # clears it, which takes our axes with it
+        return self.axes is not None and self.axes[0] in self.figure.axes
+
+    def _build_dashboard(self):
         self.clear()
         # Create gird
         grid_size = self.figure.add_gridspec(2, 2, hspace=0.3, wspace=0.3)
+        self.axes = [
+            self.figure.add_subplot(grid_size[0, 0]),
+            self.figure.add_subplot(grid_size[0, 1]),
+            self.figure.add_subplot(grid_size[1, 0]),
+            self.figure.add_subplot(grid_size[1, 1]),
+        ]
+        pie_axis, bar_axis, scatter_axis, hist_axis = self.axes
+
+        self.title = self.figure.suptitle("", fontsize=14, fontweight='bold')
+        self.empty_text = self.figure.text(0.5, 0.5, 'No equipment data to show',
+                                           ha='center', va='center', fontsize=14)
+        self.messages = {
+            axis: axis.text(0.5, 0.5, '', ha='center', va='center', transform=axis.transAxes)
+            for axis in self.axes
+        }
+
+        pie_axis.set_title('Equipment Type Distribution', fontweight='bold', fontsize=11)
+        pie_axis.set(frame_on=False, xticks=[], yticks=[], xlim=(-1.25, 1.25), ylim=(-1.25, 1.25))
+        pie_axis.set_aspect('equal')
+        self.wedges = []
+
+        bar_axis.set_xlabel('Equipment Type', fontweight='bold')
+        bar_axis.set_ylabel('Average Value', fontweight='bold')
+        bar_axis.set_title('Average Parameters by Type', fontweight='bold', fontsize=11)
+        bar_axis.legend(handles=[Patch(color=color, label=name) for name, color in SERIES], fontsize=8)
+        bar_axis.grid(axis='y', alpha=0.3)
+        self.bars = {name: [] for name, _ in SERIES}
+
+        scatter_axis.set_xlabel('Flowrate', fontweight='bold')
+        scatter_axis.set_ylabel('Pressure', fontweight='bold')
+        scatter_axis.set_title('Flowrate vs. Pressure by type', fontweight='bold', fontsize=11)
+        scatter_axis.grid(axis='y', alpha=0.3)
+        self.scatters = []
+        self.density = scatter_axis.add_image(DensityImage(scatter_axis))
+
+        hist_axis.set_xlabel('Temperature', fontweight='bold')
+        hist_axis.set_ylabel('Frequency', fontweight='bold')
+        hist_axis.set_title('Temperature Distribution', fontweight='bold', fontsize=11)
+        hist_axis.grid(axis='y', alpha=0.3)
+        self.hist_patches = []
+        for _ in range(HISTOGRAM_BINS):
+            patch = Rectangle((0, 0), 0, 0, alpha=0.7, edgecolor='black')
+            patch.sticky_edges.y.append(0)
+            hist_axis.add_patch(patch)
+            self.hist_patches.append(patch)
+        self.avg_line = hist_axis.axvline(0, color='red', linestyle='--', linewidth=2)
+
+    def _set_message(self, axis, text=None):
+        """Show text in place of the chart on axis, or the chart again if text is None"""
+        message = self.messages[axis]
+        message.set_text(text or '')
+        message.set_visible(text is not None)
+        for artist in axis.get_children():
+            if artist.axes is axis and artist is not message and artist is not axis.patch:
+                artist.set_visible(text is None)
+        if text is None and axis is self.axes[0]:
+            # The pie has no frame or ticks even when it is shown
+            axis.xaxis.set_visible(False)
+            axis.yaxis.set_visible(False)
+            for spine in axis.spines.values():
+                spine.set_visible(False)
+
+    @staticmethod
+    def _pool(artists, count, create):
+        """Grow artists to at least count with create(), hide the ones past count"""
+        while len(artists) < count:
+            artists.append(create())
+        for i, artist in enumerate(artists):
+            if isinstance(artist, tuple):
+                for a in artist:
+                    a.set_visible(i < count)
+            else:
+                artist.set_visible(i < count)
+        return artists[:count]
+
+    @staticmethod
+    def _autoscale(axis, points=None):
+        """
+        Rescale to the visible data, undoing any zoom left over from the
+        previous dataset. points: arrays of (x, y) to fit instead of the
+        axis' artists (relim() doesn't look at collections)
+        """
+        if points is None:
+            axis.relim(visible_only=True)
+        else:
+            axis.ignore_existing_data_limits = True
+            for p in points:
+                axis.update_datalim(p)
+        axis.set_autoscale_on(True)
+        axis.autoscale_view()
+
+    def create_dashboard(self, dataset_details, distribution, columns=None):
+        """
+        columns: EquipmentColumns for dataset_details, if already prepared
+            (e.g. on a worker thread); built here otherwise
+        """
+        if not self._dashboard_ready():
+            self._build_dashboard()
         equipment_data = dataset_details.get('equipment', [])
 
         # if equipment data is not there
+        self.empty_text.set_visible(not equipment_data)
+        self.title.set_visible(bool(equipment_data))
+        for axis in self.axes:
+            axis.set_visible(bool(equipment_data))
         if not equipment_data:
-            axis = self.figure.add_subplot(111)
-            axis.text(0.5, 0.5, 'No equipment data to show', ha='center', va='center', fontsize=14)
-            axis.axis('off')
             return
 
-        axis1 = self.figure.add_subplot(grid_size[0, 0])
-        self.plot_type_distribution(axis1, distribution)
-
-        axis2 = self.figure.add_subplot(grid_size[0, 1])
-        self.plot_avg_by_type(axis2, equipment_data)
+        if columns is None:
+            columns = EquipmentColumns.from_records(equipment_data)
 
-        axis3 = self.figure.add_subplot(grid_size[1, 0])
-        self.plot_flowrate_vs_pressure(axis3, equipment_data)
-
-        axis4 = self.figure.add_subplot(grid_size[1, 1])
-        self.plot_temperature_distribution(axis4, equipment_data)
+        self.plot_type_distribution(distribution)
+        self.plot_avg_by_type(columns)
+        self.plot_flowrate_vs_pressure(columns)
+        self.plot_temperature_distribution(columns)
 
         filename = dataset_details.get('filename', 'Dataset')
-        self.figure.suptitle(f"Equipment Analysis Dashboard - {filename}", fontsize=14, fontweight='bold')
+        self.title.set_text(f"Equipment Analysis Dashboard - {filename}")
 
-    def plot_type_distribution(self, axis, distribution):
+    def plot_type_distribution(self, distribution):
+        axis = self.axes[0]
         if not distribution or 'distribution' not in distribution:
-            axis.text(0.5, 0.5, 'No distribution to show', ha='center', va='center')
-            axis.axis('off')
+            self._set_message(axis, 'No distribution to show')
             return
+        self._set_message(axis)
 
         dist = distribution['distribution']
         types = [d['equipment_type'] for d in dist]
-        counts = [d['count'] for d in dist]
-
-        # cm = colormap
-        colors = plt.cm.Set3(range(len(types)))
-        wedges, texts, autotexts = axis.pie(counts, labels=types, colors=colors, autopct='%1.1f%%',
-                                            startangle=90, shadow=True)
-
-        for autotext in autotexts:
-            autotext.set_color('white')
-            autotext.set_fontweight('bold')
-            autotext.set_fontsize(9)
-
-        axis.set_title('Equipment Type Distribution', fontweight='bold', fontsize=11)
-
-    def plot_avg_by_type(self, axis, equipment_data):
-        type_stats = {}
-
-        for equipment in equipment_data:
-            raw_type = equipment.get('equipment_type')
-            eq_type = str(raw_type).strip() if raw_type else "Unknown"
-
-            if eq_type not in type_stats:
-                type_stats[eq_type] = {
-                    'flowrates': [],
-                    'pressures': [],
-                    'temperatures': []
-                }
-
-            type_stats[eq_type]['flowrates'].append(equipment.get('flowrate', 0) or 0)
-            type_stats[eq_type]['pressures'].append(equipment.get('pressure', 0) or 0)
-            type_stats[eq_type]['temperatures'].append(equipment.get('temperature', 0) or 0)
-
-        types = [str(t).strip() if t else "Unknown" for t in type_stats.keys()]
-
-        avg_flowrates = [np.mean(type_stats[t]['flowrates']) for t in types]
-        avg_pressures = [np.mean(type_stats[t]['pressures']) for t in types]
-        avg_temperatures = [np.mean(type_stats[t]['temperatures']) for t in types]
+        counts = np.array([d['count'] for d in dist], dtype=float)
+
+        def create_wedge():
+            # cm = colormap, colour follows the wedge's position like axis.pie
+            color = cm.Set3(len(self.wedges))
+            wedge = Wedge((0, 0), 1, 0, 0, facecolor=color)
+            shadow = Shadow(wedge, -0.02, -0.02, label='_nolegend_')
+            axis.add_patch(shadow)
+            axis.add_patch(wedge)
+            label = axis.text(0, 0, '', va='center', size=rcParams['xtick.labelsize'])
+            pct = axis.text(0, 0, '', ha='center', va='center', color='white',
+                            fontweight='bold', fontsize=9)
+            return wedge, shadow, label, pct
+
+        # Same geometry axis.pie uses: counter-clockwise from startangle=90,
+        # labels at 1.1 and percentages at 0.6 of the radius
+        fractions = counts / counts.sum() if counts.sum() else counts
+        theta = 90 + 360 * np.concatenate([[0], np.cumsum(fractions)])
+        for i, (wedge, _, label, pct) in enumerate(self._pool(self.wedges, len(types), create_wedge)):
+            wedge.set_theta1(theta[i])
+            wedge.set_theta2(theta[i + 1])
+            middle = np.deg2rad((theta[i] + theta[i + 1]) / 2)
+            x, y = np.cos(middle), np.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            label.set_text(types[i])
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f"{fractions[i] * 100:1.1f}%")
+
+    def plot_avg_by_type(self, columns):
+        axis = self.axes[1]
+        types = columns.type_names
+
+        averages = {
+            'Flowrate': columns.type_means(columns.flowrates),
+            'Pressure': columns.type_means(columns.pressures),
+            'Temperature': columns.type_means(columns.temperatures),
+        }
 
         x = np.arange(len(types))
         width = 0.3
 
-        axis.bar(x - width, avg_flowrates, width, label="Flowrate", color="#3498db")
-        axis.bar(x, avg_pressures, width, label="Pressure", color="#e74c3c")
-        axis.bar(x + width, avg_temperatures, width, label="Temperature", color="#f39c12")
+        for offset, (name, color) in zip((-width, 0, width), SERIES):
+            def create_bar():
+                bar = Rectangle((0, 0), width, 0, facecolor=color)
+                bar.sticky_edges.y.append(0)
+                axis.add_patch(bar)
+                return bar
 
-        axis.set_xlabel('Equipment Type', fontweight='bold')
-        axis.set_ylabel('Average Value', fontweight='bold')
-        axis.set_title('Average Parameters by Type', fontweight='bold', fontsize=11)
+            for bar, left, height in zip(self._pool(self.bars[name], len(types), create_bar),
+                                         x + offset - width / 2, averages[name]):
+                bar.set_x(left)
+                bar.set_height(height)
 
         axis.set_xticks(x)
         axis.set_xticklabels(types, rotation=45, ha='right', fontsize=9)
-
-        axis.legend(fontsize=8)
-        axis.grid(axis='y', alpha=0.3)
-
-    def plot_flowrate_vs_pressure(self, axis, equipment_data):
-        type_data = {}
-
-        for equipment in equipment_data:
-            eq_type = equipment.get('equipment_type', 'Unknown')
-            if eq_type not in type_data:
-                type_data[eq_type] = {
-                    'flowrates': [],
-                    'pressures': [],
-                }
-            type_data[eq_type]['flowrates'].append(equipment.get('flowrate', 0))
-            type_data[eq_type]['pressures'].append(equipment.get('pressure', 0))
-
-        colors = plt.cm.Set2(range(len(type_data)))
-
-        for x, (eq_type, data) in enumerate(type_data.items()):
-            axis.scatter(data['flowrates'], data['pressures'],
-                         label=eq_type, color=colors[x],
-                         s=100, alpha=0.6, edgecolors='black', linewidths=0.5)
-
-        axis.set_xlabel('Flowrate', fontweight='bold')
-        axis.set_ylabel('Pressure', fontweight='bold')
-        axis.set_title('Flowrate vs. Pressure by type', fontweight='bold', fontsize=11)
-        axis.legend(fontsize=8, loc='best')
-        axis.grid(axis='y', alpha=0.3)
-        axis.set_xscale('linear')
-        axis.set_yscale('linear')
-
-    def plot_temperature_distribution(self, axis, equipment_data):
-
-        temperatures = [equipment.get('temperature', 0) for equipment in equipment_data]
+        self._autoscale(axis)
+
+    def plot_flowrate_vs_pressure(self, columns):
+        axis = self.axes[2]
+        groups = columns.split_by_type(columns.flowrates, columns.pressures)
+
+        def create_scatter():
+            return axis.scatter([], [], s=100, alpha=0.6, edgecolors='black', linewidths=0.5)
+
+        colors = cm.Set2(range(len(groups)))
+        dense = len(columns.codes) > DENSITY_THRESHOLD
+        scatters = self._pool(self.scatters, 0 if dense else len(groups), create_scatter)
+        self.density.set_visible(dense)
+        offsets = []
+
+        if dense:
+            self.density.set_points(groups, colors)
+        for x, (eq_type, (flowrates, pressures)) in enumerate(zip(columns.type_names, groups)):
+            if dense:
+                # Only the corners matter for the axis limits
+                offsets.append([[flowrates.min(), pressures.min()], [flowrates.max(), pressures.max()]])
+            else:
+                points = np.column_stack([flowrates, pressures])
+                scatters[x].set_offsets(points)
+                scatters[x].set_facecolor(colors[x])
+                scatters[x].set_label(eq_type)
+                offsets.append(points)
+
+        self._autoscale(axis, offsets)
+        if dense:
+            handles = [Patch(color=colors[x], label=t) for x, t in enumerate(columns.type_names)]
+        else:
+            handles = scatters
+        axis.legend(handles=handles, fontsize=8, loc='best')
+
+    def plot_temperature_distribution(self, columns):
+        axis = self.axes[3]
+
+        temperatures = columns.temperatures
         # Reject if no variance in temps
-        if not temperatures or len(set(temperatures)) <= 1:
-            axis.text(0.5, 0.5, "Not enough temperature variation",
-                      ha="center", va="center")
-            axis.axis("off")
+        if not len(temperatures) or temperatures.min() == temperatures.max():
+            self._set_message(axis, "Not enough temperature variation")
             return
+        self._set_message(axis)
 
     #    histogram
-        n, bins, patches = axis.hist(temperatures, bins=8, color='#2ecc71',
-                                     alpha=0.7, edgecolor='black')
+        n, bins = np.histogram(temperatures, bins=HISTOGRAM_BINS)
 
-        cm = plt.cm.RdYlGn_r
+        cmap = cm.RdYlGn_r
 
         # Used to prevent infinity error
-        min_t = min(temperatures)
-        max_t = max(temperatures)
+        min_t = temperatures.min()
+        max_t = temperatures.max()
 
         if min_t == max_t:
             max_t += 1
-        norm = plt.Normalize(vmin=min_t, vmax=max_t)
+        norm = Normalize(vmin=min_t, vmax=max_t)
 
-        for i, patch in enumerate(patches):
-            patch.set_facecolor(cm(norm(bins[i])))
-
-        axis.set_xlabel('Temperature', fontweight='bold')
-        axis.set_ylabel('Frequency', fontweight='bold')
-        axis.set_title('Temperature Distribution', fontweight='bold', fontsize=11)
-        axis.grid(axis='y', alpha=0.3)
+        for i, patch in enumerate(self.hist_patches):
+            patch.set_x(bins[i])
+            patch.set_width(bins[i + 1] - bins[i])
+            patch.set_height(n[i])
+            patch.set_facecolor(cmap(norm(bins[i])))
 
     #     avg line
-        if len(temperatures) == 0:
-            return
-
-        avg_temp = np.mean(temperatures)
+        avg_temp = temperatures.mean()
 
-        axis.axvline(avg_temp, color='red', linestyle='--', linewidth=2,
-                     label=f'Average: {avg_temp:.1f}')
-        axis.legend(fontsize=8)
-        axis.set_xscale('linear')
-        axis.set_yscale('linear')
+        self.avg_line.set_xdata([avg_temp, avg_temp])
+        self.avg_line.set_label(f'Average: {avg_temp:.1f}')
+        self._autoscale(axis)
+        axis.legend(handles=[self.avg_line], fontsize=8)
 
     def create_detailed_view(self, dataset_details):
         self.clear()
@@ -0,0 +1,334 @@
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import QAbstractItemView, QHeaderView, QLabel, QLineEdit, QTableView, QVBoxLayout, QWidget
+
+from .workers import TaskRunner
+
+# Rows asked for per request while a dataset's table loads
+PAGE_SIZE = 20000
+
+HEADERS = ['Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+NAME, TYPE, FLOWRATE, PRESSURE, TEMPERATURE = range(len(HEADERS))
+
+
+def page_to_arrays(page):
+    """
+    Turn one page from the equipment endpoint into arrays (done on the worker
+    thread, so the UI thread only copies them into place)
+    Returns: (names, types, flowrates, pressures, temperatures)
+    """
+    def numbers(key):
+        return np.array([v if v is not None else 0 for v in page[key]], dtype=float)
+
+    names = np.array([str(n) for n in page['names']], dtype=str)
+    types = [str(t).strip() if t else "Unknown" for t in page['types']]
+    return names, types, numbers('flowrates'), numbers('pressures'), numbers('temperatures')
+
+
+def _grow(array, size, dtype=None):
+    """array with room for at least size rows, doubling so appends stay cheap"""
+    dtype = np.result_type(array.dtype, dtype) if dtype is not None else array.dtype
+    if len(array) >= size and dtype == array.dtype:
+        return array
+    grown = np.empty(max(size, 2 * len(array)), dtype=dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class EquipmentTableModel(QAbstractTableModel):
+    """
+    Equipment rows held as NumPy columns, for a QTableView.
+
+    The view only asks for the cells it paints, so a million rows cost five
+    arrays and no per-cell objects. Sorting and filtering never move the
+    data: both just produce an index array (_view) of the rows to show, in
+    order. Equipment types are integer codes, like EquipmentColumns.
+    """
+
+    def __init__(self, parent=None):
+        super(EquipmentTableModel, self).__init__(parent)
+        self.clear()
+
+    def clear(self):
+        self.beginResetModel()
+        self._size = 0
+        self._names = np.empty(0, dtype=str)
+        self._codes = np.empty(0, dtype=np.intp)
+        self._numbers = [np.empty(0) for _ in range(3)]
+        self.type_names = []
+        self._type_index = {}
+        self._filter = ''
+        self._sort = None
+        self._view = None
+        self.endResetModel()
+
+    @property
+    def loaded_rows(self):
+        return self._size
+
+    # ========== Qt model interface ==========
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._size if self._view is None else len(self._view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.TextAlignmentRole:
+            if column >= FLOWRATE:
+                return int(Qt.AlignRight | Qt.AlignVCenter)
+            return None
+        if role != Qt.DisplayRole:
+            return None
+
+        row = index.row() if self._view is None else self._view[index.row()]
+        if column == NAME:
+            return str(self._names[row])
+        if column == TYPE:
+            return self.type_names[self._codes[row]]
+        return f"{self._numbers[column - FLOWRATE][row]:.2f}"
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Column -1 is the header's "no sort indicator": back to upload order
+        self._sort = (column, order) if column >= 0 else None
+        self._update_view()
+
+    # ========== Loading ==========
+
+    def append(self, arrays):
+        """Add one page of rows, as returned by page_to_arrays"""
+        names, types, *numbers = arrays
+        count = len(names)
+        if not count:
+            return
+        start, end = self._size, self._size + count
+
+        codes = np.fromiter(
+            (self._type_index.setdefault(t, len(self._type_index)) for t in types),
+            dtype=np.intp, count=count
+        )
+        self.type_names = list(self._type_index)
+
+        self._names = _grow(self._names, end, names.dtype)
+        self._codes = _grow(self._codes, end)
+        self._numbers = [_grow(column, end) for column in self._numbers]
+        self._names[start:end] = names
+        self._codes[start:end] = codes
+        for column, values in zip(self._numbers, numbers):
+            column[start:end] = values
+
+        if self._view is None:
+            self.beginInsertRows(QModelIndex(), start, end - 1)
+            self._size = end
+            self.endInsertRows()
+        else:
+            # Merge the new rows into the sorted/filtered view rather than
+            # sorting everything again for every page that arrives
+            self._size = end
+            self._set_view(self._merged(self._view, start))
+
+    # ========== Sorting and filtering ==========
+
+    def set_filter(self, text):
+        """Show only rows whose name or type contains text (case-insensitive)"""
+        self._filter = text.strip().lower()
+        self._update_view()
+
+    def _filtered(self, start=0):
+        """Indices of the rows from start on matching the filter, or None for all rows"""
+        if not self._filter:
+            return None
+        names = np.char.lower(self._names[start:self._size])
+        matches = np.char.find(names, self._filter) >= 0
+        types = [i for i, name in enumerate(self.type_names) if self._filter in name.lower()]
+        if types:
+            matches |= np.isin(self._codes[start:self._size], types)
+        return np.flatnonzero(matches) + start
+
+    def _sort_keys(self, column):
+        if column == NAME:
+            return self._names[:self._size]
+        if column == TYPE:
+            # Rank of each type name, so sorting by type is an integer sort
+            ranks = np.empty(len(self.type_names), dtype=np.intp)
+            ranks[np.argsort(np.array(self.type_names, dtype=str), kind='stable')] = np.arange(len(ranks))
+            return ranks[self._codes[:self._size]]
+        return self._numbers[column - FLOWRATE][:self._size]
+
+    def _update_view(self):
+        rows = self._filtered()
+        if self._sort is not None:
+            column, order = self._sort
+            keys = self._sort_keys(column)
+            if rows is not None:
+                keys = keys[rows]
+            order_index = np.argsort(keys, kind='stable')
+            if order == Qt.DescendingOrder:
+                order_index = order_index[::-1]
+            rows = order_index if rows is None else rows[order_index]
+        self._set_view(rows)
+
+    def _merged(self, view, start):
+        """view with the rows from start on added, filtered and in sort order"""
+        rows = self._filtered(start)
+        if rows is None:
+            rows = np.arange(start, self._size)
+        if self._sort is None:
+            return np.concatenate([view, rows])
+
+        column, order = self._sort
+        keys = self._sort_keys(column)
+        rows = rows[np.argsort(keys[rows], kind='stable')]
+        # Merge in ascending order; a descending view is an ascending one reversed
+        descending = order == Qt.DescendingOrder
+        if descending:
+            view = view[::-1]
+        positions = np.searchsorted(keys[view], keys[rows], side='right')
+        merged = np.insert(view, positions, rows)
+        return merged[::-1] if descending else merged
+
+    def _set_view(self, rows):
+        self.layoutAboutToBeChanged.emit()
+        old_view = self._view
+        self._view = rows
+        self._remap_persistent(old_view)
+        self.layoutChanged.emit()
+
+    def _remap_persistent(self, old_view):
+        """Keep the selection and current cell on the same rows after a re-sort"""
+        persistent = self.persistentIndexList()
+        if not persistent:
+            return
+        new_rows = np.full(self._size, -1, dtype=np.intp)
+        if self._view is None:
+            new_rows[:] = np.arange(self._size)
+        else:
+            new_rows[self._view] = np.arange(len(self._view))
+
+        moved = []
+        for index in persistent:
+            row = index.row() if old_view is None else old_view[index.row()]
+            new_row = new_rows[row] if row < self._size else -1
+            moved.append(self.index(int(new_row), index.column()) if new_row >= 0 else QModelIndex())
+        self.changePersistentIndexList(persistent, moved)
+
+
+class EquipmentTable(QWidget):
+    """
+    Filter box and equipment table for one dataset at a time.
+
+    load() fetches the dataset page by page on a worker thread; rows show up
+    as each page arrives, and loading another dataset cancels the last one.
+    fetch_page(dataset_id, cursor, limit) is the API call (it returns a page
+    dict or None).
+    """
+    def __init__(self, fetch_page, parent=None):
+        super(EquipmentTable, self).__init__(parent)
+        self.fetch_page = fetch_page
+        self.dataset_id = None
+        self.total_rows = 0
+        self.loading = False
+        self.tasks = TaskRunner(self, max_threads=1)
+
+        self.filter_input = QLineEdit(self)
+        self.filter_input.setPlaceholderText("Filter by name or type...")
+        self.filter_input.setClearButtonEnabled(True)
+        self.filter_input.textChanged.connect(self.on_filter_changed)
+
+        self.model = EquipmentTableModel(self)
+        self.view = QTableView(self)
+        self.view.setModel(self.model)
+        # Unsorted (upload order) until a header is clicked
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.view.setSortingEnabled(True)
+        self.view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.view.setAlternatingRowColors(True)
+        self.view.setWordWrap(False)
+        # Fixed row heights and stretched columns, so Qt never measures rows
+        self.view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.view.verticalHeader().hide()
+        self.view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+
+        self.status = QLabel(self)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.filter_input)
+        layout.addWidget(self.view)
+        layout.addWidget(self.status)
+        self.setLayout(layout)
+
+    def load(self, dataset_id, total_rows=0):
+        """Show dataset_id, fetching its rows unless it is already loaded"""
+        if dataset_id == self.dataset_id:
+            return
+        self.clear()
+        self.dataset_id = dataset_id
+        self.total_rows = total_rows
+        self._fetch_next(None)
+
+    def clear(self):
+        self.tasks.cancel('page')
+        self.loading = False
+        self.dataset_id = None
+        self.total_rows = 0
+        self.model.clear()
+        self.view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model.set_filter(self.filter_input.text())
+        self.update_status()
+
+    def _fetch_next(self, cursor):
+        dataset_id = self.dataset_id
+        self.loading = True
+        self.tasks.run(
+            'page', self._fetch_arrays, dataset_id, cursor,
+            on_result=lambda result: self.on_page(dataset_id, result),
+            on_error=lambda message: self.on_page_error(dataset_id, message)
+        )
+
+    def _fetch_arrays(self, dataset_id, cursor):
+        page = self.fetch_page(dataset_id, cursor, PAGE_SIZE)
+        if page is None:
+            raise RuntimeError("Could not load equipment rows.")
+        return page_to_arrays(page), page.get('next_cursor')
+
+    def on_page(self, dataset_id, result):
+        if dataset_id != self.dataset_id:
+            return
+        arrays, next_cursor = result
+        self.model.append(arrays)
+        if next_cursor is not None:
+            self._fetch_next(next_cursor)
+        else:
+            self.loading = False
+        self.update_status()
+
+    def on_page_error(self, dataset_id, message):
+        if dataset_id != self.dataset_id:
+            return
+        self.loading = False
+        self.status.setText(f"{message} Showing the {self.model.loaded_rows:,} rows loaded so far.")
+
+    def on_filter_changed(self, text):
+        self.model.set_filter(text)
+        self.update_status()
+
+    def update_status(self):
+        if self.dataset_id is None:
+            self.status.clear()
+            return
+        loaded = self.model.loaded_rows
+        text = f"{self.model.rowCount():,} of {loaded:,} rows"
+        if self.loading:
+            text += f" (loading, {loaded:,} of {self.total_rows:,})"
+        self.status.setText(text)
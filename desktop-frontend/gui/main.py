@@ -1,13 +1,21 @@
+import functools
+import os
 import sys
 
 from PyQt5.QtCore import Qt
-from PyQt5.QtWidgets import QApplication, QDialog, QMainWindow, QMessageBox, QVBoxLayout, QListWidgetItem, QFileDialog
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtWidgets import QApplication, QDialog, QMainWindow, QMessageBox, QVBoxLayout, QListWidgetItem, QFileDialog, QProgressBar, QPushButton, QTabWidget, QTreeWidget, QTreeWidgetItem
 from .login import Ui_LoginDialog
 from .signup import Ui_SignupDialog
 from .dashboard import Ui_MainWindow
-from .data_visualizer import DataVisualizer
-from .matplotlib_widget import MatplotlibWidget
+from .prefetch import Prefetcher
+from .uploads import UploadBatch
+from .workers import TaskRunner
 from api.api_client import APIClient
+from api.cache import DatasetCache
+
+# Seconds to wait for the server at startup before warning that it's down
+HEALTH_CHECK_TIMEOUT = 2
 
 
 class LoginWindow(QDialog, Ui_LoginDialog):
@@ -102,12 +110,52 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
         self.setMinimumSize(900, 600)
         self.username = username
         self.api_client = api_client
+        # Same session and token, for requests that can go out together.
+        # Imported here: asyncio is not needed to show the login window
+        from api.async_client import AsyncAPIClient
+        self.async_api = AsyncAPIClient(api_client)
         self.current_dataset_id = None
+        # Row counts from the dataset list, for the equipment table's progress
+        self.dataset_sizes = {}
+
+        # Every API call runs on a worker thread so the window never freezes
+        self.tasks = TaskRunner(self)
+        self.setup_busy_indicator()
+        # Several files can upload at once, on their own threads so a batch
+        # doesn't hold up clicks on datasets
+        self.uploads = UploadBatch(
+            functools.partial(self.api_client.upload_dataset, columnar=True), self
+        )
+        self.uploads.progress.connect(self.on_upload_progress)
+        self.uploads.file_finished.connect(self.on_upload_file_finished)
+        self.uploads.finished.connect(self.on_upload_finished)
+        self.upload_progress = {}
+        self.setup_upload_progress()
+
+        # Datasets in the list are loaded ahead of clicks while nothing in
+        # the foreground is running
+        self.prefetcher = Prefetcher(self.fetch_dataset, self)
+        self.prefetcher.fetched.connect(self.on_prefetched)
+        self.prefetcher.failed.connect(self.on_prefetch_failed)
+        self.tasks.busy_changed.connect(self.prefetcher.set_paused)
+        self.awaiting_prefetch = None
+
+        # matplotlib and NumPy are only imported once the dashboard opens, so
+        # they don't hold up the login window
+        from .data_visualizer import DataVisualizer
+        from .offscreen import PixmapCache
 
         # Setup matplotlib widget first
         self.setup_matplotlib_widget()
         self.visualizer = DataVisualizer(self.mpl_widget.get_figure())
 
+        # Dashboards are rendered off-screen into images, kept per dataset
+        # and size; the live canvas is only drawn for zooming and panning
+        self.pixmaps = PixmapCache()
+        self.shown = None
+        self.mpl_widget.interactive_needed.connect(self.draw_interactive)
+        self.mpl_widget.resized.connect(self.on_figure_resized)
+
         # Update welcome label (widget name is 'label' in your dashboard.py)
         self.label.setText(f"Welcome, {self.username}")
 
@@ -123,9 +171,59 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
         self.load_datasets()
         self.show_welcome_message()
 
+    def setup_busy_indicator(self):
+        """Indeterminate progress bar in the status bar while any request is running"""
+        self.busy_bar = QProgressBar(self)
+        self.busy_bar.setRange(0, 0)
+        self.busy_bar.setMaximumWidth(150)
+        self.busy_bar.setTextVisible(False)
+        self.busy_bar.hide()
+        self.statusbar.addPermanentWidget(self.busy_bar)
+        self.tasks.busy_changed.connect(self.on_busy_changed)
+
+    def setup_upload_progress(self):
+        """
+        Overall upload progress bar and cancel button in the status bar, and
+        one progress bar per file under the dataset list, shown during uploads
+        """
+        self.upload_bar = QProgressBar(self)
+        self.upload_bar.setRange(0, 100)
+        self.upload_bar.setMaximumWidth(200)
+        self.upload_bar.hide()
+        self.cancel_upload_btn = QPushButton("Cancel", self)
+        self.cancel_upload_btn.clicked.connect(self.handle_cancel_upload)
+        self.cancel_upload_btn.hide()
+        self.statusbar.addPermanentWidget(self.upload_bar)
+        self.statusbar.addPermanentWidget(self.cancel_upload_btn)
+
+        self.upload_list = QTreeWidget(self)
+        self.upload_list.setHeaderLabels(["File", "Progress"])
+        self.upload_list.setRootIsDecorated(False)
+        self.upload_list.setMaximumHeight(160)
+        self.upload_list.hide()
+        self.upload_items = {}
+        self.verticalLayout_2.addWidget(self.upload_list)
+
+    def on_busy_changed(self, busy):
+        # The upload bar already shows there's work going on
+        self.busy_bar.setVisible(busy and self.upload_bar.isHidden())
+        if busy:
+            QApplication.setOverrideCursor(Qt.BusyCursor)
+        else:
+            QApplication.restoreOverrideCursor()
+            self.statusbar.clearMessage()
+
     def setup_matplotlib_widget(self):
-        """Setup matplotlib widget in the right panel"""
+        """Setup matplotlib widget and equipment table as tabs in the right panel"""
+        from .equipment_table import EquipmentTable
+        from .matplotlib_widget import MatplotlibWidget
         self.mpl_widget = MatplotlibWidget(self)
+        self.equipment_table = EquipmentTable(self.api_client.get_equipment_page, self)
+
+        self.view_tabs = QTabWidget(self)
+        self.view_tabs.addTab(self.mpl_widget, "Charts")
+        self.view_tabs.addTab(self.equipment_table, "Table")
+        self.view_tabs.currentChanged.connect(self.load_equipment_table)
 
         try:
             # Get the placeholder widget
@@ -139,13 +237,13 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
                 parent_layout = parent.layout()
 
                 if parent_layout:
-                    # Replace placeholder with matplotlib widget
-                    parent_layout.replaceWidget(placeholder, self.mpl_widget)
+                    # Replace placeholder with the tabs
+                    parent_layout.replaceWidget(placeholder, self.view_tabs)
                     placeholder.deleteLater()
                 else:
                     # Create new layout if none exists
                     layout = QVBoxLayout(parent)
-                    layout.addWidget(self.mpl_widget)
+                    layout.addWidget(self.view_tabs)
             else:
                 QMessageBox.warning(
                     self,
@@ -163,6 +261,9 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
 
     def show_welcome_message(self):
         """Show welcome message on the plot area"""
+        self.shown = None
+        self.tasks.cancel('render')
+        self.equipment_table.clear()
         self.mpl_widget.clear()
         fig = self.mpl_widget.get_figure()
         ax = fig.add_subplot(111)
@@ -194,16 +295,28 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
 
         self.mpl_widget.draw()
 
-    def load_datasets(self):
-        """Load and display all datasets"""
+    def load_datasets(self, select_id=None):
+        """Load and display all datasets, optionally selecting one afterwards"""
+        self.statusbar.showMessage("Loading datasets...")
+        self.tasks.run(
+            'datasets', self.api_client.get_datasets,
+            on_result=lambda datasets: self.show_datasets(datasets, select_id)
+        )
+
+    def show_datasets(self, datasets, select_id=None):
         self.dataset_list.clear()
-        datasets = self.api_client.get_datasets()
+        # The server lists the most recent first, prefetch in that order
+        self.prefetcher.prefetch([dataset['id'] for dataset in datasets or []])
+        self.dataset_sizes = {dataset['id']: dataset['total_count'] for dataset in datasets or []}
 
         if datasets:
             for dataset in datasets:
                 item = QListWidgetItem(dataset["filename"])
                 item.setData(Qt.UserRole, dataset['id'])
                 self.dataset_list.addItem(item)
+                if dataset['id'] == select_id:
+                    self.dataset_list.setCurrentItem(item)
+                    self.visualize_dataset(select_id)
         else:
             # No datasets found
             item = QListWidgetItem("No datasets uploaded yet")
@@ -219,39 +332,106 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
             self.visualize_dataset(dataset_id)
 
     def handle_upload(self):
-        """Handle CSV file upload"""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Handle CSV file upload, any number of files at once"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Select CSV File",
+            "Select CSV Files",
             "",
             "CSV Files (*.csv);;All files (*)"
         )
 
-        if file_path:
-            QMessageBox.information(
-                self,
-                "Uploading",
-                "Uploading Dataset... This may take a moment"
-            )
-
-            result = self.api_client.upload_dataset(file_path)
-
-            if result['success']:
-                QMessageBox.information(self, "Success", result['message'])
-                # Reload datasets
-                self.load_datasets()
-
-                # Auto-select newly uploaded dataset
-                if result.get('dataset'):
-                    new_dataset_id = result['dataset']['id']
-                    for i in range(self.dataset_list.count()):
-                        item = self.dataset_list.item(i)
-                        if item.data(Qt.UserRole) == new_dataset_id:
-                            self.dataset_list.setCurrentItem(item)
-                            self.visualize_dataset(new_dataset_id)
-                            break
-            else:
-                QMessageBox.critical(self, "Upload Failed", result["message"])
+        if file_paths:
+            self.uploadbtn.setEnabled(False)
+            self.upload_bar.setValue(0)
+            self.upload_bar.show()
+            self.cancel_upload_btn.show()
+
+            self.upload_list.clear()
+            self.upload_items = {}
+            self.upload_progress = {}
+            for path in dict.fromkeys(file_paths):
+                item = QTreeWidgetItem(self.upload_list, [os.path.basename(path), "Waiting"])
+                item.setToolTip(0, path)
+                self.upload_items[path] = item
+                self.upload_progress[path] = 0.0
+            self.upload_list.show()
+
+            self.update_upload_status()
+            # The CSVs are parsed and checked here, the server only stores them
+            self.uploads.start(file_paths)
+
+    def on_upload_progress(self, path, progress):
+        self.upload_progress[path] = progress.sent / progress.total
+        item = self.upload_items[path]
+        bar = self.upload_list.itemWidget(item, 1)
+        if bar is None:
+            bar = QProgressBar(self.upload_list)
+            bar.setRange(0, 100)
+            self.upload_list.setItemWidget(item, 1, bar)
+        bar.setValue(int(progress.sent * 100 / progress.total))
+        # All bytes are out, the server is storing the file now
+        bar.setFormat("Processing..." if progress.sent == progress.total else "%p%")
+        self.update_upload_status()
+
+    def on_upload_file_finished(self, path, result):
+        self.upload_progress[path] = 1.0
+        item = self.upload_items[path]
+        self.upload_list.removeItemWidget(item, 1)
+        if result['success']:
+            item.setText(1, "Done")
+        elif result.get('cancelled'):
+            item.setText(1, "Cancelled")
+        else:
+            item.setText(1, "Failed")
+            item.setToolTip(1, result['message'])
+        self.update_upload_status()
+
+    def update_upload_status(self):
+        total = len(self.upload_progress)
+        done = len(self.uploads.results)
+        self.upload_bar.setValue(int(sum(self.upload_progress.values()) * 100 / max(total, 1)))
+        if total == 1:
+            self.statusbar.showMessage("Uploading dataset...")
+        else:
+            self.statusbar.showMessage(f"Uploading {total} datasets... {done} of {total} finished")
+
+    def handle_cancel_upload(self):
+        # Files still uploading stop before their next chunk, queued ones never start
+        self.uploads.cancel()
+
+    def hide_upload_progress(self):
+        self.upload_bar.hide()
+        self.cancel_upload_btn.hide()
+        self.upload_list.hide()
+        self.uploadbtn.setEnabled(True)
+
+    def on_upload_finished(self, results):
+        self.hide_upload_progress()
+
+        uploaded = [result for _, result in results if result['success']]
+        failed = [
+            (path, result) for path, result in results
+            if not result['success'] and not result.get('cancelled')
+        ]
+        cancelled = len(results) - len(uploaded) - len(failed)
+
+        if uploaded:
+            message = uploaded[-1]['message'] if len(results) == 1 else f"{len(uploaded)} of {len(results)} datasets uploaded"
+            self.statusbar.showMessage(message, 5000)
+        elif cancelled:
+            self.statusbar.showMessage("Upload cancelled", 5000)
+
+        if failed:
+            QMessageBox.critical(self, "Upload Failed", "\n".join(
+                f"{os.path.basename(path)}: {result['message']}" for path, result in failed
+            ))
+
+        # Reload datasets once for the whole batch, also after a cancel: a
+        # file interrupted after its last byte may be on the server anyway
+        new_dataset_id = uploaded[-1]['dataset']['id'] if uploaded and uploaded[-1].get('dataset') else None
+        if new_dataset_id:
+            self.current_dataset_id = new_dataset_id
+        self.load_datasets(select_id=new_dataset_id)
 
     def handle_delete(self):
         """Handle dataset deletion"""
@@ -276,59 +456,172 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            result = self.api_client.delete_dataset(dataset_id)
+            self.statusbar.showMessage("Deleting dataset...")
+            self.tasks.run(
+                ('delete', dataset_id), self.api_client.delete_dataset, dataset_id,
+                on_result=lambda result: self.on_delete_finished(dataset_id, result)
+            )
 
-            if result['success']:
-                QMessageBox.information(self, "Success", result['message'])
+    def on_delete_finished(self, dataset_id, result):
+        if result['success']:
+            self.statusbar.showMessage(result['message'], 5000)
 
-                # Clear visualization if this was the selected dataset
-                if self.current_dataset_id == dataset_id:
-                    self.current_dataset_id = None
-                    self.show_welcome_message()
+            self.prefetcher.discard(dataset_id)
+            self.pixmaps.discard_dataset(dataset_id)
 
-                # Reload datasets
-                self.load_datasets()
-            else:
-                QMessageBox.critical(self, "Delete Failed", result["message"])
+            # Clear visualization if this was the selected dataset
+            if self.current_dataset_id == dataset_id:
+                self.current_dataset_id = None
+                self.tasks.cancel('visualize')
+                self.awaiting_prefetch = None
+                self.show_welcome_message()
+
+            # Reload datasets
+            self.load_datasets()
+        else:
+            QMessageBox.critical(self, "Delete Failed", result["message"])
+
+    def fetch_dataset(self, dataset_id):
+        """Runs on a worker thread: everything needed to draw one dataset"""
+        import asyncio
+        from .columns import EquipmentColumns
+
+        # Both requests at once, so a click waits for the slower one, not both
+        details, distribution = asyncio.run(self.async_api.get_dataset_bundle(dataset_id))
+        if not details:
+            raise RuntimeError("Could not load dataset details.")
+
+        if not distribution:
+            raise RuntimeError("Could not load distribution data.")
+
+        # Column preparation is the slow part for big datasets, do it here too
+        columns = EquipmentColumns.from_records(details.get('equipment', []))
+        return dataset_id, details, distribution, columns
 
     def visualize_dataset(self, dataset_id):
         """Visualize the selected dataset"""
-        # Get dataset details
-        details = self.api_client.get_dataset_details(dataset_id)
+        # A click on another dataset replaces whatever we were waiting for
+        self.tasks.cancel('visualize')
+        self.awaiting_prefetch = None
+        self.load_equipment_table()
+
+        fetched = self.prefetcher.get(dataset_id)
+        if fetched:
+            self.show_dataset(fetched)
+            return
 
-        if not details:
-            QMessageBox.warning(
-                self,
-                "Error",
-                "Could not load dataset details."
-            )
+        self.statusbar.showMessage("Loading dataset...")
+        if self.prefetcher.is_loading(dataset_id):
+            # Already on its way, on_prefetched shows it
+            self.awaiting_prefetch = dataset_id
             return
 
-        # Get type distribution
-        distribution = self.api_client.get_type_distribution(dataset_id)
+        self.fetch_in_foreground(dataset_id)
 
-        if not distribution:
-            QMessageBox.warning(
-                self,
-                "Error",
-                "Could not load distribution data."
+    def fetch_in_foreground(self, dataset_id):
+        # Same key every time, so a click on another dataset cancels this one
+        self.tasks.run(
+            'visualize', self.fetch_dataset, dataset_id,
+            on_result=self.on_dataset_fetched,
+            on_error=lambda message: QMessageBox.warning(self, "Error", message)
+        )
+
+    def load_equipment_table(self):
+        """Rows are only fetched while the Table tab is open"""
+        if self.view_tabs.currentWidget() is self.equipment_table and self.current_dataset_id:
+            self.equipment_table.load(
+                self.current_dataset_id, self.dataset_sizes.get(self.current_dataset_id, 0)
             )
+
+    def on_dataset_fetched(self, fetched):
+        self.prefetcher.put(fetched)
+        self.show_dataset(fetched)
+
+    def on_prefetched(self, fetched):
+        if fetched[0] == self.awaiting_prefetch:
+            self.awaiting_prefetch = None
+            self.statusbar.clearMessage()
+            self.show_dataset(fetched)
+
+    def on_prefetch_failed(self, dataset_id, message):
+        # Try once more on its own, which shows the error if it fails again
+        if dataset_id == self.awaiting_prefetch:
+            self.awaiting_prefetch = None
+            self.fetch_in_foreground(dataset_id)
+
+    def show_dataset(self, fetched):
+        dataset_id = fetched[0]
+        if dataset_id != self.current_dataset_id:
             return
 
+        self.shown = fetched
+        self.mpl_widget.reset_view()
+        if self.mpl_widget.navigating():
+            # Pan or Zoom is still selected, stay on the live canvas
+            self.draw_interactive()
+        else:
+            self.render_dashboard()
+
+    def render_dashboard(self):
+        """Show the current dataset as an image, rendering it on a worker thread if not cached"""
+        if self.shown is None or self.mpl_widget.navigating():
+            return
+        from .offscreen import render_dashboard
+
+        width, height, ratio = self.mpl_widget.render_size()
+        key = (self.shown[0], width, height, ratio)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is not None:
+            self.tasks.cancel('render')
+            self.mpl_widget.show_image(pixmap)
+            return
+
+        _, details, distribution, columns = self.shown
+        self.tasks.run(
+            'render', render_dashboard, details, distribution, columns,
+            width, height, ratio, self.mpl_widget.dpi,
+            on_result=lambda image: self.on_rendered(key, image),
+            on_error=self.on_visualization_error
+        )
+
+    def on_figure_resized(self):
+        # The live canvas resizes itself, and may be zoomed in
+        if not self.mpl_widget.is_interactive():
+            self.render_dashboard()
+
+    def on_rendered(self, key, image):
+        pixmap = QPixmap.fromImage(image)
+        self.pixmaps.put(key, pixmap)
+        # Still the dataset and size on screen, and nobody started zooming
+        if (self.shown is not None and key[0] == self.shown[0]
+                and key[1:] == self.mpl_widget.render_size()
+                and not self.mpl_widget.navigating()):
+            self.mpl_widget.show_image(pixmap)
+
+    def draw_interactive(self):
+        """Draw the current dataset on the live canvas (for zooming, panning, saving)"""
+        if self.shown is None:
+            return
+        _, details, distribution, columns = self.shown
+
         # Create visualizations
         try:
-            self.visualizer.create_dashboard(details, distribution)
+            self.visualizer.create_dashboard(details, distribution, columns)
+            self.mpl_widget.show_canvas()
             self.mpl_widget.draw()
         except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Visualization Error",
-                f"Error creating visualizations: {str(e)}"
-            )
-            print(f"Visualization Error: {e}")
+            self.on_visualization_error(str(e))
             import traceback
             traceback.print_exc()
 
+    def on_visualization_error(self, message):
+        QMessageBox.critical(
+            self,
+            "Visualization Error",
+            f"Error creating visualizations: {message}"
+        )
+        print(f"Visualization Error: {message}")
+
     def handle_logout(self):
         """Handle logout"""
         reply = QMessageBox.question(
@@ -340,40 +633,83 @@ class DashboardWindow(QMainWindow, Ui_MainWindow):
         )
 
         if reply == QMessageBox.Yes:
-            # Logout via API
-            result = self.api_client.logout()
+            self.tasks.cancel_all()
+            self.prefetcher.cancel_all()
+            self.equipment_table.tasks.cancel_all()
+            self.uploads.cancel_all()
+            self.statusbar.showMessage("Logging out...")
+            # Logout via API, whatever the outcome we return to login
+            self.tasks.run(
+                'logout', self.api_client.logout,
+                on_result=lambda result: self.return_to_login(),
+                on_error=lambda message: self.return_to_login()
+            )
 
-            # Clear token and return to login
-            self.api_client.token = None
-            self.login_window = LoginWindow(self.api_client)
-            self.login_window.show()
-            self.close()
+    def return_to_login(self):
+        # Clear token and return to login
+        self.api_client.token = None
+        self.login_window = LoginWindow(self.api_client)
+        self.login_window.show()
+        self.close()
+
+    def closeEvent(self, event):
+        # Results arriving after the window closed have nowhere to go
+        self.tasks.cancel_all()
+        self.prefetcher.cancel_all()
+        self.equipment_table.tasks.cancel_all()
+        self.uploads.cancel_all()
+        self.async_api.close()
+        super().closeEvent(event)
+
+
+def warm_imports():
+    """
+    Import what the dashboard needs while the user is still logging in.
+    Only modules that don't touch Qt, so it's safe off the UI thread.
+    """
+    import numpy  # noqa: F401
+    import matplotlib.figure  # noqa: F401
+    import matplotlib.backends.backend_agg  # noqa: F401
+
+
+def warn_server_down(parent):
+    reply = QMessageBox.warning(
+        parent,
+        "Server Not Running",
+        "Cannot connect to the API server.\n\n"
+        "Please make sure the Django server is running:\n"
+        "python manage.py runserver\n\n"
+        "Continue anyway?",
+        QMessageBox.Yes | QMessageBox.No,
+        QMessageBox.No
+    )
+
+    if reply == QMessageBox.No:
+        QApplication.quit()
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
     # Create API client
-    api_client = APIClient(base_url="http://localhost:8000/api")
-
-    # Check if server is running
-    if not api_client.health_check():
-        reply = QMessageBox.warning(
-            None,
-            "Server Not Running",
-            "Cannot connect to the API server.\n\n"
-            "Please make sure the Django server is running:\n"
-            "python manage.py runserver\n\n"
-            "Continue anyway?",
-            QMessageBox.Yes | QMessageBox.No,
-            QMessageBox.No
-        )
-
-        if reply == QMessageBox.No:
-            sys.exit(0)
+    api_client = APIClient(base_url="http://localhost:8000/api", cache=DatasetCache())
 
-    # Start with login window
+    # Start with login window, shown before anything slow happens
     login = LoginWindow(api_client)
     login.show()
 
-    sys.exit(app.exec_())
\ No newline at end of file
+    def on_health_checked(up):
+        # Logged in (or signed up) before the check gave up: the server is
+        # there after all, and the login window may be gone
+        if not up and not api_client.token:
+            warn_server_down(QApplication.activeWindow())
+
+    # Check if server is running without blocking the login window
+    startup = TaskRunner()
+    startup.run(
+        'health_check', api_client.health_check, timeout=HEALTH_CHECK_TIMEOUT,
+        on_result=on_health_checked
+    )
+    startup.run('warm_imports', warm_imports)
+
+    sys.exit(app.exec_())
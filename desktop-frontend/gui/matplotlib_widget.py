@@ -1,4 +1,7 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QSizePolicy
+import time
+
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QSizePolicy, QStackedWidget, QLabel
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
@@ -15,12 +18,33 @@ class Canvas(FigureCanvas):
                                    QSizePolicy.Expanding,
                                    QSizePolicy.Expanding)
         FigureCanvas.updateGeometry(self)
+        # How long the last full render took, for spotting slow charts
+        self.last_draw_ms = 0.0
+
+    def draw(self):
+        start = time.perf_counter()
+        super(Canvas, self).draw()
+        self.last_draw_ms = (time.perf_counter() - start) * 1000
 
 
 class MatplotlibWidget(QWidget):
-    def __init__(self, parent=None):
+    """
+    Shows either a pre-rendered image of the figure (show_image) or the live
+    matplotlib canvas (show_canvas).
+
+    Images are cheap to swap in, the canvas is what zooming and panning
+    need. When the user picks Pan or Zoom (or saves a PDF) while an image is
+    shown, interactive_needed is emitted so the owner can draw the figure on
+    the canvas first.
+    """
+    interactive_needed = pyqtSignal()
+    # The area available for the figure changed size (after resizing settles)
+    resized = pyqtSignal()
+
+    def __init__(self, parent=None, dpi=100):
         super(MatplotlibWidget, self).__init__(parent)
-        self.canvas = Canvas(self, width=8, height=6, dpi=100)
+        self.dpi = dpi
+        self.canvas = Canvas(self, width=8, height=6, dpi=dpi)
         self.toolbar = NavigationToolbar(self.canvas, self)
 
         # remove certain actions from toolbar
@@ -28,27 +52,77 @@ class MatplotlibWidget(QWidget):
             text = action.text().lower()
             if any(k in text for k in ["save", "customize", "subplot", "edit"]):
                 self.toolbar.removeAction(action)
+            elif text in ("pan", "zoom"):
+                action.toggled.connect(self.on_navigation_toggled)
         save_pdf_action = QAction("Save PDF", self)
         save_pdf_action.triggered.connect(self.save_pdf)
         self.toolbar.addAction(save_pdf_action)
 
+        # Scaled to fit until a render at the new size comes in
+        self.image = QLabel(self)
+        self.image.setAlignment(Qt.AlignCenter)
+        self.image.setScaledContents(True)
+        self.image.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+
+        self.stack = QStackedWidget(self)
+        self.stack.addWidget(self.canvas)
+        self.stack.addWidget(self.image)
+
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(150)
+        self.resize_timer.timeout.connect(self.resized)
+
         # Vertical Qt layout on the right side on dashboard
         # -----------Toolbar-----------
         # -----------Canvas------------
         layout = QVBoxLayout()
         layout.addWidget(self.toolbar)
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.stack)
         self.setLayout(layout)
 
+    def render_size(self):
+        """(width, height, device pixel ratio) an image needs to fill the figure area"""
+        return self.stack.width(), self.stack.height(), self.devicePixelRatioF()
+
+    def show_image(self, pixmap):
+        self.image.setPixmap(pixmap)
+        self.stack.setCurrentWidget(self.image)
+
+    def show_canvas(self):
+        self.stack.setCurrentWidget(self.canvas)
+
+    def is_interactive(self):
+        return self.stack.currentWidget() is self.canvas
+
+    def navigating(self):
+        """Pan or Zoom is selected in the toolbar"""
+        return bool(self.toolbar.mode)
+
+    def on_navigation_toggled(self, checked):
+        if checked and not self.is_interactive():
+            self.interactive_needed.emit()
+
+    def resizeEvent(self, event):
+        super(MatplotlibWidget, self).resizeEvent(event)
+        self.resize_timer.start()
+
     def get_figure(self):
         return self.canvas.fig
 
     def clear(self):
         self.canvas.fig.clear()
-        self.canvas.draw()
+        self.show_canvas()
+        self.canvas.draw_idle()
 
     def draw(self):
-        return self.canvas.draw()
+        # Coalesced into one render when Qt is next idle, so several updates
+        # in a row (or a resize at the same time) only paint once
+        self.canvas.draw_idle()
+
+    def reset_view(self):
+        """Forget zoom/pan history, e.g. when a different dataset is shown"""
+        self.toolbar.update()
 
     def save_pdf(self):
         file_path, _ = QFileDialog.getSaveFileName(
@@ -62,4 +136,8 @@ class MatplotlibWidget(QWidget):
             if not file_path.endswith(".pdf"):
                 file_path += ".pdf"
 
+            # An image on screen means the figure itself may be out of date
+            if not self.is_interactive():
+                self.interactive_needed.emit()
+
             self.canvas.fig.savefig(file_path, format="pdf")
@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from PyQt5.QtGui import QImage
+
+from .data_visualizer import DataVisualizer
+
+_local = threading.local()
+
+
+def render_dashboard(details, distribution, columns, width, height, ratio, dpi):
+    """
+    Draw the dashboard with Agg, off the UI thread, at width x height
+    logical pixels on a screen with the given device pixel ratio.
+    Returns: QImage (QPixmaps can only be made on the UI thread)
+
+    Each worker thread keeps its own figure and DataVisualizer, so the
+    in-place updates of DataVisualizer apply here too.
+    """
+    if not hasattr(_local, 'visualizer'):
+        figure = Figure()
+        _local.canvas = FigureCanvasAgg(figure)
+        _local.visualizer = DataVisualizer(figure)
+    figure = _local.visualizer.figure
+
+    figure.set_dpi(dpi * ratio)
+    figure.set_size_inches(width / dpi, height / dpi)
+    _local.visualizer.create_dashboard(details, distribution, columns)
+    _local.canvas.draw()
+
+    buffer = _local.canvas.buffer_rgba()
+    image = QImage(bytes(buffer), buffer.shape[1], buffer.shape[0], QImage.Format_RGBA8888).copy()
+    image.setDevicePixelRatio(ratio)
+    return image
+
+
+class PixmapCache:
+    """
+    Rendered dashboards keyed by (dataset id, width, height, ratio), least
+    recently used dropped first once they take more than max_bytes
+    """
+
+    def __init__(self, max_bytes=128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._pixmaps = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def _size(pixmap):
+        return pixmap.width() * pixmap.height() * 4
+
+    def get(self, key):
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+        return pixmap
+
+    def put(self, key, pixmap):
+        if key in self._pixmaps:
+            self._bytes -= self._size(self._pixmaps.pop(key))
+        self._pixmaps[key] = pixmap
+        self._bytes += self._size(pixmap)
+        while self._bytes > self.max_bytes and len(self._pixmaps) > 1:
+            _, oldest = self._pixmaps.popitem(last=False)
+            self._bytes -= self._size(oldest)
+
+    def discard_dataset(self, dataset_id):
+        for key in [k for k in self._pixmaps if k[0] == dataset_id]:
+            self._bytes -= self._size(self._pixmaps.pop(key))
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._bytes = 0
@@ -0,0 +1,132 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .workers import TaskRunner
+
+# Rough in-memory cost of one equipment row in the details payload (a dict
+# of six fields), on top of its NumPy columns
+ROW_BYTES = 600
+
+
+def estimate_size(fetched):
+    _, details, _, columns = fetched
+    rows = len(details.get('equipment', []))
+    arrays = (columns.flowrates, columns.pressures, columns.temperatures, columns.codes)
+    return rows * ROW_BYTES + sum(a.nbytes for a in arrays)
+
+
+class Prefetcher(QObject):
+    """
+    Loads datasets in the background before they are clicked and keeps them
+    in memory, so a click can usually be answered without a request.
+
+    fetch(dataset_id) runs on a worker thread and returns the tuple the
+    dashboard draws from. Datasets are fetched in the order given (most
+    recent first), at most max_concurrent at a time, and only while the
+    foreground is idle (see pause/resume). Cached datasets are kept up to
+    max_bytes, least recently used are dropped first; prefetching stops
+    once the cache is full. A dataset that fails to load is reported with
+    failed(dataset_id, message) and not tried again.
+    """
+    fetched = pyqtSignal(object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, fetch, parent=None, max_concurrent=2, max_bytes=64 * 1024 * 1024):
+        super(Prefetcher, self).__init__(parent)
+        self.fetch = fetch
+        self.max_bytes = max_bytes
+        self.tasks = TaskRunner(self, max_threads=max_concurrent)
+        self.max_concurrent = max_concurrent
+        self._cache = OrderedDict()
+        self._sizes = {}
+        self._queue = []
+        self._loading = set()
+        self._paused = False
+
+    @property
+    def total_bytes(self):
+        return sum(self._sizes.values())
+
+    def prefetch(self, dataset_ids):
+        """Replace the queue with dataset_ids, forgetting datasets no longer listed"""
+        for dataset_id in list(self._cache):
+            if dataset_id not in dataset_ids:
+                self.discard(dataset_id)
+        self._queue = [i for i in dataset_ids if i not in self._cache]
+        self._pump()
+
+    def get(self, dataset_id):
+        fetched = self._cache.get(dataset_id)
+        if fetched is not None:
+            self._cache.move_to_end(dataset_id)
+        return fetched
+
+    def is_loading(self, dataset_id):
+        return dataset_id in self._loading
+
+    def put(self, fetched):
+        """Keep a dataset loaded by someone else (e.g. a foreground click)"""
+        dataset_id = fetched[0]
+        size = estimate_size(fetched)
+        if size > self.max_bytes:
+            return
+        self._cache[dataset_id] = fetched
+        self._sizes[dataset_id] = size
+        while self.total_bytes > self.max_bytes:
+            oldest, _ = self._cache.popitem(last=False)
+            del self._sizes[oldest]
+
+    def discard(self, dataset_id):
+        self._cache.pop(dataset_id, None)
+        self._sizes.pop(dataset_id, None)
+        if dataset_id in self._queue:
+            self._queue.remove(dataset_id)
+        self.tasks.cancel(dataset_id)
+        self._loading.discard(dataset_id)
+
+    def pause(self):
+        """Start nothing new until resume(); what's already running finishes"""
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+        self._pump()
+
+    def set_paused(self, paused):
+        if paused:
+            self.pause()
+        else:
+            self.resume()
+
+    def cancel_all(self):
+        self._queue = []
+        self._loading.clear()
+        self.tasks.cancel_all()
+
+    def _pump(self):
+        while (self._queue and not self._paused
+               and len(self._loading) < self.max_concurrent
+               and self.total_bytes < self.max_bytes):
+            dataset_id = self._queue.pop(0)
+            if dataset_id in self._cache or dataset_id in self._loading:
+                continue
+            self._loading.add(dataset_id)
+            self.tasks.run(
+                dataset_id, self.fetch, dataset_id,
+                on_result=self._on_result,
+                on_error=lambda message, i=dataset_id: self._on_error(i, message)
+            )
+
+    def _on_result(self, fetched):
+        self.put(fetched)
+        self._on_done(fetched[0])
+        self.fetched.emit(fetched)
+
+    def _on_error(self, dataset_id, message):
+        self._on_done(dataset_id)
+        self.failed.emit(dataset_id, message)
+
+    def _on_done(self, dataset_id):
+        self._loading.discard(dataset_id)
+        self._pump()
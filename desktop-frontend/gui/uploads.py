@@ -0,0 +1,72 @@
+import threading
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from .workers import TaskRunner
+
+# Files uploading at the same time; the rest wait their turn
+UPLOAD_CONCURRENCY = 3
+
+
+class UploadBatch(QObject):
+    """
+    Uploads several files, at most max_concurrent at a time.
+
+    upload(path, progress=, cancel_event=) runs on a worker thread and
+    returns the APIClient result dict. progress is emitted per file as bytes
+    go out, file_finished as each one completes and finished once, with every
+    result in the order the files were given, when the last one is done.
+    cancel() stops the batch: files still waiting are reported cancelled at
+    once, files being sent stop at their next chunk, and files whose bytes
+    are all out report whatever the server answered.
+    """
+    progress = pyqtSignal(str, object)
+    file_finished = pyqtSignal(str, dict)
+    finished = pyqtSignal(list)
+
+    def __init__(self, upload, parent=None, max_concurrent=UPLOAD_CONCURRENCY):
+        super(UploadBatch, self).__init__(parent)
+        self.upload = upload
+        self.tasks = TaskRunner(self, max_threads=max_concurrent)
+        self.paths = []
+        self.results = {}
+        self._cancel_event = threading.Event()
+
+    def start(self, paths):
+        self.paths = list(dict.fromkeys(paths))
+        self.results = {}
+        # Shared by the batch rather than per task, so cancelling never
+        # drops the result of a file that is already on the server
+        self._cancel_event = threading.Event()
+        for path in self.paths:
+            self.tasks.run(
+                path, self.upload, path, cancel_event=self._cancel_event,
+                on_result=lambda result, p=path: self._file_done(p, result),
+                on_error=lambda message, p=path: self._file_done(
+                    p, {'success': False, 'message': message}
+                ),
+                on_progress=lambda progress, p=path: self.progress.emit(p, progress)
+            )
+
+    def cancel(self):
+        """Stop every file not uploaded yet; the ones already stored stay"""
+        self._cancel_event.set()
+        for path in self.paths:
+            if path not in self.results and self.tasks.dequeue(path):
+                self._file_done(path, {'success': False, 'cancelled': True, 'message': 'Upload cancelled'})
+
+    def cancel_all(self):
+        """Stop every file and drop all results (e.g. on logout)"""
+        self._cancel_event.set()
+        self.tasks.cancel_all()
+
+    def is_running(self):
+        return len(self.results) < len(self.paths)
+
+    def _file_done(self, path, result):
+        if path in self.results:
+            return
+        self.results[path] = result
+        self.file_finished.emit(path, result)
+        if not self.is_running():
+            self.finished.emit([(p, self.results[p]) for p in self.paths])
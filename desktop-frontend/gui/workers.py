@@ -0,0 +1,142 @@
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal, pyqtSlot
+
+
+class WorkerSignals(QObject):
+    """
+    Signals have to live on a QObject, and QRunnable isn't one.
+    Created on the UI thread, so connected slots run on the UI thread too.
+    """
+    result = pyqtSignal(object)
+    error = pyqtSignal(str)
+    progress = pyqtSignal(object)
+    done = pyqtSignal()
+
+
+class Worker(QRunnable):
+    """Run fn(*args, **kwargs) on a thread pool thread and report back through signals"""
+
+    def __init__(self, fn, *args, **kwargs):
+        super(Worker, self).__init__()
+        # Python keeps the reference (see TaskRunner), not the pool
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        # Long running functions can take this and stop early when it's set
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            result = self.fn(*self.args, **self.kwargs)
+            # A cancelled task may still finish, its result is just dropped
+            if not self.cancelled:
+                self.signals.result.emit(result)
+        except Exception as e:
+            if not self.cancelled:
+                traceback.print_exc()
+                self.signals.error.emit(str(e))
+        finally:
+            self.signals.done.emit()
+
+
+class TaskRunner(QObject):
+    """
+    Runs blocking work (API calls, data preparation) off the UI thread.
+
+    Every task has a key. Starting a task whose key is already running
+    cancels the older one: it is removed from the queue if it hasn't started,
+    otherwise its result is thrown away when it arrives. So clicking through
+    datasets quickly only ever shows the last one clicked.
+    """
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, max_threads=4):
+        super(TaskRunner, self).__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._latest = {}
+        self._running = set()
+
+    def run(self, key, fn, *args, on_result=None, on_error=None, on_progress=None,
+            cancellable=False, **kwargs):
+        """
+        on_progress: fn is passed a progress= callable; whatever it is called
+            with is delivered to on_progress on the UI thread
+        cancellable: fn is passed the worker's cancel_event=, so cancel(key)
+            can stop it part way instead of only discarding its result
+        """
+        self.cancel(key)
+
+        worker = Worker(fn, *args, **kwargs)
+        if on_result:
+            worker.signals.result.connect(on_result)
+        if on_error:
+            worker.signals.error.connect(on_error)
+        if on_progress:
+            # Updates already queued when the task is cancelled are dropped too
+            worker.signals.progress.connect(
+                lambda value: None if worker.cancelled else on_progress(value)
+            )
+            worker.kwargs['progress'] = worker.signals.progress.emit
+        if cancellable:
+            worker.kwargs['cancel_event'] = worker.cancel_event
+        worker.signals.done.connect(lambda: self._finished(key, worker))
+
+        self._latest[key] = worker
+        self._running.add(worker)
+        if len(self._running) == 1:
+            self.busy_changed.emit(True)
+
+        self.pool.start(worker)
+        return worker
+
+    def cancel(self, key):
+        worker = self._latest.pop(key, None)
+        if worker is None:
+            return
+        worker.cancel_event.set()
+        # Not started yet: take it off the queue so it never hits the network
+        if self.pool.tryTake(worker):
+            self._finished(key, worker)
+
+    def dequeue(self, key):
+        """
+        Cancel the task only if it hasn't started yet
+        Returns: True if it was taken off the queue, False if it runs on
+            (its result is delivered as usual) or there was no such task
+        """
+        worker = self._latest.get(key)
+        if worker is None or not self.pool.tryTake(worker):
+            return False
+        del self._latest[key]
+        worker.cancel_event.set()
+        self._finished(key, worker)
+        return True
+
+    def cancel_all(self):
+        for key in list(self._latest):
+            self.cancel(key)
+
+    def is_busy(self, key=None):
+        if key is None:
+            return bool(self._running)
+        return key in self._latest
+
+    def _finished(self, key, worker):
+        if self._latest.get(key) is worker:
+            del self._latest[key]
+        if worker in self._running:
+            self._running.discard(worker)
+            if not self._running:
+                self.busy_changed.emit(False)
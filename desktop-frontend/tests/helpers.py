@@ -0,0 +1,21 @@
+from PyQt5.QtCore import QCoreApplication, QEventLoop, QTimer
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def wait_for(signal, timeout_ms=5000):
+    """Run the event loop until signal fires; returns its arguments"""
+    received = []
+    loop = QEventLoop()
+
+    def on_signal(*args):
+        received.append(args)
+        loop.quit()
+
+    signal.connect(on_signal)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec_()
+    signal.disconnect(on_signal)
+    if not received:
+        raise AssertionError(f"Signal not emitted within {timeout_ms} ms")
+    return received[0]
@@ -0,0 +1,48 @@
+import asyncio
+import time
+import unittest
+
+from api.api_client import APIClient
+from api.async_client import AsyncAPIClient
+from bench import stand_in_server
+
+LATENCY = 0.2
+
+
+class AsyncAPIClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server, base_url = stand_in_server([1, 2, 3], rows=20, latency=LATENCY)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = AsyncAPIClient(APIClient(base_url=base_url))
+        self.addCleanup(self.client.close)
+
+    def test_bundle_requests_go_out_together(self):
+        start = time.perf_counter()
+        details, distribution = asyncio.run(self.client.get_dataset_bundle(1))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(details['equipment']), 20)
+        self.assertIsNotNone(distribution)
+        # Two requests, one round of latency
+        self.assertLess(elapsed, 2 * LATENCY)
+
+    def test_bundles_in_order_with_missing_dataset(self):
+        bundles = asyncio.run(self.client.get_dataset_bundles([3, 99, 1]))
+
+        self.assertEqual([details and details['id'] for details, _ in bundles], [3, None, 1])
+        self.assertEqual(bundles[1], (None, None))
+
+    def test_delete_datasets(self):
+        start = time.perf_counter()
+        results = asyncio.run(self.client.delete_datasets([1, 2, 99]))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([result['success'] for result in results], [True, True, False])
+        self.assertLess(elapsed, 2 * LATENCY)
+        details, _ = asyncio.run(self.client.get_dataset_bundle(1))
+        self.assertIsNone(details)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import threading
+import unittest
+
+from gui.uploads import UploadBatch
+
+from .helpers import wait_for
+
+
+class FakeUpload:
+    """
+    Stands in for APIClient.upload_dataset. Each file blocks until released;
+    files listed in `sent` have all their bytes out already and ignore cancel.
+    """
+
+    def __init__(self, sent=()):
+        self.sent = set(sent)
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, path, progress=None, cancel_event=None):
+        self.calls.append(path)
+        self.started.set()
+        while not self.release.wait(0.01):
+            if cancel_event.is_set() and path not in self.sent:
+                return {'success': False, 'cancelled': True, 'message': 'Upload cancelled'}
+        return {'success': True, 'message': 'Dataset Uploaded Successfully', 'dataset': {'id': path}}
+
+
+class UploadBatchTests(unittest.TestCase):
+    def test_all_files_upload(self):
+        upload = FakeUpload()
+        upload.release.set()
+        batch = UploadBatch(upload, max_concurrent=2)
+        batch.start(['a.csv', 'b.csv', 'a.csv'])
+
+        [results] = wait_for(batch.finished)
+        self.assertEqual([path for path, _ in results], ['a.csv', 'b.csv'])
+        self.assertTrue(all(result['success'] for _, result in results))
+
+    def test_cancel_keeps_files_already_sent(self):
+        upload = FakeUpload(sent={'a.csv'})
+        batch = UploadBatch(upload, max_concurrent=1)
+        batch.start(['a.csv', 'b.csv', 'c.csv'])
+        self.assertTrue(upload.started.wait(5))
+
+        batch.cancel()
+        # The queued files never start; the one on the wire reports what the server said
+        self.assertEqual(set(batch.results), {'b.csv', 'c.csv'})
+        upload.release.set()
+        [results] = wait_for(batch.finished)
+
+        self.assertEqual(upload.calls, ['a.csv'])
+        results = dict(results)
+        self.assertTrue(results['a.csv']['success'])
+        self.assertTrue(results['b.csv']['cancelled'])
+        self.assertTrue(results['c.csv']['cancelled'])
+
+    def test_cancel_interrupts_a_file_being_sent(self):
+        upload = FakeUpload()
+        batch = UploadBatch(upload, max_concurrent=2)
+        batch.start(['a.csv', 'b.csv'])
+        self.assertTrue(upload.started.wait(5))
+
+        batch.cancel()
+        [results] = wait_for(batch.finished)
+
+        self.assertTrue(all(result.get('cancelled') for _, result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,16 +1,29 @@
+import { lazy, Suspense, useEffect } from "react";
 import { BrowserRouter, Routes, Route } from "react-router-dom";
-import Login from "./pages/Login";
-import Register from "./pages/Register";
-import Dashboard from "./pages/Dashboard";
+import { reportFirstLoad } from "./services/firstLoad";
+
+// Each page is its own chunk; only the one being opened is downloaded
+const Login = lazy(() => import("./pages/Login"));
+const Register = lazy(() => import("./pages/Register"));
+const Dashboard = lazy(() => import("./pages/Dashboard"));
+
+// Mounts together with the first page, once its chunk has arrived
+function FirstLoad() {
+  useEffect(reportFirstLoad, []);
+  return null;
+}
 
 function App() {
   return (
     <BrowserRouter>
-      <Routes>
-        <Route path="/" element={<Login />} />
-        <Route path="/register" element={<Register />} />
-        <Route path="/dashboard" element={<Dashboard />} />
-      </Routes>
+      <Suspense fallback={<div className="center-container">Loading...</div>}>
+        <Routes>
+          <Route path="/" element={<Login />} />
+          <Route path="/register" element={<Register />} />
+          <Route path="/dashboard" element={<Dashboard />} />
+        </Routes>
+        <FirstLoad />
+      </Suspense>
     </BrowserRouter>
   );
 }
@@ -0,0 +1,90 @@
+import { Bar } from "react-chartjs-2";
+
+import "./chartSetup";
+import PieChart from "./PieChart";
+import BarChart from "./BarChart";
+import ScatterChart from "./ScatterChart";
+import Histogram from "./Histogram";
+import EquipmentBarChart from "./EquipmentBarChart";
+
+// The dashboard's charts for one dataset. Loaded lazily by the dashboard,
+// so Chart.js is only downloaded once a dataset is selected.
+function ChartGrid({ charts, distribution = [], rawData, selectedEquipment = null }) {
+  return (
+    <div className="chart-grid">
+      <div className="chart-box">
+        <div className="chart-title">
+          Equipment Type Distribution
+        </div>
+        <PieChart data={distribution} />
+      </div>
+
+      <div className="chart-box">
+        <div className="chart-title">Average Metrics by Type</div>
+        <BarChart
+          labels={charts.types.labels}
+          flow={charts.types.avgFlow}
+          pressure={charts.types.avgPressure}
+          temp={charts.types.avgTemp}
+        />
+      </div>
+
+      <div className="chart-box">
+        <div className="chart-title">Flow vs Pressure</div>
+        <ScatterChart groups={charts.scatterGroups} large={charts.large} />
+      </div>
+
+      <div className="chart-box">
+        <div className="chart-title">Temperature Distribution</div>
+        <Histogram
+          bins={charts.histogram.labels}
+          counts={charts.histogram.counts}
+          items={charts.histogram.items}
+          large={charts.large}
+        />
+      </div>
+
+      <div className="chart-box">
+        <div className="chart-title">All Equipment Comparison</div>
+        <EquipmentBarChart
+          names={charts.equipment.names}
+          flows={charts.equipment.flows}
+          pressures={charts.equipment.pressures}
+          temps={charts.equipment.temps}
+          large={charts.large}
+        />
+      </div>
+
+      {selectedEquipment !== null && (
+        <div className="equipment-card">
+          <div className="chart-title">
+            {rawData.names[selectedEquipment]}
+          </div>
+          <Bar
+            data={{
+              labels: ["Flow", "Pressure", "Temp"],
+              datasets: [
+                {
+                  label: rawData.names[selectedEquipment],
+                  data: [
+                    rawData.flowrates[selectedEquipment],
+                    rawData.pressures[selectedEquipment],
+                    rawData.temperatures[selectedEquipment],
+                  ],
+                  backgroundColor: [
+                    "#4e73df",
+                    "#e74a3b",
+                    "#f6c23e",
+                  ],
+                },
+              ],
+            }}
+            options={{ responsive: true }}
+          />
+        </div>
+      )}
+    </div>
+  );
+}
+
+export default ChartGrid;
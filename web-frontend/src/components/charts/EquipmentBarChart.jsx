@@ -5,6 +5,7 @@ function EquipmentBarChart({
   flows = [],
   pressures = [],
   temps = [],
+  large = false,
 }) {
   const data = {
     labels: names,
@@ -18,6 +19,7 @@ function EquipmentBarChart({
   const options = {
     responsive: true,
     maintainAspectRatio: false,
+    ...(large && { animation: false }),
     plugins: {
       title: {
         display: true,
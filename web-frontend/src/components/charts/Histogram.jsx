@@ -1,6 +1,6 @@
 import { Bar } from "react-chartjs-2";
 
-function Histogram({ bins = [], counts = [], items = [] }) {
+function Histogram({ bins = [], counts = [], items = [], large = false }) {
   const data = {
     labels: bins,
     datasets: [
@@ -16,6 +16,7 @@ function Histogram({ bins = [], counts = [], items = [] }) {
   const options = {
   responsive: true,
   maintainAspectRatio: false,
+  ...(large && { animation: false }),
   plugins: {
     title: {
       display: true,
@@ -27,7 +28,7 @@ function Histogram({ bins = [], counts = [], items = [] }) {
         // first line
         label: (ctx) => `Count: ${ctx.raw}`,
 
-        // second line (equipment names)
+        // second line (equipment names, the first few when the bin is big)
         afterLabel: (ctx) => {
           const idx = ctx.dataIndex;
           const names = items?.[idx] || [];
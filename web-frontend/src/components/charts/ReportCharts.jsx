@@ -0,0 +1,39 @@
+import "./chartSetup";
+import PieChart from "./PieChart";
+import BarChart from "./BarChart";
+import ScatterChart from "./ScatterChart";
+import Histogram from "./Histogram";
+
+// Charts in the hidden section rasterised for the PDF report
+function ReportCharts({ charts, distribution = [] }) {
+  return (
+    <>
+      <div style={{ height: 300 }}>
+        <PieChart data={distribution} />
+      </div>
+
+      <div style={{ height: 300 }}>
+        <BarChart
+          labels={charts.types.labels}
+          flow={charts.types.avgFlow}
+          pressure={charts.types.avgPressure}
+          temp={charts.types.avgTemp}
+        />
+      </div>
+
+      <div style={{ height: 300 }}>
+        <ScatterChart groups={charts.scatterGroups} large={charts.large} />
+      </div>
+
+      <div style={{ height: 300 }}>
+        <Histogram
+          bins={charts.histogram.labels}
+          counts={charts.histogram.counts}
+          large={charts.large}
+        />
+      </div>
+    </>
+  );
+}
+
+export default ReportCharts;
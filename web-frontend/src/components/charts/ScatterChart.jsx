@@ -1,19 +1,13 @@
 import { Scatter } from "react-chartjs-2";
 import { typeColors } from "./colors";
 
-function ScatterChart({ points = [] }) {
-  // GROUP BY TYPE SAFELY
-  const groups = points.reduce((acc, p) => {
-    const t = p.type || "Unknown";
-    if (!acc[t]) acc[t] = [];
-    acc[t].push({ x: p.x, y: p.y, name: p.name });
-    return acc;
-  }, {});
-
-  const datasets = Object.keys(groups).map((type) => ({
-    label: type,
-    data: groups[type],
-    backgroundColor: typeColors[type] || "#3b82f6",
+// groups: [{ type, points: [{ x, y, name }] }], already grouped by type
+// large: many rows behind the points, so skip animation and parsing
+function ScatterChart({ groups = [], large = false }) {
+  const datasets = groups.map((group) => ({
+    label: group.type,
+    data: group.points,
+    backgroundColor: typeColors[group.type] || "#3b82f6",
   }));
 
   const data = { datasets };
@@ -21,6 +15,7 @@ function ScatterChart({ points = [] }) {
   const options = {
     responsive: true,
     maintainAspectRatio: false,
+    ...(large && { animation: false, parsing: false }),
     plugins: {
       legend: { position: "top" },
       title: {
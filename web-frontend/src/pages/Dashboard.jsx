@@ -1,15 +1,14 @@
-import { useEffect, useState, useRef } from "react";
+import { lazy, Suspense, useEffect, useMemo, useState, useRef } from "react";
 import API from "../services/api";
-import { Bar } from "react-chartjs-2";
-import jsPDF from "jspdf";
-import html2canvas from "html2canvas";
+import { get, getCached, forget, clearCache } from "../services/dataLayer";
+import { prepareCharts } from "../services/chartWorker";
 
-import "../components/charts/chartSetup";
-import PieChart from "../components/charts/PieChart";
-import BarChart from "../components/charts/BarChart";
-import ScatterChart from "../components/charts/ScatterChart";
-import Histogram from "../components/charts/Histogram";
-import EquipmentBarChart from "../components/charts/EquipmentBarChart";
+// Chart.js and the PDF libraries are split out of the first load: charts
+// are fetched when a dataset is selected, jspdf/html2canvas on export
+const loadChartGrid = () => import("../components/charts/ChartGrid");
+const ChartGrid = lazy(loadChartGrid);
+const ReportCharts = lazy(() => import("../components/charts/ReportCharts"));
+const loadPdfLibs = () => Promise.all([import("html2canvas"), import("jspdf")]);
 
 function Dashboard() {
   const [datasets, setDatasets] = useState([]);
@@ -18,8 +17,12 @@ function Dashboard() {
   const [distribution, setDistribution] = useState([]);
   const [rawData, setRawData] = useState(null);
   const [selectedEquipment, setSelectedEquipment] = useState(null);
+  // Chart data prepared on a worker, with the rawData it was prepared from
+  const [prepared, setPrepared] = useState(null);
 
   const reportRef = useRef();
+  // Latest dataset clicked, so a slower earlier response can't overwrite it
+  const selectedRef = useRef(null);
   const fileInputRef = useRef(null);
 
 
@@ -29,104 +32,93 @@ function Dashboard() {
   }, []);
 
   const fetchProfile = async () => {
-    const res = await API.get("api/profile/");
-    setUser(res.data.user.username);
+    const data = await get("api/profile/");
+    setUser(data.user.username);
   };
 
   const fetchDatasets = async () => {
-    const res = await API.get("api/datasets/");
-    setDatasets(res.data || []);
+    const data = await get("api/datasets/");
+    setDatasets(data || []);
   };
 
   const fetchCharts = async (id) => {
+    // Start downloading the charts alongside the data
+    loadChartGrid();
     setSelected(id);
-    const dist = await API.get(`api/datasets/${id}/type_distribution/`);
-    const raw = await API.get(`api/datasets/${id}/raw/`);
-    setDistribution(dist.data.distribution || []);
-    setRawData(raw.data || null);
+    selectedRef.current = id;
+    const isCurrent = () => selectedRef.current === id;
+
+    // Both at once; a dataset seen before comes from cache and is
+    // revalidated in the background
+    const [dist, raw] = await Promise.all([
+      getCached(`api/datasets/${id}/type_distribution/`, (data) => {
+        if (isCurrent()) setDistribution(data.distribution || []);
+      }),
+      getCached(`api/datasets/${id}/raw/`, (data) => {
+        if (isCurrent()) setRawData(data || null);
+      }),
+    ]);
+    if (!isCurrent()) return;
+    setDistribution(dist.distribution || []);
+    setRawData(raw || null);
     setSelectedEquipment(null);
   };
 
-  /* ---------------- HISTOGRAM ---------------- */
+  /* ---------------- CHART DATA ---------------- */
 
-  const buildHistogram = (temps = [], names = []) => {
-  const bins = {};
-
-  temps.forEach((t, i) => {
-    const bucketStart = Math.floor(t / 10) * 10;
-    const key = `${bucketStart}-${bucketStart + 9}°C`;
-
-    if (!bins[key]) {
-      bins[key] = { count: 0, items: [] };
-    }
-
-    bins[key].count += 1;
-    bins[key].items.push(names[i]);
-  });
-
-  return {
-    labels: Object.keys(bins),
-    counts: Object.values(bins).map(b => b.count),
-    items: Object.values(bins).map(b => b.items),
-  };
-};
-
-
-  const histogram = rawData
-  ? buildHistogram(rawData.temperatures, rawData.names)
-  : { labels: [], counts: [], items: [] };
-
-
-  /* ---------------- EQUIPMENT ARRAYS ---------------- */
-
-  const equipmentNames = rawData?.names || [];
-  const equipmentFlows = rawData?.flowrates || [];
-  const equipmentPressures = rawData?.pressures || [];
-  const equipmentTemps = rawData?.temperatures || [];
-
-  /* ---------------- TYPE AVERAGES ---------------- */
-
-  const averagesByType = rawData?.types
-    ? rawData.types.reduce((acc, type, i) => {
-        if (!acc[type]) acc[type] = { f: [], p: [], t: [] };
-        acc[type].f.push(rawData.flowrates[i]);
-        acc[type].p.push(rawData.pressures[i]);
-        acc[type].t.push(rawData.temperatures[i]);
-        return acc;
-      }, {})
-    : {};
-
-  const barLabels = Object.keys(averagesByType);
-
-  const avgFlow = barLabels.map((l) => {
-    const arr = averagesByType[l].f;
-    return arr.length ? arr.reduce((a, b) => a + b, 0) / arr.length : 0;
-  });
-
-  const avgPressure = barLabels.map((l) => {
-    const arr = averagesByType[l].p;
-    return arr.length ? arr.reduce((a, b) => a + b, 0) / arr.length : 0;
-  });
-
-  const avgTemp = barLabels.map((l) => {
-    const arr = averagesByType[l].t;
-    return arr.length ? arr.reduce((a, b) => a + b, 0) / arr.length : 0;
-  });
-
-  /* ---------------- SCATTER ---------------- */
-
-  const scatterPoints = rawData?.flowrates
-    ? rawData.flowrates.map((f, i) => ({
-        x: f,
-        y: rawData.pressures[i],
-        name: rawData.names[i],
-        type: rawData.types[i],
-      }))
-    : [];
+  // Grouping, binning and decimation run on a Web Worker
+  useEffect(() => {
+    if (!rawData) return;
+    let current = true;
+    prepareCharts(rawData)
+      .then((data) => current && setPrepared({ raw: rawData, data }))
+      .catch((err) => console.error("Preparing charts failed", err));
+    return () => {
+      current = false;
+    };
+  }, [rawData]);
+
+  // Names stay on this thread; only the rows actually drawn are looked up
+  const charts = useMemo(() => {
+    if (!rawData || prepared?.raw !== rawData) return null;
+    const names = rawData.names || [];
+    const { total, large, summary, types, histogram, scatter, equipment } = prepared.data;
+
+    return {
+      total,
+      large,
+      summary,
+      types,
+      histogram: {
+        labels: histogram.labels,
+        counts: histogram.counts,
+        items: histogram.samples.map((sample, b) => {
+          const listed = Array.from(sample, (i) => names[i]);
+          const more = histogram.counts[b] - sample.length;
+          return more > 0 ? [...listed, `and ${more} more`] : listed;
+        }),
+      },
+      scatterGroups: scatter.map((group) => ({
+        type: group.type,
+        points: Array.from(group.index, (i, j) => ({
+          x: group.x[j],
+          y: group.y[j],
+          name: names[i],
+        })),
+      })),
+      equipment: {
+        names: Array.from(equipment.index, (i) => names[i]),
+        flows: Array.from(equipment.flows),
+        pressures: Array.from(equipment.pressures),
+        temps: Array.from(equipment.temps),
+      },
+    };
+  }, [rawData, prepared]);
 
   /* ---------------- PDF ---------------- */
 
   const downloadPDF = async () => {
+  const [{ default: html2canvas }, { default: jsPDF }] = await loadPdfLibs();
   const canvas = await html2canvas(reportRef.current, {
     scale: 3,
     useCORS: true,
@@ -157,6 +149,31 @@ function Dashboard() {
 };
 
 
+  // Server-rendered HTML report with inline SVG charts; much faster than
+  // rasterising the dashboard with html2canvas for large datasets
+  const openHtmlReport = async () => {
+    if (!selected) return alert("Select dataset first");
+
+    // Opened right away, while the click still counts as a user action, so
+    // popup blockers allow it; the report is loaded into it once fetched
+    const win = window.open("", "_blank");
+    if (!win) return alert("Allow pop-ups to open the HTML report");
+
+    try {
+      const res = await API.get(`api/datasets/${selected}/report/`, {
+        params: { format: "html" },
+        responseType: "blob",
+      });
+      const url = URL.createObjectURL(res.data);
+      win.addEventListener("load", () => URL.revokeObjectURL(url), { once: true });
+      win.location.href = url;
+    } catch (err) {
+      console.error(err);
+      win.close();
+      alert("HTML report failed");
+    }
+  };
+
   const handleFileChange = async (e) => {
   const file = e.target.files[0];
   if (!file) return;
@@ -184,6 +201,7 @@ function Dashboard() {
     console.warn("Logout API failed, clearing anyway");
   }
 
+  clearCache();
   localStorage.removeItem("token");
   window.location.href = "/";
 };
@@ -222,6 +240,7 @@ function Dashboard() {
     onClick={async () => {
       if (!selected) return alert("Select dataset first");
       await API.delete(`api/datasets/${selected}/delete/`);
+      forget(`api/datasets/${selected}/`);
       setRawData(null);
       fetchDatasets();
     }}
@@ -253,82 +272,26 @@ function Dashboard() {
 
         {/* ---------- MAIN ---------- */}
         <div className="main">
-          <button className="download-btn" onClick={downloadPDF}>
+          <button
+            className="download-btn"
+            onClick={downloadPDF}
+            onPointerEnter={loadPdfLibs}
+          >
             Download PDF
           </button>
+          <button className="download-btn" onClick={openHtmlReport}>
+            HTML Report
+          </button>
 
-          {rawData && (
-            <div className="chart-grid">
-              <div className="chart-box">
-                <div className="chart-title">
-                  Equipment Type Distribution
-                </div>
-                <PieChart data={distribution} />
-              </div>
-
-              <div className="chart-box">
-                <div className="chart-title">Average Metrics by Type</div>
-                <BarChart
-                  labels={barLabels}
-                  flow={avgFlow}
-                  pressure={avgPressure}
-                  temp={avgTemp}
-                />
-              </div>
-
-              <div className="chart-box">
-                <div className="chart-title">Flow vs Pressure</div>
-                <ScatterChart points={scatterPoints} />
-              </div>
-
-              <div className="chart-box">
-                <div className="chart-title">Temperature Distribution</div>
-                <Histogram
-                  bins={histogram.labels}
-                  counts={histogram.counts}
-                  items={histogram.items}
-                />
-              </div>
-
-              <div className="chart-box">
-                <div className="chart-title">All Equipment Comparison</div>
-                <EquipmentBarChart
-                  names={equipmentNames}
-                  flows={equipmentFlows}
-                  pressures={equipmentPressures}
-                  temps={equipmentTemps}
-                />
-              </div>
-
-              {selectedEquipment !== null && (
-                <div className="equipment-card">
-                  <div className="chart-title">
-                    {rawData.names[selectedEquipment]}
-                  </div>
-                  <Bar
-                    data={{
-                      labels: ["Flow", "Pressure", "Temp"],
-                      datasets: [
-                        {
-                          label: rawData.names[selectedEquipment],
-                          data: [
-                            rawData.flowrates[selectedEquipment],
-                            rawData.pressures[selectedEquipment],
-                            rawData.temperatures[selectedEquipment],
-                          ],
-                          backgroundColor: [
-                            "#4e73df",
-                            "#e74a3b",
-                            "#f6c23e",
-                          ],
-                        },
-                      ],
-                    }}
-                    options={{ responsive: true }}
-                  />
-                </div>
-              )}
-            </div>
+          {charts && (
+            <Suspense fallback={<p>Loading charts...</p>}>
+              <ChartGrid
+                charts={charts}
+                distribution={distribution}
+                rawData={rawData}
+                selectedEquipment={selectedEquipment}
+              />
+            </Suspense>
           )}
         </div>
       </div>
@@ -348,61 +311,29 @@ function Dashboard() {
   <p>User: {user}</p>
   <p>Date: {new Date().toLocaleString()}</p>
 
-  {rawData && (
+  {charts && (
     <>
       <h2>Summary Statistics</h2>
 
-      <p>Total Equipment: {equipmentNames.length}</p>
+      <p>Total Equipment: {charts.total}</p>
 
       <p>
-        Average Flow:{" "}
-        {(
-          equipmentFlows.reduce((a, b) => a + b, 0) /
-          (equipmentFlows.length || 1)
-        ).toFixed(2)}
+        Average Flow: {charts.summary.avgFlow.toFixed(2)}
       </p>
 
       <p>
-        Average Pressure:{" "}
-        {(
-          equipmentPressures.reduce((a, b) => a + b, 0) /
-          (equipmentPressures.length || 1)
-        ).toFixed(2)}
+        Average Pressure: {charts.summary.avgPressure.toFixed(2)}
       </p>
 
       <p>
-        Average Temperature:{" "}
-        {(
-          equipmentTemps.reduce((a, b) => a + b, 0) /
-          (equipmentTemps.length || 1)
-        ).toFixed(2)}
+        Average Temperature: {charts.summary.avgTemp.toFixed(2)}
       </p>
 
       <h2>Charts</h2>
 
-      <div style={{ height: 300 }}>
-        <PieChart data={distribution} />
-      </div>
-
-      <div style={{ height: 300 }}>
-        <BarChart
-          labels={barLabels}
-          flow={avgFlow}
-          pressure={avgPressure}
-          temp={avgTemp}
-        />
-      </div>
-
-      <div style={{ height: 300 }}>
-        <ScatterChart points={scatterPoints} />
-      </div>
-
-      <div style={{ height: 300 }}>
-        <Histogram
-          bins={histogram.labels}
-          counts={histogram.counts}
-        />
-      </div>
+      <Suspense fallback={null}>
+        <ReportCharts charts={charts} distribution={distribution} />
+      </Suspense>
     </>
   )}
 </div>
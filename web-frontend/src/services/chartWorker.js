@@ -0,0 +1,68 @@
+import { prepareCharts as prepareHere } from "../workers/chartData";
+
+// Runs chart data preparation on a Web Worker so big datasets don't freeze
+// the tab. One worker is shared; requests are answered by id.
+
+let worker = null;
+let nextId = 0;
+const pending = new Map();
+
+const getWorker = () => {
+  if (!worker) {
+    worker = new Worker(new URL("../workers/chartData.worker.js", import.meta.url), {
+      type: "module",
+    });
+    worker.onmessage = ({ data: { id, prepared, error } }) => {
+      const request = pending.get(id);
+      pending.delete(id);
+      if (!request) return;
+      if (error) request.reject(new Error(error));
+      else request.resolve(prepared);
+    };
+  }
+  return worker;
+};
+
+/**
+ * The raw endpoint's columns as typed arrays, with equipment types as
+ * integer codes into typeNames (in order of first appearance)
+ */
+export const toColumns = (raw) => {
+  const typeIndex = new Map();
+  const types = raw.types || [];
+  const codes = new Uint32Array(types.length);
+  for (let i = 0; i < types.length; i++) {
+    const type = types[i] || "Unknown";
+    let code = typeIndex.get(type);
+    if (code === undefined) {
+      code = typeIndex.size;
+      typeIndex.set(type, code);
+    }
+    codes[i] = code;
+  }
+  return {
+    codes,
+    typeNames: [...typeIndex.keys()],
+    flowrates: Float64Array.from(raw.flowrates || []),
+    pressures: Float64Array.from(raw.pressures || []),
+    temperatures: Float64Array.from(raw.temperatures || []),
+  };
+};
+
+/** Everything the dashboard charts draw, prepared off the main thread */
+export const prepareCharts = (raw) => {
+  const columns = toColumns(raw);
+  if (typeof Worker === "undefined") return Promise.resolve(prepareHere(columns));
+
+  const id = ++nextId;
+  return new Promise((resolve, reject) => {
+    pending.set(id, { resolve, reject });
+    // Transferred: the buffers move to the worker instead of being copied
+    getWorker().postMessage({ id, columns }, [
+      columns.codes.buffer,
+      columns.flowrates.buffer,
+      columns.pressures.buffer,
+      columns.temperatures.buffer,
+    ]);
+  });
+};
@@ -0,0 +1,214 @@
+import API from "./api";
+
+// Client data layer on top of the axios instance:
+// - identical GETs already in flight share one request
+// - dataset responses are kept in memory and IndexedDB with their ETag, so
+//   a dataset opened before shows at once from cache while it is revalidated
+//   in the background (If-None-Match, usually an empty 304)
+
+const DB_NAME = "equipment-analyzer";
+const STORE = "responses";
+// Size and last use of each response, apart from the payloads so eviction
+// can walk them without loading every dataset
+const USAGE = "usage";
+
+// Like the desktop cache, once either copy passes its size the least
+// recently used entries are dropped
+const MEMORY_MAX_BYTES = 50 * 1024 * 1024;
+const STORED_MAX_BYTES = 200 * 1024 * 1024;
+
+const inflight = new Map();
+// A Map iterates in insertion order and entries are re-inserted when used,
+// so the first key is always the least recently used
+const memory = new Map();
+let memoryBytes = 0;
+let dbPromise = null;
+
+/* ---------------- IndexedDB ---------------- */
+
+const openDb = () => {
+  if (typeof indexedDB === "undefined") return Promise.resolve(null);
+  if (!dbPromise) {
+    dbPromise = new Promise((resolve) => {
+      const request = indexedDB.open(DB_NAME, 2);
+      request.onupgradeneeded = () => {
+        const db = request.result;
+        // Version 1 kept no sizes; it is only a cache, so start over
+        for (const name of Array.from(db.objectStoreNames)) db.deleteObjectStore(name);
+        db.createObjectStore(STORE);
+        db.createObjectStore(USAGE).createIndex("usedAt", "usedAt");
+      };
+      request.onsuccess = () => {
+        // Let a newer version in another tab upgrade
+        request.result.onversionchange = () => request.result.close();
+        resolve(request.result);
+      };
+      // Private browsing or blocked storage: carry on with memory only.
+      // Blocked also covers a tab still holding version 1 open
+      request.onerror = () => resolve(null);
+      request.onblocked = () => resolve(null);
+    });
+  }
+  return dbPromise;
+};
+
+// Runs action(responses, usage) in one transaction and resolves with the
+// result of the request it returns, if any, once the transaction is done
+const idb = async (mode, action) => {
+  const db = await openDb();
+  if (!db) return undefined;
+  return new Promise((resolve) => {
+    const tx = db.transaction([STORE, USAGE], mode);
+    const request = action(tx.objectStore(STORE), tx.objectStore(USAGE));
+    tx.oncomplete = () => resolve(request?.result);
+    tx.onabort = () => resolve(undefined);
+  });
+};
+
+// Drop the least recently used stored responses past STORED_MAX_BYTES,
+// walking newest first so whatever was just used is kept
+const evictStored = (store, usage) => {
+  let total = 0;
+  const request = usage.index("usedAt").openCursor(null, "prev");
+  request.onsuccess = () => {
+    const cursor = request.result;
+    if (!cursor) return;
+    total += cursor.value.size;
+    if (total > STORED_MAX_BYTES) {
+      store.delete(cursor.primaryKey);
+      cursor.delete();
+    }
+    cursor.continue();
+  };
+};
+
+const touchStored = (key) =>
+  idb("readwrite", (store, usage) => {
+    const request = usage.get(key);
+    // Gone already if it was evicted while still in memory
+    request.onsuccess = () =>
+      request.result && usage.put({ ...request.result, usedAt: Date.now() }, key);
+  });
+
+const forgetInMemory = (key) => {
+  const entry = memory.get(key);
+  if (!entry) return;
+  memory.delete(key);
+  memoryBytes -= entry.size;
+};
+
+const remember = (key, entry) => {
+  forgetInMemory(key);
+  memory.set(key, entry);
+  memoryBytes += entry.size;
+  for (const [oldKey, old] of memory) {
+    if (memoryBytes <= MEMORY_MAX_BYTES || oldKey === key) break;
+    forgetInMemory(oldKey);
+  }
+};
+
+const readEntry = async (key) => {
+  const entry = memory.get(key) || (await idb("readonly", (store) => store.get(key)));
+  if (!entry) return undefined;
+  remember(key, entry);
+  touchStored(key);
+  return entry;
+};
+
+const writeEntry = (key, etag, data) => {
+  // The JSON length is close enough to what the payload costs to keep
+  const entry = { etag, data, size: JSON.stringify(data).length };
+  remember(key, entry);
+  idb("readwrite", (store, usage) => {
+    store.put(entry, key);
+    usage.put({ size: entry.size, usedAt: Date.now() }, key);
+    evictStored(store, usage);
+  });
+};
+
+/* ---------------- Requests ---------------- */
+
+// Cache entries belong to whoever is logged in
+const cacheKey = (url) => `${localStorage.getItem("token")}:${url}`;
+
+/**
+ * GET url, sharing the request with any identical one still in flight.
+ * Resolves with the response data.
+ */
+export const get = (url, config = {}) => {
+  const key = `${url}?${JSON.stringify(config.params || {})}`;
+  if (!inflight.has(key)) {
+    const request = API.get(url, config)
+      .then((res) => res.data)
+      .finally(() => inflight.delete(key));
+    inflight.set(key, request);
+  }
+  return inflight.get(key);
+};
+
+const revalidate = (url, entryKey, entry) => {
+  // Per user too, so a request from before a logout is never handed to
+  // whoever logs in next
+  const key = `revalidate:${entryKey}`;
+  if (!inflight.has(key)) {
+    const request = API.get(url, {
+      headers: entry ? { "If-None-Match": entry.etag } : {},
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    })
+      .then((res) => {
+        if (res.status === 304) return { data: entry.data, changed: false };
+        // Not cached if the user logged out meanwhile
+        if (res.headers.etag && cacheKey(url) === entryKey) {
+          writeEntry(entryKey, res.headers.etag, res.data);
+        }
+        return { data: res.data, changed: true };
+      })
+      .finally(() => inflight.delete(key));
+    inflight.set(key, request);
+  }
+  return inflight.get(key);
+};
+
+/**
+ * Stale-while-revalidate GET for resources the server sends an ETag for.
+ * Resolves with the cached data straight away when there is some, and
+ * revalidates in the background; onUpdate(data) is called if the server
+ * had something newer. Without a cached copy it waits for the network.
+ */
+export const getCached = async (url, onUpdate) => {
+  const key = cacheKey(url);
+  const entry = await readEntry(key);
+  if (!entry) return (await revalidate(url, key, null)).data;
+
+  revalidate(url, key, entry)
+    .then(({ data, changed }) => changed && onUpdate && onUpdate(data))
+    .catch((err) => {
+      // Offline or server down: the cached copy is all there is
+      if (err.response?.status === 404) forget(url);
+      else console.warn("Revalidation failed", err);
+    });
+  return entry.data;
+};
+
+/** Drop cached responses whose url starts with prefix (e.g. a deleted dataset) */
+export const forget = (prefix) => {
+  const keyPrefix = cacheKey(prefix);
+  for (const key of memory.keys()) {
+    if (key.startsWith(keyPrefix)) forgetInMemory(key);
+  }
+  idb("readwrite", (store, usage) => {
+    const range = IDBKeyRange.bound(keyPrefix, `${keyPrefix}\uffff`);
+    store.delete(range);
+    usage.delete(range);
+  });
+};
+
+/** Empty the whole cache, e.g. on logout */
+export const clearCache = () => {
+  memory.clear();
+  memoryBytes = 0;
+  idb("readwrite", (store, usage) => {
+    store.clear();
+    usage.clear();
+  });
+};
@@ -0,0 +1,15 @@
+let reported = false;
+
+/**
+ * Records how long the first page took to show, from navigation start to
+ * the frame it was painted in, as the "first-load" performance measure
+ * (visible in the DevTools performance panel) and logs it once.
+ */
+export const reportFirstLoad = () => {
+  if (reported || typeof performance === "undefined") return;
+  reported = true;
+  requestAnimationFrame(() => {
+    const { duration } = performance.measure("first-load", { start: 0 });
+    console.info(`First load: ${Math.round(duration)} ms`);
+  });
+};
@@ -0,0 +1,167 @@
+// Chart data preparation, run inside chartData.worker.js. Plain functions
+// over typed arrays so they can also be used (and tested) without a worker.
+
+// Above this many rows charts are drawn without animation
+export const LARGE_INPUT = 5000;
+// Most scatter points drawn in total, shared between equipment types
+export const MAX_SCATTER_POINTS = 12000;
+// Buckets for the per-equipment bar chart; each keeps its min and max row
+export const MAX_EQUIPMENT_BUCKETS = 400;
+// Equipment names listed per histogram bin in its tooltip
+export const HISTOGRAM_NAMES = 15;
+export const HISTOGRAM_BIN_WIDTH = 10;
+
+/* ---------------- TYPE AVERAGES ---------------- */
+
+export const typeAverages = ({ codes, typeNames, flowrates, pressures, temperatures }) => {
+  const k = typeNames.length;
+  const counts = new Float64Array(k);
+  const sums = [new Float64Array(k), new Float64Array(k), new Float64Array(k)];
+  for (let i = 0; i < codes.length; i++) {
+    const c = codes[i];
+    counts[c] += 1;
+    sums[0][c] += flowrates[i];
+    sums[1][c] += pressures[i];
+    sums[2][c] += temperatures[i];
+  }
+  const mean = (s) => Array.from(s, (v, c) => (counts[c] ? v / counts[c] : 0));
+  return {
+    labels: typeNames,
+    avgFlow: mean(sums[0]),
+    avgPressure: mean(sums[1]),
+    avgTemp: mean(sums[2]),
+  };
+};
+
+const average = (values) => {
+  let sum = 0;
+  for (let i = 0; i < values.length; i++) sum += values[i];
+  return values.length ? sum / values.length : 0;
+};
+
+/* ---------------- HISTOGRAM ---------------- */
+
+// 10°C buckets in ascending order, with the first few rows of each bin
+export const histogram = (temperatures, width = HISTOGRAM_BIN_WIDTH, sampleSize = HISTOGRAM_NAMES) => {
+  const bins = new Map();
+  for (let i = 0; i < temperatures.length; i++) {
+    const start = Math.floor(temperatures[i] / width) * width;
+    let bin = bins.get(start);
+    if (!bin) {
+      bin = { count: 0, sample: [] };
+      bins.set(start, bin);
+    }
+    bin.count += 1;
+    if (bin.sample.length < sampleSize) bin.sample.push(i);
+  }
+  const starts = [...bins.keys()].sort((a, b) => a - b);
+  return {
+    labels: starts.map((s) => `${s}-${s + width - 1}°C`),
+    counts: starts.map((s) => bins.get(s).count),
+    samples: starts.map((s) => Uint32Array.from(bins.get(s).sample)),
+  };
+};
+
+/* ---------------- SCATTER ---------------- */
+
+// Points per type, thinned to one per cell of a grid over the data range
+// when there are too many to draw: dense areas keep their shape, and
+// isolated points (outliers) always survive
+export const scatterGroups = ({ codes, typeNames, flowrates, pressures }, maxPoints = MAX_SCATTER_POINTS) => {
+  const n = codes.length;
+  const k = typeNames.length;
+  const thin = n > maxPoints;
+
+  let xMin = Infinity, xMax = -Infinity, yMin = Infinity, yMax = -Infinity;
+  for (let i = 0; i < n; i++) {
+    if (flowrates[i] < xMin) xMin = flowrates[i];
+    if (flowrates[i] > xMax) xMax = flowrates[i];
+    if (pressures[i] < yMin) yMin = pressures[i];
+    if (pressures[i] > yMax) yMax = pressures[i];
+  }
+  const cells = Math.max(1, Math.floor(maxPoints / Math.max(k, 1)));
+  const cols = Math.max(1, Math.round(Math.sqrt(cells * 1.5)));
+  const rows = Math.max(1, Math.floor(cells / cols));
+  const xScale = xMax > xMin ? (cols - 1) / (xMax - xMin) : 0;
+  const yScale = yMax > yMin ? (rows - 1) / (yMax - yMin) : 0;
+
+  const taken = thin ? new Uint8Array(k * cols * rows) : null;
+  const picked = Array.from({ length: k }, () => []);
+  for (let i = 0; i < n; i++) {
+    const c = codes[i];
+    if (thin) {
+      const cell = c * cols * rows
+        + Math.round((pressures[i] - yMin) * yScale) * cols
+        + Math.round((flowrates[i] - xMin) * xScale);
+      if (taken[cell]) continue;
+      taken[cell] = 1;
+    }
+    picked[c].push(i);
+  }
+
+  return typeNames.map((type, c) => {
+    const index = Uint32Array.from(picked[c]);
+    return {
+      type,
+      index,
+      x: Float64Array.from(index, (i) => flowrates[i]),
+      y: Float64Array.from(index, (i) => pressures[i]),
+    };
+  });
+};
+
+/* ---------------- EQUIPMENT SERIES ---------------- */
+
+// Min-max decimation in row order: each bucket keeps the rows with the
+// lowest and highest flowrate, so peaks and dips stay visible
+export const minMaxDecimate = (values, buckets = MAX_EQUIPMENT_BUCKETS) => {
+  const n = values.length;
+  if (n <= buckets * 2) return Uint32Array.from({ length: n }, (_, i) => i);
+
+  const keep = [];
+  for (let b = 0; b < buckets; b++) {
+    const start = Math.floor((b * n) / buckets);
+    const end = Math.floor(((b + 1) * n) / buckets);
+    let lo = start, hi = start;
+    for (let i = start + 1; i < end; i++) {
+      if (values[i] < values[lo]) lo = i;
+      if (values[i] > values[hi]) hi = i;
+    }
+    keep.push(Math.min(lo, hi));
+    if (hi !== lo) keep.push(Math.max(lo, hi));
+  }
+  return Uint32Array.from(keep);
+};
+
+export const equipmentSeries = ({ flowrates, pressures, temperatures }) => {
+  const index = minMaxDecimate(flowrates);
+  return {
+    index,
+    flows: Float64Array.from(index, (i) => flowrates[i]),
+    pressures: Float64Array.from(index, (i) => pressures[i]),
+    temps: Float64Array.from(index, (i) => temperatures[i]),
+  };
+};
+
+/* ---------------- ALL CHARTS ---------------- */
+
+export const prepareCharts = (columns) => ({
+  total: columns.codes.length,
+  large: columns.codes.length > LARGE_INPUT,
+  summary: {
+    avgFlow: average(columns.flowrates),
+    avgPressure: average(columns.pressures),
+    avgTemp: average(columns.temperatures),
+  },
+  types: typeAverages(columns),
+  histogram: histogram(columns.temperatures),
+  scatter: scatterGroups(columns),
+  equipment: equipmentSeries(columns),
+});
+
+// Typed arrays in a prepared result, to transfer back instead of copying
+export const transferables = (prepared) => [
+  ...prepared.histogram.samples.map((a) => a.buffer),
+  ...prepared.scatter.flatMap((g) => [g.index.buffer, g.x.buffer, g.y.buffer]),
+  ...["index", "flows", "pressures", "temps"].map((key) => prepared.equipment[key].buffer),
+];
@@ -0,0 +1,12 @@
+import { prepareCharts, transferables } from "./chartData";
+
+// Receives a dataset's columns as typed arrays (transferred, not copied)
+// and answers with everything the dashboard charts draw
+self.onmessage = ({ data: { id, columns } }) => {
+  try {
+    const prepared = prepareCharts(columns);
+    self.postMessage({ id, prepared }, transferables(prepared));
+  } catch (err) {
+    self.postMessage({ id, error: String(err) });
+  }
+};
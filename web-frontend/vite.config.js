@@ -1,7 +1,67 @@
 import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
+import { gzipSync } from 'node:zlib'
+
+// Gzipped size limits in kB: `initial` is everything downloaded before the
+// first page can show (entry chunk, its static imports and their CSS),
+// `chunk` applies to every lazily loaded chunk. The build fails above them.
+const BUDGET = { initial: 120, chunk: 250 }
+// Network the first-load estimate is computed for
+const NETWORK = { name: 'Fast 3G', kbps: 1600, rttMs: 150 }
+
+// Reports gzipped chunk sizes and an estimated first-load time, and fails
+// the build when a chunk goes over budget
+function bundleBudget(budget = BUDGET, network = NETWORK) {
+  return {
+    name: 'bundle-budget',
+    apply: 'build',
+    enforce: 'post',
+    writeBundle(_, bundle) {
+      const gzipKb = (item) =>
+        gzipSync(item.type === 'chunk' ? item.code : item.source).length / 1024
+
+      const initial = new Set()
+      const visit = (fileName) => {
+        if (initial.has(fileName)) return
+        initial.add(fileName)
+        const chunk = bundle[fileName]
+        chunk.viteMetadata?.importedCss.forEach((css) => initial.add(css))
+        chunk.imports.forEach(visit)
+      }
+      Object.values(bundle)
+        .filter((item) => item.type === 'chunk' && item.isEntry)
+        .forEach((entry) => visit(entry.fileName))
+
+      const sizes = Object.values(bundle)
+        .filter((item) => /\.(js|css)$/.test(item.fileName))
+        .map((item) => ({ fileName: item.fileName, kb: gzipKb(item) }))
+        .sort((a, b) => b.kb - a.kb)
+      const initialKb = sizes
+        .filter(({ fileName }) => initial.has(fileName))
+        .reduce((sum, { kb }) => sum + kb, 0)
+      // HTML, then the entry with its preloaded imports in parallel
+      const firstLoadMs = 2 * network.rttMs + (initialKb * 8 * 1000) / network.kbps
+
+      console.log('\nBundle budget (gzipped):')
+      for (const { fileName, kb } of sizes) {
+        const where = initial.has(fileName) ? 'initial' : 'lazy'
+        console.log(`  ${kb.toFixed(1).padStart(7)} kB  ${where.padEnd(7)}  ${fileName}`)
+      }
+      console.log(`  initial load ${initialKb.toFixed(1)} kB of ${budget.initial} kB`)
+      console.log(`  estimated first load on ${network.name}: ${Math.round(firstLoadMs)} ms\n`)
+
+      const over = sizes
+        .filter(({ fileName, kb }) => !initial.has(fileName) && kb > budget.chunk)
+        .map(({ fileName, kb }) => `${fileName} is ${kb.toFixed(1)} kB (budget ${budget.chunk} kB)`)
+      if (initialKb > budget.initial) {
+        over.unshift(`initial load is ${initialKb.toFixed(1)} kB (budget ${budget.initial} kB)`)
+      }
+      if (over.length) this.error(`Bundle over budget:\n  ${over.join('\n  ')}`)
+    },
+  }
+}
 
 // https://vite.dev/config/
 export default defineConfig({
-  plugins: [react()],
+  plugins: [react(), bundleBudget()],
 })